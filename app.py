@@ -1,8 +1,31 @@
 from flask import Flask, send_from_directory
-from utils.routes import ADMIN_API_ROUTES, PUBLIC_ROUTES, PUBLIC_API_ROUTES
+from utils.routes import (
+    ADMIN_API_ROUTES,
+    PUBLIC_ROUTES,
+    PUBLIC_API_ROUTES,
+    notify_items_changed,
+    read_item_store_cached,
+    read_items_cached,
+)
 import os
-from utils.database import NotionItemTrackerClient
+from utils.breaker import CircuitBreaker
+from utils.cache import DEFAULT_CACHE_PATH, ItemCache
+from utils.database import NotionItemTrackerClient, is_notion_outage
+from utils.events import DEFAULT_EVENTS_PATH, ItemEventBroadcaster
+from utils.history import HistoryRecorder, ItemHistory
+from utils.idempotency import DEFAULT_IDEMPOTENCY_PATH, IdempotencyStore
+from utils.images import DEFAULT_IMAGE_CACHE_DIR, ItemImageProxy, ThumbnailCache
+from utils.journal import DEFAULT_JOURNAL_PATH, WriteBehindQueue
+from utils.logs import setup_logging
+from utils.pool import NotionClientPool, parse_databases
+from utils.profiler import DEFAULT_PROFILE_DIR, ProfileStore
+from utils.relations import RelationResolver
+from utils.responses import EncodedResponseCache
+from utils.search import ItemSearchIndex
+from utils.sessions import DEFAULT_SESSION_PATH, DEFAULT_SESSION_TTL, SessionManager
+from utils.snapshot import SnapshotRefresher, build_snapshot
 from utils.tools import load_config
+import click
 import json
 
 # 检查配置是否正确
@@ -40,6 +63,17 @@ if (
         print(f"CRITICAL: 程序在检查配置的时候遇到了未预料的错误：{e}")
         os._exit(1)
 
+# 日志：先写入内存队列，由后台线程输出，不阻塞请求
+setup_logging(
+    os.environ.get("LOG_LEVEL", load_config().get("log_level", "INFO")),
+    os.environ.get("LOG_FORMAT", load_config().get("log_format", "text")),
+    float(
+        os.environ.get(
+            "LOG_PAYLOAD_SAMPLE_RATE", load_config().get("log_payload_sample_rate", 0.1)
+        )
+    ),
+)
+
 # 初始化 Notion 客户端
 notion_client = NotionItemTrackerClient(
     os.environ.get("NOTION_TOKEN", load_config().get("token")),
@@ -47,6 +81,32 @@ notion_client = NotionItemTrackerClient(
 )
 
 app = Flask(__name__)
+# 在模块级别挂载客户端，gunicorn 等 WSGI 服务器导入 app 时也能复用同一个客户端
+app.client = notion_client
+
+# 熔断器：Notion 连续失败或响应过慢时打开，期间读取物品列表直接返回最近一次成功加载的数据
+app.config["BREAKER_FAILURE_THRESHOLD"] = int(
+    os.environ.get(
+        "BREAKER_FAILURE_THRESHOLD", load_config().get("breaker_failure_threshold", 3)
+    )
+)
+app.config["BREAKER_LATENCY_THRESHOLD"] = float(
+    os.environ.get(
+        "BREAKER_LATENCY_THRESHOLD", load_config().get("breaker_latency_threshold", 10)
+    )
+)
+app.config["BREAKER_RESET_TIMEOUT"] = float(
+    os.environ.get(
+        "BREAKER_RESET_TIMEOUT", load_config().get("breaker_reset_timeout", 30)
+    )
+)
+app.notion_breaker = CircuitBreaker(
+    app.config["BREAKER_FAILURE_THRESHOLD"],
+    app.config["BREAKER_LATENCY_THRESHOLD"],
+    app.config["BREAKER_RESET_TIMEOUT"],
+    is_failure=is_notion_outage,
+)
+notion_client.breaker = app.notion_breaker
 
 app.config["ENABLE_PUBLIC_VIEW"] = (
     True
@@ -66,11 +126,264 @@ app.config["WORTHIT_PASSWORD"] = (
     else load_config().get("credentials", {}).get("password")
 )
 
+# 物品缓存：多个 worker 进程通过同一个 SQLite 文件共享缓存
+app.config["ITEM_CACHE_PATH"] = (
+    os.environ.get("ITEM_CACHE_PATH", load_config().get("cache_path"))
+    or DEFAULT_CACHE_PATH
+)
+app.config["ITEM_CACHE_TTL"] = int(
+    os.environ.get("ITEM_CACHE_TTL", load_config().get("cache_ttl", 60))
+)
+app.item_cache = ItemCache(app.config["ITEM_CACHE_PATH"], app.config["ITEM_CACHE_TTL"])
+# 物品列表的已编码响应（含 gzip/brotli 版本），按物品缓存的版本号复用
+app.encoded_responses = EncodedResponseCache()
+
+# 创建物品的幂等键：多个 worker 进程通过单独的 SQLite 文件共享，重试的请求直接返回第一次的响应
+app.config["IDEMPOTENCY_PATH"] = (
+    os.environ.get("IDEMPOTENCY_PATH", load_config().get("idempotency_path"))
+    or DEFAULT_IDEMPOTENCY_PATH
+)
+app.config["IDEMPOTENCY_TTL"] = int(
+    os.environ.get("IDEMPOTENCY_TTL", load_config().get("idempotency_ttl", 86400))
+)
+app.config["IDEMPOTENCY_CAPACITY"] = int(
+    os.environ.get(
+        "IDEMPOTENCY_CAPACITY", load_config().get("idempotency_capacity", 10000)
+    )
+)
+app.idempotency_store = IdempotencyStore(
+    app.config["IDEMPOTENCY_PATH"],
+    app.config["IDEMPOTENCY_TTL"],
+    app.config["IDEMPOTENCY_CAPACITY"],
+)
+
+# 登录会话：令牌带过期时间并滑动续期，已验证的令牌缓存到过期为止，注销的会话记录在单独的 SQLite 文件中
+app.config["SESSION_PATH"] = (
+    os.environ.get("SESSION_PATH", load_config().get("session_path"))
+    or DEFAULT_SESSION_PATH
+)
+app.config["SESSION_TTL"] = int(
+    os.environ.get("SESSION_TTL", load_config().get("session_ttl", DEFAULT_SESSION_TTL))
+)
+app.config["SESSION_CACHE_SIZE"] = int(
+    os.environ.get("SESSION_CACHE_SIZE", load_config().get("session_cache_size", 1024))
+)
+app.sessions = SessionManager(
+    app.config["SECRET_KEY"],
+    app.config["SESSION_TTL"],
+    app.config["SESSION_PATH"],
+    app.config["SESSION_CACHE_SIZE"],
+)
+
+# 静态快照模式：配置快照目录后，/api/public/items 直接返回快照文件，不再请求 Notion
+app.config["STATIC_SNAPSHOT_DIR"] = os.environ.get(
+    "STATIC_SNAPSHOT_DIR", load_config().get("snapshot_dir", "")
+)
+app.config["SNAPSHOT_REFRESH_INTERVAL"] = int(
+    os.environ.get(
+        "SNAPSHOT_REFRESH_INTERVAL", load_config().get("snapshot_interval", 0)
+    )
+)
+
+if app.config["STATIC_SNAPSHOT_DIR"] and app.config["ENABLE_PUBLIC_VIEW"]:
+    app.snapshot_refresher = SnapshotRefresher(
+        notion_client,
+        app.config["STATIC_SNAPSHOT_DIR"],
+        app.config["SNAPSHOT_REFRESH_INTERVAL"],
+    )
+    app.snapshot_refresher.start()
+
+# 请求性能分析：管理员可以对单个请求开启采样分析，结果保存在磁盘上的环形缓冲区中
+app.config["PROFILE_DIR"] = (
+    os.environ.get("PROFILE_DIR", load_config().get("profile_dir")) or DEFAULT_PROFILE_DIR
+)
+app.config["PROFILE_CAPACITY"] = int(
+    os.environ.get("PROFILE_CAPACITY", load_config().get("profile_capacity", 50))
+)
+app.profile_store = ProfileStore(app.config["PROFILE_DIR"], app.config["PROFILE_CAPACITY"])
+
+# 延迟写入模式：管理员的增删改先写入本地日志并立即返回，由后台线程写入 Notion
+app.config["WRITE_BEHIND"] = (
+    True
+    if str(os.environ.get("WRITE_BEHIND", load_config().get("write_behind"))).lower()
+    in ["true", "1"]
+    else False
+)
+app.config["WRITE_BEHIND_JOURNAL"] = (
+    os.environ.get("WRITE_BEHIND_JOURNAL", load_config().get("write_behind_journal"))
+    or DEFAULT_JOURNAL_PATH
+)
+
+if app.config["WRITE_BEHIND"]:
+
+    def on_write_applied():
+        with app.app_context():
+            notify_items_changed()
+
+    app.write_queue = WriteBehindQueue(
+        notion_client, app.config["WRITE_BEHIND_JOURNAL"], on_applied=on_write_applied
+    )
+    app.write_queue.start()
+
+# 物品变化事件推送：写入成功后立即广播，有订阅者时后台定期通过缓存对比变化
+app.config["ITEM_STREAM_SYNC_INTERVAL"] = int(
+    os.environ.get(
+        "ITEM_STREAM_SYNC_INTERVAL", load_config().get("stream_sync_interval", 60)
+    )
+)
+
+
+def load_items_for_events():
+    with app.app_context():
+        return read_items_cached(notion_client)
+
+
+# 每个订阅连接占用一个线程，默认最多占用每个 worker 一半的线程
+app.config["ITEM_STREAM_MAX_SUBSCRIBERS"] = int(
+    os.environ.get(
+        "ITEM_STREAM_MAX_SUBSCRIBERS",
+        load_config().get(
+            "stream_max_subscribers",
+            max(int(os.environ.get("GUNICORN_THREADS", "4")) // 2, 1),
+        ),
+    )
+)
+# 事件日志：多个 worker 进程通过同一个 SQLite 文件共享事件和事件 ID
+app.config["ITEM_STREAM_EVENTS_PATH"] = (
+    os.environ.get("ITEM_STREAM_EVENTS_PATH", load_config().get("stream_events_path"))
+    or DEFAULT_EVENTS_PATH
+)
+app.item_events = ItemEventBroadcaster(
+    load_items_for_events,
+    app.config["ITEM_STREAM_SYNC_INTERVAL"],
+    max_subscribers=app.config["ITEM_STREAM_MAX_SUBSCRIBERS"],
+    path=app.config["ITEM_STREAM_EVENTS_PATH"],
+)
+notion_client.listeners.append(app.item_events.publish)
+
+# 物品名称和备注的搜索索引，写操作后增量更新
+app.search_index = ItemSearchIndex(max_age=app.config["ITEM_CACHE_TTL"] or 60)
+notion_client.listeners.append(app.search_index.apply_event)
+
+# 物品图片代理：缩略图保存在磁盘上按总大小限制的 LRU 缓存中
+app.config["IMAGE_CACHE_DIR"] = (
+    os.environ.get("IMAGE_CACHE_DIR", load_config().get("image_cache_dir"))
+    or DEFAULT_IMAGE_CACHE_DIR
+)
+app.config["IMAGE_CACHE_SIZE"] = int(
+    os.environ.get("IMAGE_CACHE_SIZE", load_config().get("image_cache_size", 200))
+)
+app.config["ITEM_IMAGE_PROPERTY"] = os.environ.get(
+    "ITEM_IMAGE_PROPERTY", load_config().get("image_property", "")
+)
+app.image_proxy = ItemImageProxy(
+    ThumbnailCache(
+        app.config["IMAGE_CACHE_DIR"], app.config["IMAGE_CACHE_SIZE"] * 1024 * 1024
+    ),
+    app.config["ITEM_IMAGE_PROPERTY"],
+)
+notion_client.listeners.append(app.image_proxy.apply_event)
+
+# 关联属性解析：请求带 expand=relations 时返回关联页面的标题，标题在进程内缓存
+app.config["RELATION_CACHE_TTL"] = int(
+    os.environ.get("RELATION_CACHE_TTL", load_config().get("relation_cache_ttl", 600))
+)
+app.config["RELATION_CACHE_SIZE"] = int(
+    os.environ.get("RELATION_CACHE_SIZE", load_config().get("relation_cache_size", 2048))
+)
+app.relation_resolver = RelationResolver(
+    app.config["RELATION_CACHE_SIZE"], app.config["RELATION_CACHE_TTL"]
+)
+notion_client.listeners.append(app.relation_resolver.apply_event)
+
+# 多数据库：通过 /api/public/databases/<键>/ 和 /api/admin/databases/<键>/ 访问其他数据库，
+# 客户端在第一次访问时创建并共享同一个 HTTP 连接池和限流器，缓存按数据库相互独立
+app.config["NOTION_DATABASES"] = parse_databases(
+    os.environ.get("NOTION_DATABASES", load_config().get("databases"))
+)
+app.config["DATABASE_POOL_SIZE"] = int(
+    os.environ.get("DATABASE_POOL_SIZE", load_config().get("database_pool_size", 8))
+)
+app.config["DATABASE_IDLE_TIMEOUT"] = int(
+    os.environ.get(
+        "DATABASE_IDLE_TIMEOUT", load_config().get("database_idle_timeout", 1800)
+    )
+)
+
+
+def setup_database(context):
+    context.client.breaker = app.notion_breaker
+    context.search_index = ItemSearchIndex(max_age=app.config["ITEM_CACHE_TTL"] or 60)
+    context.client.listeners.append(context.search_index.apply_event)
+    context.client.listeners.append(app.image_proxy.apply_event)
+    context.client.listeners.append(app.relation_resolver.apply_event)
+
+
+def release_database(context):
+    app.item_cache.release(f"items:{context.key}")
+
+
+app.client_pool = NotionClientPool(
+    os.environ.get("NOTION_TOKEN", load_config().get("token")),
+    app.config["NOTION_DATABASES"],
+    max_active=app.config["DATABASE_POOL_SIZE"],
+    idle_timeout=app.config["DATABASE_IDLE_TIMEOUT"],
+    on_create=setup_database,
+    on_evict=release_database,
+)
+
+# 物品历史：每天记录一次各物品的服役天数和日均价格，供 /api/public/items/<id>/history 查询
+# 历史需要长期保存，只有明确配置了 HISTORY_PATH 时才开启，
+# 避免在临时目录会被清空的环境（容器重新部署、Vercel 冷启动）中记录后丢失，并在每次启动时读取全部物品
+app.config["HISTORY_PATH"] = (
+    os.environ.get("HISTORY_PATH", load_config().get("history_path")) or ""
+)
+app.config["ENABLE_HISTORY"] = (
+    True
+    if str(os.environ.get("ENABLE_HISTORY", load_config().get("history"))).lower()
+    not in ["false", "0"]
+    else False
+) and bool(app.config["HISTORY_PATH"])
+
+if app.config["ENABLE_HISTORY"]:
+
+    def load_store_for_history():
+        with app.app_context():
+            return read_item_store_cached(notion_client)
+
+    app.item_history = ItemHistory(app.config["HISTORY_PATH"])
+    app.history_recorder = HistoryRecorder(app.item_history, load_store_for_history)
+    app.history_recorder.start()
+
+
+@app.cli.command("build-static")
+@click.option(
+    "--output", "-o", default="dist", show_default=True, help="快照输出目录"
+)
+def build_static(output: str):
+    """
+    导出公开物品列表 items.json 和预渲染的 index.html，用于纯 CDN 托管。
+    """
+    if not app.config["ENABLE_PUBLIC_VIEW"]:
+        raise click.ClickException("未开启公开展示 (ENABLE_PUBLIC_VIEW)，不能导出公开快照。")
+    build_snapshot(notion_client, output, with_site=True)
+
+
 # 注册蓝图
 app.register_blueprint(ADMIN_API_ROUTES, url_prefix="/api/admin")
 app.register_blueprint(PUBLIC_ROUTES, url_prefix="/")
 app.register_blueprint(PUBLIC_API_ROUTES, url_prefix="/api/public")
+if app.config["NOTION_DATABASES"]:
+    app.register_blueprint(
+        ADMIN_API_ROUTES,
+        url_prefix="/api/admin/databases/<database_key>",
+        name="database_admin_api_routes",
+    )
+    app.register_blueprint(
+        PUBLIC_API_ROUTES,
+        url_prefix="/api/public/databases/<database_key>",
+        name="database_public_api_routes",
+    )
 
 if __name__ == "__main__":
-    app.client = notion_client
     app.run(host="127.0.0.1", port=5000, debug=False)
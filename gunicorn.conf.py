@@ -0,0 +1,45 @@
+# gunicorn 生产环境配置，使用方式：gunicorn -c gunicorn.conf.py app:app
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# gthread：每个 worker 使用多个线程处理请求，适合主要耗时在等待 Notion 响应的场景
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+
+# 预加载应用：Notion 客户端与缓存只在主进程中初始化一次，再 fork 给各个 worker
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """
+    worker fork 后重置从主进程继承的日志线程、缓存连接、锁和后台线程状态。
+    """
+    from app import app
+    from utils import logs
+
+    logs.after_fork()
+    for name in (
+        "notion_breaker",
+        "item_cache",
+        "idempotency_store",
+        "sessions",
+        "encoded_responses",
+        "snapshot_refresher",
+        "write_queue",
+        "item_events",
+        "search_index",
+        "image_proxy",
+        "relation_resolver",
+        "client_pool",
+        "item_history",
+        "history_recorder",
+    ):
+        component = getattr(app, name, None)
+        if component is not None:
+            component.after_fork()
@@ -1,3 +1,19 @@
+/**
+ * 当前访问的数据库键，来自地址中的 ?db= 参数，为空时使用默认数据库。
+ */
+const DATABASE_KEY = new URLSearchParams(window.location.search).get('db') || '';
+
+/**
+ * 生成当前数据库的接口地址。
+ * @param {string} scope - 接口范围，'public' 或 'admin'。
+ * @param {string} path - 接口路径，以 '/' 开头。
+ * @returns {string} 接口地址。
+ */
+function apiUrl(scope, path) {
+    const prefix = DATABASE_KEY ? `/databases/${encodeURIComponent(DATABASE_KEY)}` : '';
+    return `/api/${scope}${prefix}${path}`;
+}
+
 /**
  * 更改导航栏选中状态
  * 移除所有导航元素的'checked'属性，并设置当前点击的元素为'checked'。
@@ -216,6 +232,352 @@ async function logout() {
     }
 }
 
+/**
+ * 读取静态快照页面中内嵌的物品数据。
+ * @returns {Response|null} 包装为 Response 的快照数据，页面中没有快照时返回 null。
+ */
+function readItemsSnapshot() {
+    const snapshotElement = document.getElementById('items-snapshot');
+    if (!snapshotElement) {
+        return null;
+    }
+    return new Response(snapshotElement.textContent, {
+        status: 200,
+        headers: { 'Content-Type': 'application/json' }
+    });
+}
+
+/**
+ * 物品列表的渲染状态。
+ * 物品卡片按顺序分批渲染，已渲染的卡片总是列表的前 rendered 个物品。
+ */
+const itemListState = {
+    items: [], // 当前列表中的物品数据（按显示顺序）
+    cards: new Map(), // 物品ID -> { element, signature }，只包含已渲染的卡片
+    rendered: 0, // 已渲染到页面中的物品数量
+    loggedIn: false, // 渲染时的登录状态，决定是否显示编辑和删除按钮
+    watermark: null, // 增量同步的水位线，由后端返回
+    related: {}, // 关联属性引用的页面ID -> { id, title }，由后端通过 expand=relations 返回
+    observer: null, // 监听列表底部，按需渲染下一批卡片
+    rendering: false, // 是否正在分批渲染
+    renderToken: 0 // 每次完整刷新时递增，用于中止上一次未完成的分批渲染
+};
+
+const ITEM_RENDER_BATCH_SIZE = 50; // 每一帧最多创建的卡片数量
+const ITEM_RENDER_WINDOW = 100; // 首次渲染以及每次滚动到底部附近时追加的卡片数量
+
+/**
+ * 等待下一个动画帧。
+ * @returns {Promise<number>}
+ */
+function nextAnimationFrame() {
+    return new Promise(resolve => requestAnimationFrame(resolve));
+}
+
+/**
+ * 为单个物品创建卡片元素。
+ * @param {Object} item - 物品数据。
+ * @param {boolean} loggedIn - 是否已登录，已登录时显示编辑和删除按钮。
+ * @returns {HTMLDivElement} 包含 s-card 的物品元素。
+ */
+function createItemCard(item, loggedIn) {
+    const itemElement = document.createElement('div');
+    itemElement.className = 'item';
+    itemElement.dataset.itemId = item.id;
+
+    // 计算总价值
+    const totalValue = (item.properties.购买价格 || 0) + (item.properties.附加价值 || 0);
+
+    // 创建 s-card 组件
+    const sCard = document.createElement('s-card');
+    sCard.setAttribute('type', 'outlined');
+    sCard.style.padding = '16px';
+
+    // 设置 image (物品图片)，地址带上修改时间，物品修改后浏览器会重新请求
+    if (item.has_image) {
+        const image = document.createElement('img');
+        image.setAttribute('slot', 'image');
+        image.className = 'item-image';
+        image.loading = 'lazy';
+        image.decoding = 'async';
+        image.alt = item.properties.物品名称 || '';
+        const width = Math.min(Math.round(400 * (window.devicePixelRatio || 1)), 1280);
+        image.src = apiUrl('public', `/items/${encodeURIComponent(item.id)}/image?w=${width}&v=${encodeURIComponent(item.last_edited_time || '')}`);
+        image.onerror = () => image.remove();
+        sCard.appendChild(image);
+    }
+
+    // 设置 headline (物品名称)
+    const headlineDiv = document.createElement('div');
+    headlineDiv.setAttribute('slot', 'headline');
+    headlineDiv.textContent = item.properties.物品名称 || '未知物品';
+    sCard.appendChild(headlineDiv);
+
+    // 设置 subhead (备注)
+    const subheadDiv = document.createElement('div');
+    subheadDiv.setAttribute('slot', 'subhead');
+    subheadDiv.style.marginTop = '8px';
+    subheadDiv.textContent = item.properties.备注 || '';
+    sCard.appendChild(subheadDiv);
+
+    // 设置 text 部分 (物品属性)
+    const textDiv = document.createElement('div');
+    textDiv.setAttribute('slot', 'text');
+    textDiv.style.marginTop = '8px';
+
+    // 添加购买价格
+    const purchasePriceDiv = document.createElement('div');
+    purchasePriceDiv.textContent = `购买价格：${item.properties.购买价格 !== undefined ? item.properties.购买价格 + ' 元' : '未填写'}`;
+    textDiv.appendChild(purchasePriceDiv);
+
+    // 添加附加价值（如果存在）
+    if (item.properties.附加价值 !== undefined) {
+        const additionalValueDiv = document.createElement('div');
+        additionalValueDiv.textContent = `附加价值：${item.properties.附加价值} 元`;
+        textDiv.appendChild(additionalValueDiv);
+    }
+
+    // 添加总价值
+    const totalValueDiv = document.createElement('div');
+    totalValueDiv.textContent = `总价值：${totalValue} 元`;
+    textDiv.appendChild(totalValueDiv);
+
+    // 添加购买日期
+    const entryDateDiv = document.createElement('div');
+    entryDateDiv.textContent = `购买日期：${item.properties.入役日期 || '还没有到货诶 (๑•.•๑)'}`;
+    textDiv.appendChild(entryDateDiv);
+
+    // 添加退役日期（如果存在）
+    if (item.properties.退役日期) {
+        const retirementDateDiv = document.createElement('div');
+        retirementDateDiv.textContent = `退役日期：${item.properties.退役日期}`;
+        textDiv.appendChild(retirementDateDiv);
+    }
+
+    // 添加服役天数
+    const serviceDaysDiv = document.createElement('div');
+    serviceDaysDiv.textContent = `服役天数：${item.properties.服役天数 !== undefined ? item.properties.服役天数 : (item.properties.入役日期? '计算中...': "是预售品诶，到货了再来登记吧！")}`;
+    textDiv.appendChild(serviceDaysDiv);
+
+    // 添加日均价格
+    const dailyPriceDiv = document.createElement('div');
+    dailyPriceDiv.textContent = `日均价格：${item.properties.日均价格 ? item.properties.日均价格 : (item.properties.入役日期 ? "是刚刚开始用嘛？明天再来看吧 (¬◡¬)✧" : "诶？是预售品嘛 ꒰⑅°͈꒳​°͈꒱？")}`;
+    textDiv.appendChild(dailyPriceDiv);
+
+    // 添加关联属性（例如设备的配件），显示关联页面的标题
+    for (const [propName, value] of Object.entries(item.properties)) {
+        if (!Array.isArray(value) || value.length === 0
+            || !value.every(pageId => Object.hasOwn(itemListState.related, pageId))) {
+            continue;
+        }
+        const relationDiv = document.createElement('div');
+        relationDiv.textContent = `${propName}：${value.map(pageId => itemListState.related[pageId].title || '未命名').join('、')}`;
+        textDiv.appendChild(relationDiv);
+    }
+
+    // 创建按钮容器
+    const buttonContainer = document.createElement('div');
+    buttonContainer.style.marginTop = '8px';
+    buttonContainer.style.display = 'flex';
+    buttonContainer.style.justifyContent = 'flex-end';
+    buttonContainer.style.gap = '8px';
+
+    // 如果已登录，显示编辑按钮
+    if (loggedIn) {
+        const editButton = document.createElement('s-button');
+        editButton.setAttribute('type', 'filled-tonal');
+        editButton.textContent = '编辑';
+        editButton.onclick = () => openEditItemDialog(item.id, item.properties.物品名称); // 绑定点击事件
+        buttonContainer.appendChild(editButton);
+    }
+
+    // 如果已登录，显示删除按钮
+    if (loggedIn) {
+        const deleteButton = document.createElement('s-button');
+        deleteButton.setAttribute('type', 'outlined');
+        deleteButton.textContent = '删除';
+        deleteButton.onclick = () => openDeleteItemDialog(item.id, item.properties.物品名称); // 绑定点击事件
+        buttonContainer.appendChild(deleteButton);
+    }
+
+    textDiv.appendChild(buttonContainer); // 将按钮容器添加到 textDiv
+    sCard.appendChild(textDiv); // 将 textDiv 添加到 s-card
+    itemElement.appendChild(sCard); // 将 s-card 添加到 itemElement
+    return itemElement;
+}
+
+/**
+ * 中止正在进行的分批渲染并清空渲染状态。
+ * @returns {void}
+ */
+function resetItemListState() {
+    itemListState.renderToken++;
+    itemListState.items = [];
+    itemListState.cards.clear();
+    itemListState.rendered = 0;
+    itemListState.rendering = false;
+    itemListState.watermark = null;
+    if (itemListState.observer) {
+        itemListState.observer.disconnect();
+        itemListState.observer = null;
+    }
+}
+
+/**
+ * 将一批物品卡片放入 DocumentFragment 后一次性插入页面，减少重排次数。
+ * @param {HTMLElement} itemList - 物品列表容器。
+ * @param {number} end - 渲染到第几个物品（不包含）。
+ * @returns {void}
+ */
+function renderItemBatch(itemList, end) {
+    const fragment = document.createDocumentFragment();
+    for (let i = itemListState.rendered; i < end; i++) {
+        const item = itemListState.items[i];
+        const element = createItemCard(item, itemListState.loggedIn);
+        itemListState.cards.set(item.id, { element, signature: JSON.stringify(item) });
+        fragment.appendChild(element);
+    }
+    itemListState.rendered = end;
+    itemList.appendChild(fragment);
+}
+
+/**
+ * 渲染下一个窗口的物品卡片，每一帧只渲染一批，避免长时间阻塞主线程。
+ * @returns {Promise<void>}
+ */
+async function renderNextItemWindow() {
+    if (itemListState.rendering) {
+        return;
+    }
+    itemListState.rendering = true;
+    const token = itemListState.renderToken;
+    const itemList = document.getElementById('item-list-container');
+    const end = Math.min(itemListState.rendered + ITEM_RENDER_WINDOW, itemListState.items.length);
+    while (itemListState.rendered < end) {
+        await nextAnimationFrame();
+        // 期间开始了新的完整刷新，放弃本次渲染
+        if (token !== itemListState.renderToken) {
+            return;
+        }
+        renderItemBatch(itemList, Math.min(itemListState.rendered + ITEM_RENDER_BATCH_SIZE, end));
+    }
+    itemListState.rendering = false;
+    observeItemListEnd();
+}
+
+/**
+ * 监听物品列表底部，滚动到附近时渲染下一个窗口。
+ * @returns {void}
+ */
+function observeItemListEnd() {
+    if (itemListState.observer) {
+        itemListState.observer.disconnect();
+        itemListState.observer = null;
+    }
+    if (itemListState.rendered >= itemListState.items.length) {
+        return;
+    }
+    const itemList = document.getElementById('item-list-container');
+    const lastCard = itemList.lastElementChild;
+    if (!lastCard || !window.IntersectionObserver) {
+        renderNextItemWindow();
+        return;
+    }
+    itemListState.observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            itemListState.observer.disconnect();
+            itemListState.observer = null;
+            renderNextItemWindow();
+        }
+    }, { root: document.querySelector('.main'), rootMargin: '800px 0px' });
+    itemListState.observer.observe(lastCard);
+}
+
+/**
+ * 将物品变化应用到已渲染的列表上，只重建发生变化的卡片。
+ * @param {Array<Object>} changedItems - 新增或修改的物品。
+ * @param {Array<string>} archivedIds - 已归档（删除）的物品ID。
+ * @returns {void}
+ */
+function applyItemChanges(changedItems, archivedIds) {
+    const itemList = document.getElementById('item-list-container');
+    const previousLength = itemListState.items.length;
+    const positions = new Map(itemListState.items.map((item, index) => [item.id, index]));
+    const removed = new Set(archivedIds.filter(id => positions.has(id)));
+
+    changedItems.forEach(item => {
+        const signature = JSON.stringify(item);
+        if (positions.has(item.id)) {
+            itemListState.items[positions.get(item.id)] = item;
+            const card = itemListState.cards.get(item.id);
+            // 内容没有变化的卡片保持不动
+            if (card && card.signature !== signature) {
+                const element = createItemCard(item, itemListState.loggedIn);
+                card.element.replaceWith(element);
+                itemListState.cards.set(item.id, { element, signature });
+            }
+        } else {
+            positions.set(item.id, itemListState.items.length);
+            itemListState.items.push(item);
+        }
+    });
+
+    removed.forEach(id => {
+        const card = itemListState.cards.get(id);
+        if (card) {
+            card.element.remove();
+            itemListState.cards.delete(id);
+        }
+    });
+    if (removed.size > 0) {
+        itemListState.items = itemListState.items.filter(item => !removed.has(item.id));
+    }
+    itemListState.rendered = itemListState.cards.size;
+
+    // 原本为空或删除后为空时需要切换空状态提示，直接完整刷新
+    if (previousLength === 0 || itemListState.items.length === 0) {
+        flushItemList();
+        return;
+    }
+    // 已经全部渲染时，新增的物品直接追加到列表末尾
+    if (itemListState.rendered === previousLength - removed.size) {
+        renderItemBatch(itemList, itemListState.items.length);
+    }
+    document.getElementById('item-counter').innerText = itemListState.items.length;
+}
+
+/**
+ * 增量刷新物品列表：只请求上次同步之后发生变化的物品并更新对应卡片。
+ * 没有同步记录（或处于静态快照页面）时进行完整刷新。
+ * @returns {Promise<void>}
+ */
+async function refreshItemList() {
+    if (readItemsSnapshot() || !itemListState.watermark) {
+        return flushItemList();
+    }
+    try {
+        const response = await fetch(apiUrl('public', `/items/changes?since=${encodeURIComponent(itemListState.watermark)}&expand=relations`), {
+            method: 'GET',
+            credentials: 'include' // 确保发送cookie以处理私有页面情况
+        });
+        if (!response.ok) {
+            throw new Error(`增量同步失败: ${response.status}`);
+        }
+        const data = await response.json();
+        const returnedIds = new Set(data.items.map(item => item.id));
+        // 延迟写入模式下的临时物品写入 Notion 后会换成正式ID，不再返回的临时物品需要移除
+        const archivedIds = data.archived.concat(itemListState.items
+            .filter(item => (data.full || item.id.startsWith('local-')) && !returnedIds.has(item.id))
+            .map(item => item.id));
+        Object.assign(itemListState.related, data.related || {});
+        applyItemChanges(data.items, archivedIds);
+        itemListState.watermark = data.watermark;
+    } catch (error) {
+        console.error('增量刷新物品列表时出错:', error);
+        return flushItemList();
+    }
+}
+
 /**
  * 刷新物品列表，根据用户登录状态显示/隐藏编辑和删除按钮
  * @param {boolean} [active=false] - 未使用的参数，但保留以便将来扩展。
@@ -236,16 +598,20 @@ async function flushItemList(active = false) {
     loadingText.innerText = '正在加载物品列表，请稍候...';
     itemList.classList.add('hidden'); // 隐藏物品列表容器
 
+    resetItemListState(); // 中止上一次未完成的渲染并清空渲染状态
     itemList.innerHTML = ''; // 清空当前物品列表
     const counter = document.getElementById('item-counter');
     counter.innerText = '0'; // 重置物品计数器
 
+    // 静态快照页面（build-static 导出）内嵌了物品数据，无需请求后端
+    const snapshot = readItemsSnapshot();
+
     // 检查用户登录状态
-    const loggedIn = await checkTokenExistsAndValid();
+    const loggedIn = snapshot ? false : await checkTokenExistsAndValid();
 
     try {
         // 发送请求获取物品列表
-        const response = await fetch('/api/public/items', {
+        const response = snapshot || await fetch(apiUrl('public', '/items?expand=relations'), {
             method: 'GET',
             credentials: 'include' // 确保发送cookie以处理私有页面情况
         });
@@ -280,6 +646,13 @@ async function flushItemList(active = false) {
         const data = await response.json(); // 解析成功的响应数据
 
         counter.innerText = data.items.length || 0; // 更新物品计数
+        // Notion 暂时不可用时后端返回最近一次成功加载的数据
+        if (data.stale) {
+            console.warn('物品列表来自缓存，加载于', data.stale.loaded_at);
+            counter.title = `Notion 暂时不可用，当前显示的是 ${new Date(data.stale.loaded_at).toLocaleString()} 的数据`;
+        } else {
+            counter.removeAttribute('title');
+        }
 
         // 如果物品列表为空
         if (data.items.length === 0) {
@@ -294,107 +667,13 @@ async function flushItemList(active = false) {
             return; // 结束函数执行
         }
 
-        // 遍历物品数据，为每个物品创建DOM元素并添加到列表中
-        data.items.forEach(item => {
-            const itemElement = document.createElement('div');
-            itemElement.className = 'item';
-
-            // 计算总价值
-            const totalValue = (item.properties.购买价格 || 0) + (item.properties.附加价值 || 0);
-
-            // 创建 s-card 组件
-            const sCard = document.createElement('s-card');
-            sCard.setAttribute('type', 'outlined');
-            sCard.style.padding = '16px';
-
-            // 设置 headline (物品名称)
-            const headlineDiv = document.createElement('div');
-            headlineDiv.setAttribute('slot', 'headline');
-            headlineDiv.textContent = item.properties.物品名称 || '未知物品';
-            sCard.appendChild(headlineDiv);
-
-            // 设置 subhead (备注)
-            const subheadDiv = document.createElement('div');
-            subheadDiv.setAttribute('slot', 'subhead');
-            subheadDiv.style.marginTop = '8px';
-            subheadDiv.textContent = item.properties.备注 || '';
-            sCard.appendChild(subheadDiv);
-
-            // 设置 text 部分 (物品属性)
-            const textDiv = document.createElement('div');
-            textDiv.setAttribute('slot', 'text');
-            textDiv.style.marginTop = '8px';
-
-            // 添加购买价格
-            const purchasePriceDiv = document.createElement('div');
-            purchasePriceDiv.textContent = `购买价格：${item.properties.购买价格 !== undefined ? item.properties.购买价格 + ' 元' : '未填写'}`;
-            textDiv.appendChild(purchasePriceDiv);
-
-            // 添加附加价值（如果存在）
-            if (item.properties.附加价值 !== undefined) {
-                const additionalValueDiv = document.createElement('div');
-                additionalValueDiv.textContent = `附加价值：${item.properties.附加价值} 元`;
-                textDiv.appendChild(additionalValueDiv);
-            }
-
-            // 添加总价值
-            const totalValueDiv = document.createElement('div');
-            totalValueDiv.textContent = `总价值：${totalValue} 元`;
-            textDiv.appendChild(totalValueDiv);
-
-            // 添加购买日期
-            const entryDateDiv = document.createElement('div');
-            entryDateDiv.textContent = `购买日期：${item.properties.入役日期 || '还没有到货诶 (๑•.•๑)'}`;
-            textDiv.appendChild(entryDateDiv);
-
-            // 添加退役日期（如果存在）
-            if (item.properties.退役日期) {
-                const retirementDateDiv = document.createElement('div');
-                retirementDateDiv.textContent = `退役日期：${item.properties.退役日期}`;
-                textDiv.appendChild(retirementDateDiv);
-            }
-
-            // 添加服役天数
-            const serviceDaysDiv = document.createElement('div');
-            serviceDaysDiv.textContent = `服役天数：${item.properties.服役天数 !== undefined ? item.properties.服役天数 : (item.properties.入役日期? '计算中...': "是预售品诶，到货了再来登记吧！")}`;
-            textDiv.appendChild(serviceDaysDiv);
-
-            // 添加日均价格
-            const dailyPriceDiv = document.createElement('div');
-            dailyPriceDiv.textContent = `日均价格：${item.properties.日均价格 ? item.properties.日均价格 : (item.properties.入役日期 ? "是刚刚开始用嘛？明天再来看吧 (¬◡¬)✧" : "诶？是预售品嘛 ꒰⑅°͈꒳​°͈꒱？")}`;
-            textDiv.appendChild(dailyPriceDiv);
-
-            // 创建按钮容器
-            const buttonContainer = document.createElement('div');
-            buttonContainer.style.marginTop = '8px';
-            buttonContainer.style.display = 'flex';
-            buttonContainer.style.justifyContent = 'flex-end';
-            buttonContainer.style.gap = '8px';
-
-            // 如果已登录，显示编辑按钮
-            if (loggedIn) {
-                const editButton = document.createElement('s-button');
-                editButton.setAttribute('type', 'filled-tonal');
-                editButton.textContent = '编辑';
-                editButton.onclick = () => openEditItemDialog(item.id, item.properties.物品名称); // 绑定点击事件
-                buttonContainer.appendChild(editButton);
-            }
-
-            // 如果已登录，显示删除按钮
-            if (loggedIn) {
-                const deleteButton = document.createElement('s-button');
-                deleteButton.setAttribute('type', 'outlined');
-                deleteButton.textContent = '删除';
-                deleteButton.onclick = () => openDeleteItemDialog(item.id, item.properties.物品名称); // 绑定点击事件
-                buttonContainer.appendChild(deleteButton);
-            }
-
-            textDiv.appendChild(buttonContainer); // 将按钮容器添加到 textDiv
-            sCard.appendChild(textDiv); // 将 textDiv 添加到 s-card
-            itemElement.appendChild(sCard); // 将 s-card 添加到 itemElement
-            itemList.appendChild(itemElement); // 将 itemElement 添加到物品列表容器
-        });
+        // 分批渲染第一屏物品卡片，其余的在滚动到底部附近时再渲染
+        itemListState.items = data.items;
+        itemListState.loggedIn = loggedIn;
+        itemListState.watermark = data.watermark || data.generated_at || null;
+        itemListState.related = data.related || {};
         itemList.classList.remove('hidden'); // 显示物品列表容器
+        await renderNextItemWindow();
     } catch (error) {
         // 捕获并处理获取物品列表过程中的错误
         console.error('获取物品列表时出错:', error);
@@ -404,6 +683,123 @@ async function flushItemList(active = false) {
     }
 }
 
+/**
+ * 订阅物品变化事件（Server-Sent Events），其他地方修改物品后只更新对应的卡片。
+ * 静态快照页面没有后端，不进行订阅。
+ * @returns {EventSource|null} 事件源对象，不支持或无需订阅时返回 null。
+ */
+function subscribeItemEvents() {
+    // 实时推送只支持默认数据库
+    if (!window.EventSource || document.getElementById('items-snapshot') || DATABASE_KEY) {
+        return null;
+    }
+    const source = new EventSource('/api/public/items/stream', { withCredentials: true });
+    let changed = new Map();
+    let archived = new Set();
+    let applyTimer = null;
+    const onItemEvent = (event) => {
+        const data = JSON.parse(event.data);
+        if (event.type === 'archive') {
+            changed.delete(data.id);
+            archived.add(data.id);
+        } else {
+            archived.delete(data.id);
+            changed.set(data.id, data.item);
+        }
+        // 短时间内的多个事件合并为一次更新
+        clearTimeout(applyTimer);
+        applyTimer = setTimeout(() => {
+            const items = Array.from(changed.values());
+            const ids = Array.from(archived);
+            changed = new Map();
+            archived = new Set();
+            applyItemChanges(items, ids);
+        }, 500);
+    };
+    ['create', 'update', 'archive'].forEach(type => source.addEventListener(type, onItemEvent));
+    // 断线期间的事件已无法补发，重新同步物品列表
+    source.addEventListener('resync', () => refreshItemList());
+    source.addEventListener('error', () => {
+        // 服务器订阅已满（503）时浏览器不会自动重连，稍后重新订阅
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeItemEvents, 60000);
+        }
+    });
+    return source;
+}
+
+/**
+ * 物品列表渲染性能测试，可在浏览器控制台中调用，例如 benchmarkItemRendering([1000, 10000])。
+ * 使用生成的测试数据在页面外的容器中渲染，不影响当前列表。
+ * 对比逐个插入卡片（原实现）与按帧分批插入 DocumentFragment（现实现）的耗时，
+ * 其中"最长单帧"是分批渲染时主线程被单次阻塞的最长时间，"首屏窗口"是首次只渲染一个窗口所需的时间。
+ * @param {Array<number>} sizes - 测试的物品数量。
+ * @returns {Promise<Array<Object>>} 每个数量对应的测试结果（毫秒）。
+ */
+async function benchmarkItemRendering(sizes = [1000, 10000]) {
+    const results = [];
+    for (const size of sizes) {
+        const items = Array.from({ length: size }, (_, i) => ({
+            id: `benchmark-${i}`,
+            archived: false,
+            properties: {
+                '物品名称': `测试物品 ${i}`,
+                '购买价格': 100 + i,
+                '附加价值': i % 3 === 0 ? 10 : undefined,
+                '入役日期': '2024-01-01',
+                '退役日期': i % 5 === 0 ? '2025-01-01' : null,
+                '服役天数': `${i % 365 + 1} 天`,
+                '日均价格': `${(100 / (i % 365 + 1)).toFixed(2)} 元`,
+                '备注': i % 2 === 0 ? `这是第 ${i} 个测试物品的备注` : null
+            }
+        }));
+        const container = document.createElement('div');
+        container.className = 'list';
+        container.style.cssText = 'position: absolute; left: -10000px; top: 0; width: 1200px;';
+        document.body.appendChild(container);
+
+        // 原实现：逐个创建并插入卡片
+        let start = performance.now();
+        items.forEach(item => container.appendChild(createItemCard(item, true)));
+        void container.offsetHeight; // 强制布局，把排版时间计入
+        const sequential = performance.now() - start;
+        container.innerHTML = '';
+        await nextAnimationFrame();
+
+        // 现实现：每帧一批，通过 DocumentFragment 一次性插入
+        const renderBatches = async (count) => {
+            let longestFrame = 0;
+            const begin = performance.now();
+            for (let offset = 0; offset < count; offset += ITEM_RENDER_BATCH_SIZE) {
+                await nextAnimationFrame();
+                const frameStart = performance.now();
+                const fragment = document.createDocumentFragment();
+                items.slice(offset, Math.min(offset + ITEM_RENDER_BATCH_SIZE, count))
+                    .forEach(item => fragment.appendChild(createItemCard(item, true)));
+                container.appendChild(fragment);
+                void container.offsetHeight;
+                longestFrame = Math.max(longestFrame, performance.now() - frameStart);
+            }
+            return { total: performance.now() - begin, longestFrame };
+        };
+        const batched = await renderBatches(size);
+        container.innerHTML = '';
+        await nextAnimationFrame();
+        const windowed = await renderBatches(Math.min(ITEM_RENDER_WINDOW, size));
+        container.remove();
+
+        results.push({
+            '物品数量': size,
+            '逐个插入 (ms)': +sequential.toFixed(1),
+            '分批插入总耗时 (ms)': +batched.total.toFixed(1),
+            '分批插入最长单帧 (ms)': +batched.longestFrame.toFixed(1),
+            '首屏窗口 (ms)': +windowed.total.toFixed(1)
+        });
+    }
+    console.table(results);
+    return results;
+}
+
 /**
  * 创建一个延时Promise。
  * @param {number} time - 延时的时间，单位毫秒。
@@ -438,7 +834,7 @@ function openDeleteItemDialog(itemId, itemName) {
  */
 function deleteItem(itemId, itemName) {
     // 发送DELETE请求到后端API删除物品
-    fetch(`/api/admin/items/${itemId}`, {
+    fetch(apiUrl('admin', `/items/${itemId}`), {
         method: 'DELETE',
         credentials: 'include' // 确保请求包含cookie
     }).then(response => {
@@ -451,7 +847,7 @@ function deleteItem(itemId, itemName) {
             throw new Error(`删除物品 ${itemName} 失败了 ╯﹏╰`);
         }
     }).then(() => {
-        flushItemList(); // 删除成功后刷新物品列表
+        refreshItemList(); // 删除成功后更新物品列表
     }).catch(error => {
         // 捕获并处理删除物品过程中的错误
         console.error('删除物品时出错:', error);
@@ -500,7 +896,7 @@ function openEditItemDialog(itemId, itemName) {
     dialog.setAttribute('showed', 'true'); // 显示编辑对话框
 
     // 发送请求获取物品的详细信息
-    fetch(`/api/admin/items/${itemId}`, {
+    fetch(apiUrl('admin', `/items/${itemId}`), {
         method: 'GET',
         credentials: 'include' // 确保请求包含cookie
     }).then(response => {
@@ -615,7 +1011,7 @@ async function editItem(itemId, prevData) {
 
     try {
         // 发送PATCH请求到后端API更新物品信息
-        const response = await fetch(`/api/admin/items/${itemId}`, {
+        const response = await fetch(apiUrl('admin', `/items/${itemId}`), {
             method: 'PATCH',
             headers: {
                 'Content-Type': 'application/json' // 设置请求头为JSON格式
@@ -626,8 +1022,14 @@ async function editItem(itemId, prevData) {
 
         // 检查响应是否成功
         if (response.ok) {
+            const result = await response.json();
+            // 后端与当前数据对比后没有需要写入的属性（例如物品已在其他地方被改成相同的值）
+            if (Array.isArray(result.written_properties) && result.written_properties.length === 0) {
+                showDialog("提示", "物品信息与当前数据一致，无需更新。");
+                return;
+            }
             showDialog("成功", "物品信息修改成功，物品列表将在稍后刷新"); // 显示成功对话框
-            await flushItemList(); // 刷新物品列表
+            await refreshItemList(); // 更新物品列表
         } else {
             const errorText = await response.text(); // 获取错误响应文本
             let errorMessage = `修改物品信息失败: ${response.status} - ${response.statusText}`;
@@ -963,6 +1365,12 @@ function autoPaddingDatePicker() {
     }
 }
 
+/**
+ * 最近一次未确认成功的添加请求：{ body, key }。
+ * 以相同的内容重新提交时沿用同一个幂等键，请求超时后重试不会重复创建物品。
+ */
+let pendingAddItem = null;
+
 /**
  * 添加新物品到列表中。
  * 获取表单输入，进行验证，然后发送POST请求到后端API创建新物品。
@@ -994,25 +1402,34 @@ function addItem() {
             remark: itemDescriptionInput.value || '' // 如果为空，默认为空字符串
         }
     };
+    const body = JSON.stringify(newItem);
+    if (!pendingAddItem || pendingAddItem.body !== body) {
+        const key = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        pendingAddItem = { body, key };
+    }
     showDialog("正在添加", `请稍候，正在添加物品「${itemNameInput.value}」...`); // 显示添加中提示
     // 发送POST请求到后端API添加物品
-    fetch('/api/admin/items', {
+    fetch(apiUrl('admin', '/items'), {
         method: 'POST',
         headers: {
-            'Content-Type': 'application/json' // 设置请求头为JSON格式
+            'Content-Type': 'application/json', // 设置请求头为JSON格式
+            'Idempotency-Key': pendingAddItem.key // 重试时沿用同一个键，避免重复创建
         },
         credentials: 'include', // 确保请求包含cookie
-        body: JSON.stringify(newItem) // 发送新物品数据
+        body: body // 发送新物品数据
     }).then(response => {
         // 检查响应是否成功
         if (response.ok) {
+            pendingAddItem = null;
             showDialog("成功", "物品添加成功，即将刷新物品列表"); // 显示成功对话框
             return response.json(); // 解析JSON响应
         } else {
             throw new Error('添加物品失败，请稍后再试'); // 抛出错误
         }
     }).then(() => {
-        flushItemList(); // 添加成功后刷新物品列表
+        refreshItemList(); // 添加成功后更新物品列表
     }).catch(error => {
         // 捕获并处理添加物品过程中的错误
         console.error('添加物品时出错:', error);
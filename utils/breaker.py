@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from utils.logs import get_logger
+
+logger = get_logger("breaker")
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    熔断器处于打开状态，请求没有发送给 Notion。
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Notion 暂时不可用，熔断器已打开，{retry_after:.0f} 秒后重试。")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Notion 请求的熔断器。
+    连续失败（或耗时超过阈值）达到一定次数后打开，打开期间的请求直接抛出 CircuitOpenError，
+    不再等待 Notion 超时；经过 reset_timeout 秒后进入半开状态，只放行一个探测请求，
+    探测成功则恢复，失败则重新打开。
+    熔断状态保存在进程内，每个 worker 进程分别统计。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        latency_threshold: float = 10.0,
+        reset_timeout: float = 30.0,
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ):
+        """
+        :param failure_threshold: 连续失败多少次后打开。
+        :param latency_threshold: 请求耗时超过多少秒视为一次失败（请求结果仍然正常返回），为 0 时不检查耗时。
+        :param reset_timeout: 打开多少秒后进入半开状态。
+        :param is_failure: 判断异常是否表示服务不可用，默认所有异常都计为失败；
+                           返回 False 的异常（例如页面不存在）不影响熔断状态。
+        """
+        self.failure_threshold = max(failure_threshold, 1)
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure or (lambda e: True)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._last_error: Optional[str] = None
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的锁和状态。
+        """
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """
+        当前状态：closed、open 或 half_open。
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._opened_at
+            if self._state == OPEN and elapsed >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def status(self) -> Dict[str, Any]:
+        """
+        当前状态的详细信息，用于健康检查。
+        """
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "failures": self._failures,
+                "retry_after": (
+                    max(self.reset_timeout - (time.monotonic() - self._opened_at), 0)
+                    if state == OPEN
+                    else 0
+                ),
+                "last_error": self._last_error,
+            }
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self._state == OPEN and elapsed >= self.reset_timeout:
+                self._state = HALF_OPEN
+            # 半开状态下只允许一个探测请求
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                logger.info("熔断器半开，正在探测 Notion")
+                return
+            raise CircuitOpenError(max(self.reset_timeout - elapsed, 0))
+
+    def _record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Notion 已恢复，熔断器关闭")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def _record_failure(self, reason: str) -> None:
+        with self._lock:
+            self._failures += 1
+            self._last_error = reason
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(
+                        "熔断器打开: %s",
+                        reason,
+                        extra={"fields": {"failures": self._failures}},
+                    )
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        通过熔断器调用 func。
+        :raises CircuitOpenError: 熔断器处于打开状态。
+        :raises Exception: func 抛出的异常。
+        """
+        self._before_call()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self._record_failure(f"{type(e).__name__}: {e}")
+            else:
+                self._record_success()
+            raise
+        except BaseException:
+            # 请求被中断（例如 worker 退出），不计入统计，但需要释放探测名额
+            with self._lock:
+                self._probing = False
+            raise
+        elapsed = time.monotonic() - started
+        if self.latency_threshold > 0 and elapsed > self.latency_threshold:
+            self._record_failure(f"请求耗时 {elapsed:.1f} 秒")
+        else:
+            self._record_success()
+        return result
@@ -0,0 +1,345 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.store import ItemStore
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只能在进程内互斥（开发环境通常只有一个进程）
+    fcntl = None
+
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "worthit-cache.sqlite3")
+# 归档记录的保留时间（秒），更早的增量同步请求需要重新获取完整列表
+TOMBSTONE_RETENTION = 30 * 86400
+
+
+class ItemCache:
+    """
+    基于 SQLite 的物品列表缓存，多个 worker 进程共享同一个缓存文件。
+    每个进程在内存中以 ItemStore（列存储）保留一份已解码的数据，只有当缓存文件中的版本号变化时才重新解码，
+    读取时再转换为物品字典。
+    缓存过期后只有一个进程会去请求 Notion，其他进程等待它写入后直接读取。
+    跨进程的加载锁使用单独的锁文件（flock），请求 Notion 期间不持有 SQLite 写锁，
+    只在写入结果时开启一个短事务。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: int = 60):
+        """
+        :param path: SQLite 缓存文件路径。
+        :param ttl: 缓存有效期（秒），为 0 时不缓存。
+        """
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._load_lock = threading.Lock()
+        # 进程内已解码的数据：key -> (generation, store)
+        self._memory: Dict[str, Tuple[int, ItemStore]] = {}
+        # 降级时读取的已解码数据：key -> (updated_at, store)，缓存失效后版本号变化但数据不变，避免重复解码
+        self._last_known_good: Dict[str, Tuple[float, ItemStore]] = {}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS item_cache ("
+                "key TEXT PRIMARY KEY, generation INTEGER NOT NULL, "
+                "updated_at REAL NOT NULL, expires_at REAL NOT NULL, data TEXT, "
+                "tracked_since REAL NOT NULL)"
+            )
+            self._migrate(conn)
+            # 记录从缓存中消失（被归档或删除）的物品，供增量同步接口使用
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS item_tombstones ("
+                "key TEXT NOT NULL, id TEXT NOT NULL, removed_at REAL NOT NULL, "
+                "PRIMARY KEY (key, id))"
+            )
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """
+        升级旧版本创建的缓存表：早期的 item_cache 没有 tracked_since 列。
+        旧缓存没有记录被移除的物品，从升级时开始计算，更早的增量同步请求需要重新获取完整列表。
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(item_cache)")}
+            if "tracked_since" not in columns:
+                conn.execute(
+                    "ALTER TABLE item_cache ADD COLUMN tracked_since REAL NOT NULL DEFAULT 0"
+                )
+                conn.execute("UPDATE item_cache SET tracked_since = ?", (time.time(),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，丢弃从主进程继承的连接和锁。
+        """
+        self._local = threading.local()
+        self._load_lock = threading.Lock()
+        self._memory = {}
+        self._last_known_good = {}
+
+    def _read(self, conn: sqlite3.Connection, key: str) -> Optional[ItemStore]:
+        now = time.time()
+        row = conn.execute(
+            "SELECT generation, expires_at FROM item_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        generation = row[0]
+        cached = self._memory.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        data = conn.execute(
+            "SELECT data FROM item_cache WHERE key = ? AND generation = ?",
+            (key, generation),
+        ).fetchone()
+        if data is None or data[0] is None:
+            return None
+        store = ItemStore(json.loads(data[0]))
+        self._memory[key] = (generation, store)
+        return store
+
+    def get_store(self, key: str) -> Optional[ItemStore]:
+        """
+        读取未过期的缓存，不转换为物品字典。
+        :param key: 缓存键。
+        :return: ItemStore，缓存不存在或已过期时返回 None。
+        """
+        if self.ttl <= 0:
+            return None
+        return self._read(self._connect(), key)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        读取未过期的缓存。
+        :param key: 缓存键。
+        :return: 物品列表，缓存不存在或已过期时返回 None。
+        """
+        store = self.get_store(key)
+        return store.to_items() if store is not None else None
+
+    def set(self, key: str, items: List[Dict[str, Any]]) -> int:
+        """
+        写入缓存并递增版本号。
+        与上一次写入的数据对比，记录被移除的物品，供 tombstones 查询。
+        :param key: 缓存键。
+        :param items: 物品列表。
+        :return: 新的版本号。
+        """
+        conn = self._connect()
+        data = json.dumps(items, ensure_ascii=False)
+        current_ids = {item["id"] for item in items}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            previous = conn.execute(
+                "SELECT data FROM item_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if previous is not None and previous[0] is not None:
+                removed = [
+                    (key, item["id"], now)
+                    for item in json.loads(previous[0])
+                    if item["id"] not in current_ids
+                ]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO item_tombstones (key, id, removed_at) "
+                    "VALUES (?, ?, ?)",
+                    removed,
+                )
+            conn.execute(
+                "DELETE FROM item_tombstones WHERE key = ? AND removed_at < ?",
+                (key, now - TOMBSTONE_RETENTION),
+            )
+            generation = conn.execute(
+                "INSERT INTO item_cache "
+                "(key, generation, updated_at, expires_at, data, tracked_since) "
+                "VALUES (?, 1, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "generation = generation + 1, updated_at = excluded.updated_at, "
+                "expires_at = excluded.expires_at, data = excluded.data "
+                "RETURNING generation",
+                (key, now, now + self.ttl, data, now),
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._memory[key] = (generation, ItemStore(items))
+        return generation
+
+    def tombstones(self, key: str, since: float) -> Optional[List[str]]:
+        """
+        查询在指定时间之后从缓存中移除的物品 ID。
+        :param key: 缓存键。
+        :param since: Unix 时间戳。
+        :return: 物品 ID 列表；如果缓存没有覆盖这段时间（刚开始记录或记录已清理），返回 None。
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT tracked_since FROM item_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or since < max(row[0], time.time() - TOMBSTONE_RETENTION):
+            return None
+        return [
+            r[0]
+            for r in conn.execute(
+                "SELECT id FROM item_tombstones WHERE key = ? AND removed_at >= ?",
+                (key, since),
+            )
+        ]
+
+    def generation(self, key: str) -> int:
+        """
+        获取缓存当前的版本号，每次写入或失效都会使版本号增加。
+        """
+        row = (
+            self._connect()
+            .execute("SELECT generation FROM item_cache WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def generation_of(self, key: str, store: ItemStore) -> Optional[int]:
+        """
+        获取进程内已解码的 ItemStore 对应的版本号。
+        :param key: 缓存键。
+        :param store: get_store 或 get_or_load_store 返回的 ItemStore。
+        :return: 版本号；store 不是该缓存键当前解码的数据（例如降级数据）时返回 None。
+        """
+        cached = self._memory.get(key)
+        return cached[0] if cached is not None and cached[1] is store else None
+
+    def loaded_at(self, key: str) -> Optional[float]:
+        """
+        获取缓存数据最近一次从 Notion 加载的时间（Unix 时间戳），没有缓存时返回 None。
+        """
+        row = (
+            self._connect()
+            .execute("SELECT updated_at FROM item_cache WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        使缓存失效，所有 worker 下次读取时都会重新加载。
+        :param key: 缓存键，为 None 时使全部缓存失效。
+        """
+        conn = self._connect()
+        # 保留旧数据，下次写入时用来对比出被移除的物品
+        if key is None:
+            conn.execute(
+                "UPDATE item_cache SET generation = generation + 1, expires_at = 0"
+            )
+        else:
+            conn.execute(
+                "UPDATE item_cache SET generation = generation + 1, "
+                "expires_at = 0 WHERE key = ?",
+                (key,),
+            )
+
+    def last_known_good(self, key: str) -> Optional[Tuple[ItemStore, float]]:
+        """
+        读取缓存文件中最近一次成功加载的数据，不论是否过期或已失效，用于 Notion 不可用时降级。
+        :param key: 缓存键。
+        :return: (ItemStore, 加载时间的 Unix 时间戳)，从未成功加载过时返回 None。
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT generation, updated_at FROM item_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        generation, updated_at = row
+        cached = self._memory.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1], updated_at
+        stale = self._last_known_good.get(key)
+        if stale is not None and stale[0] == updated_at:
+            return stale[1], updated_at
+        data = conn.execute(
+            "SELECT data FROM item_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if data is None or data[0] is None:
+            return None
+        store = ItemStore(json.loads(data[0]))
+        self._last_known_good[key] = (updated_at, store)
+        return store, updated_at
+
+    def release(self, key: str) -> None:
+        """
+        释放进程内已解码的数据，缓存文件中的数据不受影响，下次读取时重新解码。
+        :param key: 缓存键。
+        """
+        self._memory.pop(key, None)
+        self._last_known_good.pop(key, None)
+
+    @contextmanager
+    def _load_file_lock(self, key: str) -> Iterator[None]:
+        """
+        跨进程的加载锁：每个缓存键一个锁文件，与缓存文件放在同一目录，进程退出时自动释放。
+        """
+        if fcntl is None:
+            yield
+            return
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        with open(f"{self.path}.{digest}.lock", "a+b") as file:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+    def get_or_load_store(
+        self, key: str, loader: Callable[[], List[Dict[str, Any]]]
+    ) -> ItemStore:
+        """
+        读取缓存，缓存失效时调用 loader 加载并写入缓存。
+        同一时间只有一个线程（跨进程）执行 loader，其余的等待后读取其结果。
+        :param key: 缓存键。
+        :param loader: 加载物品列表的函数，通常会请求 Notion。
+        :return: ItemStore。
+        """
+        if self.ttl <= 0:
+            return ItemStore(loader())
+        store = self.get_store(key)
+        if store is not None:
+            return store
+
+        with self._load_lock, self._load_file_lock(key):
+            # 等待锁期间其他进程可能已经加载完成
+            store = self._read(self._connect(), key)
+            if store is None:
+                # 请求 Notion 期间不持有 SQLite 写锁，其他使用缓存文件的写操作不会被阻塞
+                self.set(key, loader())
+                store = self._memory[key][1]
+        return store
+
+    def get_or_load(
+        self, key: str, loader: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        与 get_or_load_store 相同，但返回物品列表。
+        :param key: 缓存键。
+        :param loader: 加载物品列表的函数，通常会请求 Notion。
+        :return: 物品列表。
+        """
+        if self.ttl <= 0:
+            return loader()
+        return self.get_or_load_store(key, loader).to_items()
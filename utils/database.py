@@ -1,13 +1,46 @@
 import json
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union
+from typing import Callable, Dict, Iterator, List, Any, Optional, Union
 import re  # 导入 re 模块
 import warnings
 
+import httpx
 from notion_client import Client
-from notion_client.errors import APIResponseError
+from notion_client.errors import (
+    APIErrorCode,
+    APIResponseError,
+    HTTPResponseError,
+    RequestTimeoutError,
+)
+from utils.breaker import CircuitBreaker, CircuitOpenError
+from utils.logs import get_logger, log_payload
+from utils.tools import RateLimiter
 from utils.models import *
 
+logger = get_logger("database")
+
+# 可以修改的属性及其 Notion 类型
+UPDATABLE_PROPERTY_TYPES = {
+    "物品名称": "title",
+    "入役日期": "date",
+    "退役日期": "date",
+    "购买价格": "number",
+    "附加价值": "number",
+    "备注": "rich_text",
+}
+
+
+def is_notion_outage(error: Exception) -> bool:
+    """
+    判断异常是否表示 Notion 不可用（超时、网络错误、限流或 5xx），用于熔断器统计。
+    页面不存在、权限不足等 4xx 错误说明 Notion 正常响应，不计为失败。
+    """
+    if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, HTTPResponseError):
+        return error.status >= 500 or error.status == 429
+    return False
+
 
 class NotionItemTrackerClient:
     """
@@ -15,11 +48,19 @@ class NotionItemTrackerClient:
     封装了初始化、数据库发现以及物品的增删查改 (CRUD) 功能。
     """
 
-    def __init__(self, notion_token: str, raw_database_id_input: str):
+    def __init__(
+        self,
+        notion_token: str,
+        raw_database_id_input: str,
+        notion: Optional[Client] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
         """
         初始化 Notion 客户端。
         :param notion_token: Notion API 集成令牌。
         :param raw_database_id_input: 用户传入的 Notion 数据库 ID，可以带或不带连字符。
+        :param notion: 已创建的 notion_client.Client（可选），多个数据库的客户端可以共享同一个 HTTP 连接池。
+        :param rate_limiter: 请求 Notion 前使用的限流器（可选），多个客户端共享时按总请求数限流。
         :raises ValueError: 如果 notion_token 或 raw_database_id_input 为空，或指定的数据库 ID 未找到。
         :raises notion_client.errors.APIResponseError: 如果 Notion API 令牌无效或发生其他 API 错误。
         :raises Exception: 其他未知错误。
@@ -31,8 +72,14 @@ class NotionItemTrackerClient:
         if not raw_database_id_input:
             raise ValueError("Notion 数据库 ID 不能为空。请确保您已正确设置数据库 ID。")
 
-        self.client = Client(auth=notion_token)
-        print("NotionItemTrackerClient: Notion 客户端初始化成功。")
+        self.client = notion if notion is not None else Client(auth=notion_token)
+        self.rate_limiter = rate_limiter
+        # 熔断器（可选），由应用在创建客户端后设置
+        self.breaker: Optional[CircuitBreaker] = None
+        logger.info("Notion 客户端初始化成功。")
+
+        # 物品写入成功后的回调，参数为事件类型（create/update/archive）和物品字典
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
 
         # 尝试解析并存储正确的、带连字符的数据库 ID
         self.database_id: Optional[str] = None
@@ -55,8 +102,11 @@ class NotionItemTrackerClient:
                     break
 
             if self.database_id:
-                print(
-                    f"NotionItemTrackerClient: 指定的数据库 ID '{raw_database_id_input}' 已成功匹配到数据库 '{found_db_title}' (ID: {self.database_id})。"
+                logger.info(
+                    "指定的数据库 ID '%s' 已成功匹配到数据库 '%s'。",
+                    raw_database_id_input,
+                    found_db_title,
+                    extra={"fields": {"database_id": self.database_id}},
                 )
             else:
                 raise ValueError(
@@ -68,10 +118,21 @@ class NotionItemTrackerClient:
             ) from e
         except Exception as e:
             raise Exception(f"初始化 Notion 客户端时发生未知错误: {e}") from e
-        print(
-            f"NotionItemTrackerClient: 客户端已初始化，实际使用的数据库 ID: {self.database_id}"
+        logger.info(
+            "客户端已初始化。", extra={"fields": {"database_id": self.database_id}}
         )
 
+    def _request(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        请求 Notion：配置了限流器时先获取令牌，配置了熔断器时通过熔断器调用。
+        :raises utils.breaker.CircuitOpenError: 熔断器处于打开状态。
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.breaker is not None:
+            return self.breaker.call(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
     def _get_property_value(self, property_data: Dict[str, Any]) -> Any:
         """
         根据 Notion 属性类型提取并格式化其值。
@@ -208,6 +269,21 @@ class NotionItemTrackerClient:
                 f"不支持将 '{prop_type}' 类型的属性写入或未实现其格式化逻辑。"
             )
 
+    def _notify(self, event: str, page: Dict[str, Any]) -> None:
+        """
+        通知所有监听者物品发生了变化，监听者抛出的异常不会影响写入结果。
+        :param event: 事件类型，create、update 或 archive。
+        :param page: Notion API 返回的页面对象。
+        """
+        if not self.listeners:
+            return
+        try:
+            item = self._process_page(page, include_formula_and_rollup=True)
+            for listener in self.listeners:
+                listener(event, item)
+        except Exception as e:
+            logger.exception("通知物品变化时发生错误: %s", e)
+
     def get_databases(self) -> List[Dict[str, Any]]:
         """
         列出用户集成有权访问的所有 Notion 数据库。
@@ -215,10 +291,10 @@ class NotionItemTrackerClient:
         :raises notion_client.errors.APIResponseError: 搜索数据库时发生 API 错误。
         :raises Exception: 其他未知错误。
         """
-        print("NotionItemTrackerClient: 正在搜索数据库...")
+        logger.debug("正在搜索数据库...")
         try:
-            response = self.client.search(
-                filter={"property": "object", "value": "database"}
+            response = self._request(
+                self.client.search, filter={"property": "object", "value": "database"}
             )
             databases = response.get("results", [])
 
@@ -234,6 +310,167 @@ class NotionItemTrackerClient:
         except Exception as e:
             raise Exception(f"搜索数据库时发生未知错误: {e}") from e
 
+    def _process_page(
+        self, page: Dict[str, Any], include_formula_and_rollup: bool = False
+    ) -> Dict[str, Any]:
+        """
+        将 Notion 返回的单个页面转换为物品字典。
+        :param page: Notion API 返回的页面对象。
+        :param include_formula_and_rollup: 是否包含公式和 Rollup 等只读属性。
+        :return: 物品字典，包含 id、archived 和 properties。
+        """
+        item_data = {
+            "id": page["id"],
+            "archived": page["archived"],
+            "last_edited_time": page.get("last_edited_time"),
+            "properties": {},
+        }
+
+        for prop_name, prop_data in page.get("properties", {}).items():
+            # 跳过公式和Rollup属性，除非显式要求显示
+            if not include_formula_and_rollup and prop_data.get("type") in [
+                "formula",
+                "rollup",
+                "created_time",
+                "last_edited_time",
+                "created_by",
+                "last_edited_by",
+            ]:
+                continue
+
+            value = self._get_property_value(prop_data)
+            # 过滤掉 None 值，除非你希望在返回数据中明确显示它们
+            if value is not None:
+                item_data["properties"][prop_name] = value
+            # 文件属性只保留了文件名，图片需要通过 /api/public/items/<id>/image 获取
+            if prop_data.get("type") == "files" and prop_data["files"]:
+                item_data["has_image"] = True
+        return item_data
+
+    def get_property_types(self) -> Dict[str, str]:
+        """
+        读取数据库的属性名及其 Notion 类型。
+        :return: 属性名 -> 类型，例如 {"物品名称": "title", "配件": "relation"}。
+        :raises RuntimeError: 如果数据库 ID 未设置。
+        :raises notion_client.errors.APIResponseError: 读取数据库时发生 API 错误。
+        """
+        if not self.database_id:
+            raise RuntimeError("Notion 数据库 ID 未在客户端初始化时正确设置。")
+        database = self._request(
+            self.client.databases.retrieve, database_id=self.database_id
+        )
+        return {
+            prop_name: prop_data.get("type")
+            for prop_name, prop_data in database.get("properties", {}).items()
+        }
+
+    def get_page_title(self, page_id: str) -> Optional[str]:
+        """
+        读取任意页面的标题，用于显示关联属性引用的页面。
+        :param page_id: 页面ID。
+        :return: 页面标题，页面不存在或无权访问时返回 None。
+        :raises notion_client.errors.APIResponseError: 读取页面时发生其他 API 错误。
+        """
+        try:
+            page = self._request(self.client.pages.retrieve, page_id=page_id)
+        except APIResponseError as e:
+            if e.code in (APIErrorCode.ObjectNotFound, APIErrorCode.RestrictedResource):
+                return None
+            raise
+        for prop_data in page.get("properties", {}).values():
+            if prop_data.get("type") == "title":
+                return self._get_property_value(prop_data)
+        return None
+
+    def get_item_files(
+        self, page_id: str, property_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        读取物品文件属性中的文件及其下载地址。
+        Notion 托管的文件地址是带签名的临时地址，大约一小时后过期，需要在过期前重新读取。
+        :param page_id: 物品（页面）ID。
+        :param property_name: 文件属性名，为空时使用第一个有文件的文件属性。
+        :return: 文件列表，每个文件包含 name、url 和 expiry_time（外部链接为 None）；
+                 页面不存在、不属于当前数据库或已归档时返回空列表。
+        :raises notion_client.errors.APIResponseError: 读取页面时发生 API 错误。
+        """
+        try:
+            page = self._request(self.client.pages.retrieve, page_id=page_id)
+        except APIResponseError as e:
+            if e.code == APIErrorCode.ObjectNotFound:
+                return []
+            raise
+        parent_id = (page.get("parent") or {}).get("database_id") or ""
+        if page.get("archived") or parent_id.replace("-", "") != (
+            self.database_id or ""
+        ).replace("-", ""):
+            return []
+
+        for prop_name, prop_data in page.get("properties", {}).items():
+            if prop_data.get("type") != "files" or not prop_data["files"]:
+                continue
+            if property_name and prop_name != property_name:
+                continue
+            files = []
+            for file in prop_data["files"]:
+                file_type = file.get("type")
+                content = file.get(file_type) or {}
+                if content.get("url"):
+                    files.append(
+                        {
+                            "name": file.get("name"),
+                            "url": content["url"],
+                            "expiry_time": content.get("expiry_time"),
+                        }
+                    )
+            return files
+        return []
+
+    def iter_items(
+        self,
+        include_formula_and_rollup: bool = False,
+        page_size: int = 100,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按 Notion 分页逐个返回数据库中的物品，内存占用与数据库大小无关。
+        :param include_formula_and_rollup: 是否包含公式和 Rollup 等只读属性。
+        :param page_size: 每次向 Notion 请求的页面数量，最大为 100。
+        :param filter: Notion 数据库查询的过滤条件（可选）。
+        :return: 物品字典的迭代器。
+        :raises RuntimeError: 如果数据库 ID 未设置。
+        :raises notion_client.errors.APIResponseError: 读取数据库时发生 API 错误。
+        :raises Exception: 其他未知错误。
+        """
+        if not self.database_id:
+            raise RuntimeError("Notion 数据库 ID 未在客户端初始化时正确设置。")
+
+        logger.debug(
+            "正在读取数据库内容...", extra={"fields": {"database_id": self.database_id}}
+        )
+        start_cursor = None
+        while True:
+            try:
+                query = {"database_id": self.database_id, "page_size": page_size}
+                if filter:
+                    query["filter"] = filter
+                if start_cursor:
+                    query["start_cursor"] = start_cursor
+                response = self._request(self.client.databases.query, **query)
+            except CircuitOpenError:
+                raise
+            except APIResponseError as e:
+                raise APIResponseError(f"读取数据库内容时发生 API 错误: {e}") from e
+            except Exception as e:
+                raise Exception(f"读取数据库内容时发生未知错误: {e}") from e
+
+            for page in response.get("results", []):
+                yield self._process_page(page, include_formula_and_rollup)
+
+            if not response.get("has_more"):
+                break
+            start_cursor = response.get("next_cursor")
+
     def read_items(
         self, include_formula_and_rollup: bool = False
     ) -> List[Dict[str, Any]]:
@@ -245,47 +482,27 @@ class NotionItemTrackerClient:
         :raises notion_client.errors.APIResponseError: 读取数据库时发生 API 错误。
         :raises Exception: 其他未知错误。
         """
-        if not self.database_id:
-            raise RuntimeError("Notion 数据库 ID 未在客户端初始化时正确设置。")
+        return list(self.iter_items(include_formula_and_rollup))
 
-        print(
-            f"NotionItemTrackerClient: 正在读取数据库内容 (ID: {self.database_id})..."
+    def read_items_edited_since(
+        self, since: datetime, include_formula_and_rollup: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        读取在指定时间之后被修改过的物品。
+        注意 Notion 的 last_edited_time 精确到分钟，调用方应自行预留重叠区间。
+        :param since: 带时区的时间。
+        :param include_formula_and_rollup: 是否包含公式和 Rollup 等只读属性。
+        :return: 物品列表。
+        """
+        return list(
+            self.iter_items(
+                include_formula_and_rollup,
+                filter={
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": since.isoformat()},
+                },
+            )
         )
-        try:
-            response = self.client.databases.query(database_id=self.database_id)
-            pages = response.get("results", [])
-
-            processed_items = []
-            for page in pages:
-                item_data = {
-                    "id": page["id"],
-                    "archived": page["archived"],
-                    "properties": {},
-                }
-
-                for prop_name, prop_data in page.get("properties", {}).items():
-                    # 跳过公式和Rollup属性，除非显式要求显示
-                    if not include_formula_and_rollup and prop_data.get("type") in [
-                        "formula",
-                        "rollup",
-                        "created_time",
-                        "last_edited_time",
-                        "created_by",
-                        "last_edited_by",
-                    ]:
-                        continue
-
-                    value = self._get_property_value(prop_data)
-                    # 过滤掉 None 值，除非你希望在返回数据中明确显示它们
-                    if value is not None:
-                        item_data["properties"][prop_name] = value
-                processed_items.append(item_data)
-            return processed_items
-
-        except APIResponseError as e:
-            raise APIResponseError(f"读取数据库内容时发生 API 错误: {e}") from e
-        except Exception as e:
-            raise Exception(f"读取数据库内容时发生未知错误: {e}") from e
 
     def add_item(
         self,
@@ -307,16 +524,66 @@ class NotionItemTrackerClient:
         :raises RuntimeError: 如果数据库 ID 未设置。
         :raises ValueError: 如果输入数据格式不正确。
         :raises notion_client.errors.APIResponseError: 添加物品时发生 API 错误。
+        :raises utils.breaker.CircuitOpenError: 熔断器处于打开状态，请求没有发送到 Notion。
         :raises Exception: 其他未知错误。
         """
         if not self.database_id:
             raise RuntimeError("Notion 数据库 ID 未在客户端初始化时正确设置。")
 
-        print(
-            f"NotionItemTrackerClient: 正在添加物品 '{item_name}' 到数据库 (ID: {self.database_id})..."
+        logger.info(
+            "正在添加物品 '%s'...",
+            item_name,
+            extra={"fields": {"database_id": self.database_id}},
+        )
+        log_payload(
+            logger,
+            "添加物品的字段",
+            {
+                "入役日期": entry_date,
+                "购买价格": purchase_price,
+                "附加价值": additional_value,
+                "退役日期": retirement_date,
+                "备注": remark,
+            },
+        )
+
+        properties = self.build_item_properties(
+            item_name,
+            entry_date,
+            purchase_price,
+            additional_value,
+            retirement_date,
+            remark,
         )
-        print(f"入役日期: {entry_date}, 购买价格: {purchase_price}, 附加价值: {additional_value}, 退役日期: {retirement_date}, 备注: {remark}")
 
+        try:
+            response = self._request(
+                self.client.pages.create,
+                parent={"database_id": self.database_id},
+                properties=properties,
+            )
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            raise Exception(f"添加物品时发生未知错误: {e}") from e
+        self._notify("create", response)
+        return response
+
+    def build_item_properties(
+        self,
+        item_name: str,
+        entry_date: str,
+        purchase_price: float,
+        additional_value: Optional[float] = None,
+        retirement_date: Optional[str] = None,
+        remark: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        将新物品的字段格式化为 Notion API 创建页面时需要的 properties 结构。
+        参数含义与 add_item 相同。
+        :return: Notion 页面的 properties 字典。
+        :raises ValueError: 如果输入数据格式不正确。
+        """
         properties = {
             "物品名称": self._format_property_for_notion(item_name, "title"),
             "入役日期": self._format_property_for_notion(entry_date, "date"),
@@ -336,42 +603,113 @@ class NotionItemTrackerClient:
         if remark is not None:
             properties["备注"] = self._format_property_for_notion(remark, "rich_text")
 
-        try:
-            response = self.client.pages.create(
-                parent={"database_id": self.database_id}, properties=properties
-            )
-            return response
-        except Exception as e:
-            raise Exception(f"添加物品时发生未知错误: {e}") from e
+        return properties
 
-    def update_item(self, page_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+    def update_item(
+        self,
+        page_id: str,
+        updates: Dict[str, Any],
+        current: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         修改指定 Notion 页面（物品条目）的属性。
+        提供物品当前的值时只写入发生变化的属性，没有变化时不请求 Notion。
         :param page_id: 要修改的物品的页面ID。
         :param updates: 包含要更新的属性名和新值的字典，例如:
                         {"物品名称": "新笔记本", "购买价格": 1200.0, "退役日期": "2024-03-15"}
                         若要清空数字或日期属性，请传入 None，例如 {"附加价值": None, "退役日期": None}
-        :return: Notion API 返回的更新页面的原始响应数据。
+        :param current: 物品当前的字典（例如缓存中的物品），为 None 时写入全部属性。
+        :return: Notion API 返回的更新页面的原始响应数据，附加 written_properties（实际写入的属性名列表）；
+                 没有属性变化时只返回 object、id 和空的 written_properties。
         :raises ValueError: 如果输入数据格式不正确或属性名无效。
         :raises notion_client.errors.APIResponseError: 修改物品时发生 API 错误。
+        :raises utils.breaker.CircuitOpenError: 熔断器处于打开状态，请求没有发送到 Notion。
         :raises Exception: 其他未知错误。
         """
-        print(f"NotionItemTrackerClient: 正在更新物品 (ID: {page_id})...")
+        properties_to_update = self.build_update_properties(updates)
+        changed = self.diff_updates(updates, current)
+        if not changed:
+            logger.info("物品没有变化，跳过写入。", extra={"fields": {"page_id": page_id}})
+            return {"object": "page", "id": page_id, "written_properties": []}
+        properties_to_update = {
+            prop_name: value
+            for prop_name, value in properties_to_update.items()
+            if prop_name in changed
+        }
+        logger.info(
+            "正在更新物品...",
+            extra={
+                "fields": {"page_id": page_id, "properties": list(properties_to_update)}
+            },
+        )
 
+        try:
+            response = self._request(
+                self.client.pages.update,
+                page_id=page_id,
+                properties=properties_to_update,
+            )
+        except CircuitOpenError:
+            raise
+        except APIResponseError as e:
+            raise APIResponseError(f"修改物品时发生 API 错误: {e}") from e
+        except Exception as e:
+            raise Exception(f"修改物品时发生未知错误: {e}") from e
+        self._notify("update", response)
+        return {**response, "written_properties": list(properties_to_update)}
+
+    @staticmethod
+    def _normalize_for_diff(prop_name: str, value: Any) -> Any:
+        """
+        将属性值转换为可比较的形式：空字符串与 None 等价，数字统一为 float。
+        """
+        prop_type = UPDATABLE_PROPERTY_TYPES.get(prop_name)
+        if prop_type in ("title", "rich_text"):
+            return "" if value is None else str(value)
+        if value is None or str(value).strip() == "":
+            return None
+        if prop_type == "number":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return value
+        if prop_type == "date":
+            return value if isinstance(value, dict) else str(value)
+        return value
+
+    def diff_updates(
+        self, updates: Dict[str, Any], current: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        对比要更新的属性与物品当前的值，只保留发生变化的属性。
+        :param updates: 要更新的属性，格式与 update_item 相同。
+        :param current: 物品当前的字典（read_items 返回的结构），为 None 时视为全部发生变化。
+        :return: 发生变化的属性。
+        """
+        if current is None:
+            return dict(updates)
+        properties = current.get("properties", {})
+        return {
+            prop_name: value
+            for prop_name, value in updates.items()
+            if self._normalize_for_diff(prop_name, value)
+            != self._normalize_for_diff(prop_name, properties.get(prop_name))
+        }
+
+    def build_update_properties(self, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将要更新的属性格式化为 Notion API 更新页面时需要的 properties 结构。
+        :param updates: 包含要更新的属性名和新值的字典，格式与 update_item 相同。
+        :return: Notion 页面的 properties 字典。
+        :raises ValueError: 如果输入数据格式不正确、属性名无效或没有有效的属性。
+        """
         properties_to_update = {}
         for prop_name, new_value in updates.items():
             # 这里需要一个映射来确定属性的 Notion 类型
             # 实际项目中，你可以先查询数据库的 schema 来获取这些类型
             # 为简化示例，我们手动映射常用字段的类型
-            if prop_name == "物品名称":
-                prop_type = "title"
-            elif prop_name == "入役日期" or prop_name == "退役日期":
-                prop_type = "date"
-            elif prop_name == "购买价格" or prop_name == "附加价值":
-                prop_type = "number"
-            elif prop_name == "备注":
-                prop_type = "rich_text"
-            else:
+            prop_type = UPDATABLE_PROPERTY_TYPES.get(prop_name)
+            if prop_type is None:
                 raise ValueError(
                     f"属性 '{prop_name}' 不支持更新或未映射其 Notion 类型。"
                 )
@@ -385,15 +723,7 @@ class NotionItemTrackerClient:
         if not properties_to_update:
             raise ValueError("没有有效的属性被提供以进行更新。")
 
-        try:
-            response = self.client.pages.update(
-                page_id=page_id, properties=properties_to_update
-            )
-            return response
-        except APIResponseError as e:
-            raise APIResponseError(f"修改物品时发生 API 错误: {e}") from e
-        except Exception as e:
-            raise Exception(f"修改物品时发生未知错误: {e}") from e
+        return properties_to_update
 
     def delete_item(self, page_id: str) -> Dict[str, Any]:
         """
@@ -402,11 +732,17 @@ class NotionItemTrackerClient:
         :param page_id: 要删除的物品的页面ID。
         :return: Notion API 返回的归档页面的原始响应数据。
         :raises notion_client.errors.APIResponseError: 删除物品时发生 API 错误。
+        :raises utils.breaker.CircuitOpenError: 熔断器处于打开状态，请求没有发送到 Notion。
         :raises Exception: 其他未知错误。
         """
-        print(f"NotionItemTrackerClient: 正在归档物品 (ID: {page_id})...")
+        logger.info("正在归档物品...", extra={"fields": {"page_id": page_id}})
         try:
-            response = self.client.pages.update(page_id=page_id, archived=True)
-            return response
+            response = self._request(
+                self.client.pages.update, page_id=page_id, archived=True
+            )
+        except CircuitOpenError:
+            raise
         except Exception as e:
             raise Exception(f"删除物品时发生未知错误: {e}") from e
+        self._notify("archive", response)
+        return response
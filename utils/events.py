@@ -0,0 +1,354 @@
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from utils.logs import get_logger
+
+logger = get_logger("events")
+
+DEFAULT_EVENTS_PATH = os.path.join(tempfile.gettempdir(), "worthit-events.sqlite3")
+# 心跳间隔（秒），用于保持连接并及时发现已断开的客户端
+HEARTBEAT_INTERVAL = 15
+# 客户端的 Last-Event-ID 已不在事件日志中时发送的事件，客户端收到后需要重新同步物品列表
+RESYNC_EVENT = "resync"
+
+
+class ItemEventBroadcaster:
+    """
+    物品变化事件广播器，用于 Server-Sent Events 推送。
+    事件来源有两个：NotionItemTrackerClient 写入成功后的回调，
+    以及有客户端订阅时后台定期对比物品列表发现的变化（通过共享缓存读取，不会额外请求 Notion）。
+    事件写入多个 worker 进程共享的 SQLite 事件日志，事件 ID 是日志的自增序号，
+    在所有 worker 之间可以比较，客户端重连到任意 worker 都能通过 Last-Event-ID 补发；
+    每个进程在有订阅者时轮询日志，将新事件分发给本进程的订阅者。
+    所有订阅者共享同一份事件，不会因为订阅者增多而增加 Notion 请求。
+    """
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+        sync_interval: int = 60,
+        backlog: int = 256,
+        queue_size: int = 100,
+        max_subscribers: int = 0,
+        path: str = DEFAULT_EVENTS_PATH,
+        poll_interval: float = 1.0,
+    ):
+        """
+        :param loader: 读取当前物品列表的函数，用于后台同步，为 None 时不启用后台同步。
+        :param sync_interval: 后台同步间隔（秒）。
+        :param backlog: 事件日志保留最近事件的数量，客户端重连时可以通过 Last-Event-ID 补发。
+        :param queue_size: 每个订阅者的事件队列长度，消费过慢的订阅者会被断开。
+        :param max_subscribers: 本进程最多同时保持的订阅连接数，每个连接占用一个处理线程，为 0 时不限制。
+        :param path: 事件日志的 SQLite 文件路径。
+        :param poll_interval: 有订阅者时轮询事件日志的间隔（秒），其他 worker 的事件最多延迟这么久送达。
+        """
+        self.loader = loader
+        self.sync_interval = sync_interval
+        self.backlog = max(backlog, 1)
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 已预留的订阅连接数，包括已返回响应但还没有开始输出的连接
+        self._slots = 0
+        # 本进程已分发到的事件序号，第一次有订阅者时从日志末尾开始
+        self._position: Optional[int] = None
+        self._subscribers: Set[queue.Queue] = set()
+        # 已知物品的最后修改时间，用于后台同步时对比变化
+        self._known: Optional[Dict[str, Optional[str]]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._has_subscribers = threading.Event()
+        # 本进程写入事件后立即唤醒轮询线程
+        self._wake = threading.Event()
+        with self._connect() as conn:
+            # version 只在后台同步发现的事件中记录（物品的最后修改时间），
+            # 多个 worker 同时发现同一个变化时只保留一个事件
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS item_events ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL, "
+                "item_id TEXT NOT NULL, version TEXT, data TEXT NOT NULL, "
+                "UNIQUE (item_id, event, version))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.data_version = None
+        return conn
+
+    def _append(self, event: str, item: Dict[str, Any], version: Optional[str]) -> None:
+        data = (
+            {"id": item["id"]}
+            if event == "archive"
+            else {"id": item["id"], "item": item}
+        )
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR IGNORE INTO item_events (event, item_id, version, data) "
+                "VALUES (?, ?, ?, ?)",
+                (event, item["id"], version, json.dumps(data, ensure_ascii=False)),
+            )
+            conn.execute(
+                "DELETE FROM item_events WHERE seq <= "
+                "(SELECT MAX(seq) FROM item_events) - ?",
+                (self.backlog,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # data_version 不反映本连接自己的提交，本线程（后台同步）下次轮询时需要重新读取
+        self._local.data_version = None
+        self._wake.set()
+
+    def publish(self, event: str, item: Dict[str, Any]) -> None:
+        """
+        广播一个物品事件。可直接作为 NotionItemTrackerClient 的监听者使用。
+        :param event: 事件类型，create、update 或 archive。
+        :param item: 物品字典。
+        """
+        self._append(event, item, None)
+
+    def _read_events(
+        self, conn: sqlite3.Connection, after: int
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        return [
+            (seq, event, json.loads(data))
+            for seq, event, data in conn.execute(
+                "SELECT seq, event, data FROM item_events WHERE seq > ? ORDER BY seq",
+                (after,),
+            )
+        ]
+
+    def _dispatch(self) -> None:
+        """
+        读取事件日志中本进程还没有分发的事件，分发给本进程的订阅者。
+        日志未变化时只需要一次 PRAGMA 查询。
+        """
+        conn = self._connect()
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._local.data_version:
+            return
+        self._local.data_version = version
+        with self._lock:
+            position = self._position
+        messages = self._read_events(conn, position or 0)
+        with self._lock:
+            # 读取期间订阅者可能已经推进了位置
+            messages = [m for m in messages if m[0] > (self._position or 0)]
+            if not messages:
+                return
+            self._position = messages[-1][0]
+            for _, event, data in messages:
+                if self._known is None:
+                    continue
+                if event == "archive":
+                    self._known.pop(data["id"], None)
+                else:
+                    self._known[data["id"]] = data["item"].get("last_edited_time")
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                for message in messages:
+                    subscriber.put_nowait(message)
+            except queue.Full:
+                # 消费过慢的订阅者直接断开，客户端重连后会通过 Last-Event-ID 补发
+                self._unsubscribe(subscriber)
+                self._close(subscriber)
+
+    def _subscribe(self, last_event_id: Optional[int]) -> queue.Queue:
+        subscriber: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        conn = self._connect()
+        with self._lock:
+            if self._position is None:
+                self._position = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM item_events"
+                ).fetchone()[0]
+            if last_event_id is not None and last_event_id < self._position:
+                oldest = conn.execute("SELECT MIN(seq) FROM item_events").fetchone()[0]
+                messages = [
+                    m
+                    for m in self._read_events(conn, last_event_id)
+                    if m[0] <= self._position
+                ]
+                if (
+                    oldest is None
+                    or last_event_id < oldest - 1
+                    or len(messages) >= self.queue_size
+                ):
+                    # 需要补发的事件已从日志中清理或超过队列长度，让客户端重新同步
+                    messages = [(self._position, RESYNC_EVENT, {})]
+                for message in messages:
+                    subscriber.put_nowait(message)
+            elif last_event_id is not None and last_event_id > self._position:
+                # 事件日志被重建（例如临时目录被清理），客户端的 ID 已无法比较
+                subscriber.put_nowait((self._position, RESYNC_EVENT, {}))
+            self._subscribers.add(subscriber)
+            self._has_subscribers.set()
+        self._start()
+        return subscriber
+
+    def _unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self._has_subscribers.clear()
+
+    @staticmethod
+    def _close(subscriber: queue.Queue) -> None:
+        """
+        清空订阅者的队列并放入结束标记。
+        """
+        while True:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            subscriber.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def stream(self, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """
+        订阅事件并以 Server-Sent Events 格式输出，直到客户端断开。
+        :param last_event_id: 客户端重连时带上的最后一个事件 ID（可以来自任意 worker），会补发之后的事件；
+            该事件已从日志中清理时改为发送一个 resync 事件。
+        :return: SSE 文本块的迭代器。
+        """
+        subscriber = self._subscribe(last_event_id)
+        try:
+            # 告诉浏览器断线后 3 秒重连
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = subscriber.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                sequence, event, data = message
+                payload = json.dumps(data, ensure_ascii=False)
+                yield f"id: {sequence}\nevent: {event}\ndata: {payload}\n\n"
+        finally:
+            self._unsubscribe(subscriber)
+
+    def reserve(self) -> bool:
+        """
+        为一个订阅连接预留名额，连接结束后必须调用 release。
+        :return: 是否预留成功，已达到 max_subscribers 时返回 False。
+        """
+        with self._lock:
+            if self.max_subscribers > 0 and self._slots >= self.max_subscribers:
+                return False
+            self._slots += 1
+            return True
+
+    def release(self) -> None:
+        """
+        释放 reserve 预留的名额。
+        """
+        with self._lock:
+            self._slots = max(self._slots - 1, 0)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def sync(self) -> None:
+        """
+        读取当前物品列表并与上一次的结果对比，将新增、修改和归档事件写入事件日志。
+        第一次调用只记录当前状态，不广播事件。
+        """
+        if self.loader is None:
+            return
+        items = self.loader()
+        current = {item["id"]: item for item in items}
+        with self._lock:
+            known = self._known
+            if known is None:
+                self._known = {
+                    item_id: item.get("last_edited_time")
+                    for item_id, item in current.items()
+                }
+                return
+            changes = [
+                (
+                    "create" if item_id not in known else "update",
+                    item,
+                    item.get("last_edited_time"),
+                )
+                for item_id, item in current.items()
+                if item_id not in known
+                or known[item_id] != item.get("last_edited_time")
+            ]
+            changes += [
+                ("archive", {"id": item_id}, known[item_id])
+                for item_id in list(known)
+                if item_id not in current
+            ]
+            self._known = {
+                item_id: item.get("last_edited_time")
+                for item_id, item in current.items()
+            }
+        for event, item, version in changes:
+            # 以最后修改时间作为版本，其他 worker 已经写入的同一个变化会被忽略
+            self._append(event, item, version)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        next_sync = time.monotonic()
+        while True:
+            # 没有订阅者时不轮询也不同步
+            self._has_subscribers.wait()
+            if (
+                self.loader is not None
+                and self.sync_interval > 0
+                and time.monotonic() >= next_sync
+            ):
+                next_sync = time.monotonic() + self.sync_interval
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error("后台同步物品列表时发生错误: %s", e)
+            try:
+                self._dispatch()
+            except Exception as e:
+                logger.error("读取物品事件日志时发生错误: %s", e)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的连接、锁和订阅者。
+        """
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._slots = 0
+        self._position = None
+        self._subscribers = set()
+        self._thread = None
+        self._has_subscribers = threading.Event()
+        self._wake = threading.Event()
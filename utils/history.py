@@ -0,0 +1,393 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.logs import get_logger
+from utils.store import ItemStore
+
+logger = get_logger("history")
+
+DEFAULT_HISTORY_PATH = os.path.join(tempfile.gettempdir(), "worthit-history.sqlite3")
+# 每个数据块最多保存的记录数，约为一年的每日记录
+BLOCK_SIZE = 366
+# 日均价格按分（0.01 元）保存为整数
+COST_SCALE = 100
+# 后台线程检查是否需要记录的间隔（秒）
+CHECK_INTERVAL = 3600
+
+# (日期序数, 服役天数, 日均价格（分）)
+_Point = Tuple[int, int, int]
+
+
+def _encode(points: List[_Point], previous: _Point) -> bytes:
+    """
+    将记录编码为变长整数序列：每条记录保存日期、服役天数和日均价格相对上一条记录的差值（zigzag 编码）。
+    服役天数的差值再减去日期的差值，服役中的物品每天都是 0，日均价格每天只变化几分，
+    因此一条记录通常只占 3 个字节。
+    """
+    out = bytearray()
+    last_day, last_days, last_cost = previous
+    for day, service_days, cost in points:
+        day_delta = day - last_day
+        for delta in (day_delta, service_days - last_days - day_delta, cost - last_cost):
+            value = (delta << 1) ^ (delta >> 63)
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        last_day, last_days, last_cost = day, service_days, cost
+    return bytes(out)
+
+
+def _decode(data: bytes, start: _Point) -> List[_Point]:
+    """
+    解码 _encode 生成的数据。
+    :param start: 数据块第一条记录之前的基准值。
+    """
+    values: List[int] = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append((value >> 1) ^ -(value & 1))
+        value = shift = 0
+
+    points: List[_Point] = []
+    day, service_days, cost = start
+    for i in range(0, len(values) - 2, 3):
+        day_delta = values[i]
+        day += day_delta
+        service_days += values[i + 1] + day_delta
+        cost += values[i + 2]
+        points.append((day, service_days, cost))
+    return points
+
+
+def daily_points(store: ItemStore, day: date) -> Dict[str, Tuple[int, int]]:
+    """
+    计算所有物品在指定日期的服役天数和日均价格，计算方式与 utils.projections 一致。
+    :return: 物品ID -> (服役天数, 日均价格（分）)；已归档、未填写入役日期或购买价格、尚未入役的物品不在结果中。
+    """
+    ordinal = day.toordinal()
+    points: Dict[str, Tuple[int, int]] = {}
+    for row in range(len(store)):
+        entry = store.entry_dates[row]
+        price = store.prices[row]
+        if store.archived[row] or not entry or price != price:
+            continue
+        end = store.retirement_dates[row]
+        service_days = (ordinal if not end or ordinal < end else end) - entry
+        if service_days <= 0:
+            continue
+        additional_value = store.additional_values[row]
+        total = price + (additional_value if additional_value == additional_value else 0.0)
+        points[store.ids[row]] = (
+            service_days,
+            round(total * COST_SCALE / service_days),
+        )
+    return points
+
+
+class ItemHistory:
+    """
+    物品日均价格的历史记录，保存在 SQLite 中，只追加不修改。
+    每个物品的记录按列分块保存：一个数据块约为一年的每日记录，块内以差值编码，
+    读取一个时间范围只需要解码覆盖该范围的少数几个数据块。
+    服役天数和日均价格与上一条记录相同时（例如已退役的物品）不再记录，
+    每条记录的值一直有效到下一条记录为止。
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH):
+        """
+        :param path: SQLite 文件路径，需要长期保存时请放在持久化的目录中。
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            # first_day 为数据块第一条记录的日期，last_* 为最后一条记录，追加时不需要解码
+            # 数据块约 1 KB，WITHOUT ROWID 表中会溢出到单独的页，这里使用普通表加唯一约束
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS item_history ("
+                "item_id TEXT NOT NULL, first_day INTEGER NOT NULL, "
+                "last_day INTEGER NOT NULL, last_service_days INTEGER NOT NULL, "
+                "last_cost INTEGER NOT NULL, count INTEGER NOT NULL, data BLOB NOT NULL, "
+                "UNIQUE (item_id, first_day))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history_days (day INTEGER PRIMARY KEY)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，丢弃从主进程继承的连接。
+        """
+        self._local = threading.local()
+
+    def last_recorded(self) -> Optional[date]:
+        """
+        获取最近一次记录的日期，没有记录时返回 None。
+        """
+        row = self._connect().execute("SELECT MAX(day) FROM history_days").fetchone()
+        return date.fromordinal(row[0]) if row and row[0] else None
+
+    def record(self, store: ItemStore, day: Optional[date] = None) -> int:
+        """
+        记录所有物品在指定日期的服役天数和日均价格，同一日期只记录一次。
+        :param store: 物品列表。
+        :param day: 记录的日期，默认为今天；早于已记录的日期时不会写入。
+        :return: 写入的记录数。
+        """
+        day = day or date.today()
+        ordinal = day.toordinal()
+        points = daily_points(store, day)
+        conn = self._connect()
+        written = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute(
+                "SELECT 1 FROM history_days WHERE day >= ?", (ordinal,)
+            ).fetchone():
+                conn.execute("ROLLBACK")
+                return 0
+            # 每个物品最新的数据块
+            latest = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    "SELECT item_id, first_day, last_day, last_service_days, last_cost, "
+                    "count, data FROM item_history AS h WHERE first_day = "
+                    "(SELECT MAX(first_day) FROM item_history WHERE item_id = h.item_id)"
+                )
+            }
+            inserts = []
+            updates = []
+            for item_id, (service_days, cost) in points.items():
+                block = latest.get(item_id)
+                point = (ordinal, service_days, cost)
+                if block is not None:
+                    first_day, last_day, last_days, last_cost, count, data = block
+                    if (last_days, last_cost) == (service_days, cost):
+                        continue
+                    if count < BLOCK_SIZE:
+                        data = data + _encode([point], (last_day, last_days, last_cost))
+                        updates.append(
+                            (ordinal, service_days, cost, count + 1, data, item_id, first_day)
+                        )
+                        written += 1
+                        continue
+                # 新的数据块以第一条记录的前一天、服役天数和日均价格为 0 为基准
+                inserts.append(
+                    (
+                        item_id,
+                        ordinal,
+                        ordinal,
+                        service_days,
+                        cost,
+                        1,
+                        _encode([point], (ordinal - 1, 0, 0)),
+                    )
+                )
+                written += 1
+            conn.executemany(
+                "UPDATE item_history SET last_day = ?, last_service_days = ?, "
+                "last_cost = ?, count = ?, data = ? WHERE item_id = ? AND first_day = ?",
+                updates,
+            )
+            conn.executemany(
+                "INSERT INTO item_history (item_id, first_day, last_day, "
+                "last_service_days, last_cost, count, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                inserts,
+            )
+            conn.execute("INSERT INTO history_days (day) VALUES (?)", (ordinal,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(
+            "已记录物品历史",
+            extra={"fields": {"day": day.isoformat(), "written": written}},
+        )
+        return written
+
+    def query(
+        self,
+        item_id: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        step: int = 1,
+    ) -> List[_Point]:
+        """
+        查询物品在一段时间内的记录。
+        :param item_id: 物品ID。
+        :param start: 开始日期（包含），为 None 时从第一条记录开始。
+        :param end: 结束日期（包含），为 None 时到最后一条记录为止。
+        :param step: 降采样的间隔（天），每 step 天只保留最后一条记录。
+        :return: [(日期序数, 服役天数, 日均价格（分）)]，按日期排序。
+                 开始日期之前最近的一条记录仍然有效时，会作为开始日期的记录返回。
+        """
+        start_ordinal = start.toordinal() if start else 0
+        end_ordinal = end.toordinal() if end else date.max.toordinal()
+        blocks = self._connect().execute(
+            "SELECT first_day, data FROM item_history "
+            "WHERE item_id = ? AND first_day <= ? AND first_day >= "
+            "COALESCE((SELECT MAX(first_day) FROM item_history "
+            "WHERE item_id = ? AND first_day <= ?), 0) ORDER BY first_day",
+            (item_id, end_ordinal, item_id, start_ordinal),
+        ).fetchall()
+
+        points: List[_Point] = []
+        before: Optional[_Point] = None
+        for first_day, data in blocks:
+            for point in _decode(data, (first_day - 1, 0, 0)):
+                day = point[0]
+                if day < start_ordinal:
+                    before = point
+                elif day <= end_ordinal:
+                    points.append(point)
+        if before is not None and (not points or points[0][0] > start_ordinal):
+            points.insert(0, (start_ordinal, before[1], before[2]))
+        return downsample(points, step)
+
+    def __len__(self) -> int:
+        row = self._connect().execute("SELECT SUM(count) FROM item_history").fetchone()
+        return row[0] or 0
+
+
+def downsample(points: List[_Point], step: int) -> List[_Point]:
+    """
+    按日期分组降采样，每 step 天保留最后一条记录。
+    """
+    if step <= 1 or not points:
+        return points
+    first = points[0][0]
+    result: List[_Point] = []
+    last_bucket = None
+    for point in points:
+        bucket = (point[0] - first) // step
+        if bucket == last_bucket:
+            result[-1] = point
+        else:
+            result.append(point)
+            last_bucket = bucket
+    return result
+
+
+class HistoryRecorder:
+    """
+    每天记录一次物品历史的后台线程。
+    只在主进程中运行（gunicorn 预加载应用后 fork 的 worker 中不会运行），
+    记录前检查当天是否已经记录过，多个进程同时记录时也只会写入一次。
+    """
+
+    def __init__(
+        self,
+        history: ItemHistory,
+        load_store: Callable[[], ItemStore],
+        interval: int = CHECK_INTERVAL,
+    ):
+        """
+        :param history: ItemHistory 实例。
+        :param load_store: 读取当前物品列表的函数。
+        :param interval: 检查是否需要记录的间隔（秒）。
+        """
+        self.history = history
+        self.load_store = load_store
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_if_due(self) -> bool:
+        """
+        今天还没有记录时记录一次。
+        :return: 本次写入了记录返回 True。
+        """
+        today = date.today()
+        last = self.history.last_recorded()
+        if last is not None and last >= today:
+            return False
+        try:
+            self.history.record(self.load_store(), today)
+            return True
+        except Exception as e:
+            logger.error("记录物品历史时发生错误: %s", e)
+            return False
+
+    def start(self) -> None:
+        """
+        启动后台线程，启动时立即检查一次。
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，worker 中不运行记录线程。
+        """
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        self.record_if_due()
+        while not self._stop.wait(self.interval):
+            self.record_if_due()
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from datetime import timedelta
+
+    # 性能测试：记录若干物品三年的每日历史，输出文件大小、记录和查询耗时
+    path = os.path.join(tempfile.gettempdir(), "worthit-history-benchmark.sqlite3")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    size, years = 1000, 3
+    items = []
+    for i in range(size):
+        properties = {
+            "物品名称": f"物品 {i}",
+            "购买价格": round(random.uniform(10, 10000), 2),
+            "入役日期": date.fromordinal(737000 + random.randint(0, 1000)).isoformat(),
+        }
+        if i % 7 == 0:
+            properties["退役日期"] = "2025-06-01"
+        items.append({"id": f"item-{i}", "archived": False, "properties": properties})
+    store = ItemStore(items)
+    history = ItemHistory(path)
+    first = date(2024, 1, 1)
+    start = time.perf_counter()
+    for offset in range(365 * years):
+        history.record(store, first + timedelta(days=offset))
+    elapsed = time.perf_counter() - start
+    history._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    print(
+        f"{size} 个物品 {years} 年：{len(history)} 条记录，"
+        f"文件 {os.path.getsize(path) / 1024 / 1024:.1f} MB，"
+        f"每天记录 {elapsed / (365 * years) * 1000:.1f} ms"
+    )
+    for step in (1, 7, 30):
+        rounds = 200
+        start = time.perf_counter()
+        for i in range(rounds):
+            points = history.query(f"item-{i % size}", step=step)
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"查询全部记录，step={step}：{len(points)} 个点，{elapsed * 1000:.2f} ms")
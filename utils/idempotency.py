@@ -0,0 +1,191 @@
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+from utils.logs import get_logger
+
+logger = get_logger("idempotency")
+
+DEFAULT_IDEMPOTENCY_PATH = os.path.join(tempfile.gettempdir(), "worthit-idempotency.sqlite3")
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_PATTERN = re.compile(r"^[\x21-\x7e]{1,255}$")
+
+# begin() 的结果：获得执行权、返回已保存的响应、同一个键对应了不同的请求、等待超时仍在执行中
+ACQUIRED = "acquired"
+REPLAY = "replay"
+MISMATCH = "mismatch"
+IN_PROGRESS = "in_progress"
+
+# 已保存的响应：(状态码, Content-Type, 响应体)
+StoredResponse = Tuple[int, str, bytes]
+
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """
+    计算请求的指纹，同一个幂等键只能用于指纹相同的请求。
+    """
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """
+    幂等键存储，保存在 SQLite 中，多个 worker 进程共享。
+    第一次收到某个幂等键的请求时记录为执行中，执行完成后保存响应；
+    在有效期内重试同一个请求直接返回保存的响应，并发的重复请求等待第一个请求完成后返回同一个响应。
+    记录数量超过上限时淘汰最早的记录。
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_IDEMPOTENCY_PATH,
+        ttl: int = 86400,
+        capacity: int = 10000,
+        lease: int = 120,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.1,
+    ):
+        """
+        :param path: SQLite 文件路径。
+        :param ttl: 响应保存的时间（秒）。
+        :param capacity: 最多保存的幂等键数量。
+        :param lease: 执行中的记录超过该时间（秒）未完成，视为执行它的进程已退出，允许重新执行。
+        :param wait_timeout: 并发的重复请求最多等待多少秒。
+        :param poll_interval: 等待其他进程完成时的轮询间隔（秒）。
+        """
+        self.path = path
+        self.ttl = ttl
+        self.capacity = max(capacity, 1)
+        self.lease = lease
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        # 同一进程内的请求完成时唤醒等待者，其他进程的请求通过轮询发现
+        self._finished = threading.Condition()
+        with self._connect() as conn:
+            # status 为 NULL 表示执行中，此时 expires_at 为租约到期时间
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, status INTEGER, "
+                "mimetype TEXT, body BLOB, created_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idempotency_keys_created_at "
+                "ON idempotency_keys (created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，丢弃从主进程继承的连接和锁。
+        """
+        self._local = threading.local()
+        self._finished = threading.Condition()
+
+    def _try_begin(
+        self, key: str, fingerprint: str
+    ) -> Tuple[Optional[str], Optional[StoredResponse]]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT fingerprint, status, mimetype, body, expires_at "
+                "FROM idempotency_keys WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or row[4] <= now:
+                if row is not None and row[1] is None:
+                    logger.warning(
+                        "幂等请求执行超时，允许重新执行", extra={"fields": {"key": key}}
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO idempotency_keys "
+                    "(key, fingerprint, status, mimetype, body, created_at, expires_at) "
+                    "VALUES (?, ?, NULL, NULL, NULL, ?, ?)",
+                    (key, fingerprint, now, now + self.lease),
+                )
+                conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM idempotency_keys WHERE key IN (SELECT key FROM "
+                    "idempotency_keys ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.capacity,),
+                )
+                state, stored = ACQUIRED, None
+            elif row[0] != fingerprint:
+                state, stored = MISMATCH, None
+            elif row[1] is not None:
+                state, stored = REPLAY, (row[1], row[2], bytes(row[3]))
+            else:
+                state, stored = None, None
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return state, stored
+
+    def begin(
+        self, key: str, fingerprint: str
+    ) -> Tuple[str, Optional[StoredResponse]]:
+        """
+        开始处理一个带幂等键的请求。
+        :param key: 幂等键。
+        :param fingerprint: 请求指纹，见 request_fingerprint。
+        :return: (结果, 已保存的响应)。结果为 ACQUIRED 时调用方执行请求，之后必须调用 complete 或 abandon；
+                 为 REPLAY 时返回已保存的响应；为 MISMATCH 时该幂等键已用于其他请求；
+                 为 IN_PROGRESS 时相同的请求仍在执行，等待超时。
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            state, stored = self._try_begin(key, fingerprint)
+            if state is not None:
+                return state, stored
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return IN_PROGRESS, None
+            with self._finished:
+                self._finished.wait(min(self.poll_interval, remaining))
+
+    def complete(
+        self, key: str, fingerprint: str, status: int, mimetype: str, body: bytes
+    ) -> None:
+        """
+        保存请求的响应，有效期内的重试都会返回这个响应。
+        """
+        now = time.time()
+        self._connect().execute(
+            "UPDATE idempotency_keys SET status = ?, mimetype = ?, body = ?, expires_at = ? "
+            "WHERE key = ? AND fingerprint = ? AND status IS NULL",
+            (status, mimetype, body, now + self.ttl, key, fingerprint),
+        )
+        with self._finished:
+            self._finished.notify_all()
+
+    def abandon(self, key: str, fingerprint: str) -> None:
+        """
+        请求失败且可以重试（例如 Notion 暂时不可用）时删除执行中的记录，下次重试会重新执行。
+        """
+        self._connect().execute(
+            "DELETE FROM idempotency_keys WHERE key = ? AND fingerprint = ? AND status IS NULL",
+            (key, fingerprint),
+        )
+        with self._finished:
+            self._finished.notify_all()
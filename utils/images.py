@@ -0,0 +1,391 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from utils.database import NotionItemTrackerClient
+from utils.logs import get_logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖，未安装时直接缓存原图，不缩放
+    Image = None
+    ImageOps = None
+
+logger = get_logger("images")
+
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "worthit-images")
+# 缩略图宽度档位，请求的宽度向上取整到最近的档位，避免同一张图片缓存过多尺寸
+THUMBNAIL_WIDTHS = (160, 320, 480, 640, 960, 1280)
+# 临时地址在过期前多少秒就视为失效，留出下载所需的时间
+URL_EXPIRY_MARGIN = 60
+# 外部链接没有过期时间，按此间隔（秒）重新读取页面，以发现图片被替换
+EXTERNAL_URL_TTL = 3600
+
+# 缓存的文件列表：(地址失效时间, 版本, 文件列表)
+CachedFiles = Tuple[float, Optional[str], List[Dict[str, Any]]]
+
+
+def sniff_mimetype(header: bytes) -> Optional[str]:
+    """
+    根据文件头判断图片类型。只接受常见的位图格式，不接受 SVG 等可能包含脚本的格式。
+    :param header: 文件开头至少 12 个字节。
+    :return: MIME 类型，不是支持的图片时返回 None。
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def thumbnail_width(width: int) -> int:
+    """
+    将请求的宽度取整到缩略图档位。
+    """
+    for candidate in THUMBNAIL_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def resize_image(data: bytes, width: int) -> bytes:
+    """
+    将图片缩放到不超过指定宽度，按照 EXIF 方向旋转并重新压缩。
+    未安装 Pillow、图片为动图或无法解析时返回原图。
+    :param data: 原图数据。
+    :param width: 最大宽度（像素）。
+    :return: 缩略图数据。
+    """
+    if Image is None:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if getattr(image, "is_animated", False):
+                return data
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((width, width * 4))
+            output = io.BytesIO()
+            if image.mode in ("RGBA", "LA") or (
+                image.mode == "P" and "transparency" in image.info
+            ):
+                image.save(output, "PNG", optimize=True)
+            else:
+                image.convert("RGB").save(
+                    output, "JPEG", quality=82, optimize=True, progressive=True
+                )
+            return output.getvalue()
+    except Exception as e:
+        logger.warning("缩放图片失败，使用原图: %s", e)
+        return data
+
+
+class ThumbnailCache:
+    """
+    磁盘上按总大小限制的缩略图 LRU 缓存，多个 worker 进程可以共享同一个目录。
+    命中时更新文件的修改时间，写入后总大小超过上限时删除修改时间最早的文件，直到不超过上限的 90%。
+    总大小在内存中累计，只在启动时、累计值超过上限时或距上次扫描超过 rescan_interval 时扫描目录，
+    定期扫描用于计入其他 worker 写入的文件。
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_IMAGE_CACHE_DIR,
+        max_bytes: int = 200 * 1024 * 1024,
+        rescan_interval: float = 60.0,
+    ):
+        """
+        :param directory: 缓存目录。
+        :param max_bytes: 缓存文件的总大小上限（字节）。
+        :param rescan_interval: 重新扫描目录的最长间隔（秒）。
+        """
+        self.directory = directory
+        self.max_bytes = max(max_bytes, 0)
+        self.rescan_interval = rescan_interval
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total_bytes, self._scanned_at = self._scan_total(), time.monotonic()
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的锁。
+        """
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:40]
+        return os.path.join(self.directory, f"{digest}.thumb")
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """
+        读取缓存的缩略图。
+        :param key: 缓存键。
+        :return: (文件路径, MIME 类型)，不存在时返回 None。
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                mimetype = sniff_mimetype(file.read(12))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        if mimetype is None:
+            return None
+        return path, mimetype
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        写入缩略图，并在总大小超过上限时淘汰最久未使用的文件。
+        :param key: 缓存键。
+        :param data: 图片数据。
+        :return: 文件路径。
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total_bytes += len(data) - replaced
+            if (
+                self._total_bytes <= self.max_bytes
+                and time.monotonic() - self._scanned_at < self.rescan_interval
+            ):
+                return path
+        self._evict(keep=path)
+        return path
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".thumb"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self, keep: str) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            entries.sort()
+            # 淘汰到上限的 90%，之后的若干次写入不需要再扫描目录
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # 其他 worker 已经删除
+                    pass
+                total -= size
+        with self._lock:
+            self._total_bytes, self._scanned_at = total, time.monotonic()
+
+
+class ItemImageProxy:
+    """
+    物品图片代理：通过 pages.retrieve 获取文件属性中第一张图片的地址，下载并缩放后保存在 ThumbnailCache 中。
+    Notion 托管文件的地址带有签名，大约一小时后过期；地址在进程内按过期时间缓存，
+    过期后或下载时被拒绝（403）时重新读取页面获取新地址。
+    缩略图的缓存键使用不含签名参数的地址，地址刷新后仍能命中已有的缩略图。
+    """
+
+    def __init__(
+        self,
+        cache: ThumbnailCache,
+        property_name: Optional[str] = None,
+        max_download_bytes: int = 20 * 1024 * 1024,
+        timeout: float = 10.0,
+        concurrency: int = 3,
+        max_entries: int = 4096,
+    ):
+        """
+        :param cache: 缩略图缓存。
+        :param property_name: 图片所在的文件属性名，为空时使用第一个有文件的文件属性。
+        :param max_download_bytes: 原图大小上限（字节），超过时放弃下载。
+        :param timeout: 下载超时时间（秒）。
+        :param concurrency: 同时向 Notion 读取页面的最大数量，避免大量图片同时加载时触发限流。
+        :param max_entries: 进程内最多缓存多少个物品的文件地址，超过后淘汰最久未使用的物品。
+        """
+        self.cache = cache
+        self.property_name = property_name or None
+        self.max_download_bytes = max_download_bytes
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.max_entries = max(max_entries, 1)
+        self._lock = threading.Lock()
+        self._retrieve_slots = threading.BoundedSemaphore(concurrency)
+        # (数据库ID, 物品ID) -> 文件列表
+        # 多个数据库共用同一个代理，同一个物品ID在其他数据库中读取的结果（空列表）不能覆盖本数据库的结果
+        self._files: "OrderedDict[Tuple[str, str], CachedFiles]" = OrderedDict()
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的锁。
+        """
+        self._lock = threading.Lock()
+        self._retrieve_slots = threading.BoundedSemaphore(self.concurrency)
+        self.cache.after_fork()
+
+    def apply_event(self, event: str, item: Dict[str, Any]) -> None:
+        """
+        物品被修改或归档后丢弃缓存的地址（所有数据库中的），下次请求时重新读取。
+        可直接作为 NotionItemTrackerClient 的监听者使用。
+        """
+        with self._lock:
+            for key in [key for key in self._files if key[1] == item["id"]]:
+                del self._files[key]
+
+    @staticmethod
+    def _expires_at(files: List[Dict[str, Any]]) -> float:
+        expires_at = time.time() + EXTERNAL_URL_TTL
+        for file in files:
+            if file.get("expiry_time"):
+                expiry = datetime.fromisoformat(file["expiry_time"].replace("Z", "+00:00"))
+                expires_at = min(expires_at, expiry.timestamp() - URL_EXPIRY_MARGIN)
+        return expires_at
+
+    def resolve(
+        self,
+        client: NotionItemTrackerClient,
+        item_id: str,
+        version: Optional[str] = None,
+        refresh: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        获取物品的文件列表，地址未过期时不请求 Notion。
+        :param client: Notion 客户端。
+        :param item_id: 物品ID。
+        :param version: 服务端物品列表中的物品版本（last_edited_time），与缓存的不同时重新读取。
+                        不能直接使用请求参数，否则任何人都可以让每个请求都读取 Notion。
+        :param refresh: 是否强制重新读取。
+        :return: 文件列表，没有图片时为空列表。
+        """
+        key = ((client.database_id or "").replace("-", ""), item_id)
+        with self._lock:
+            cached = self._files.get(key)
+            if cached is not None:
+                self._files.move_to_end(key)
+        if (
+            cached is not None
+            and not refresh
+            and cached[0] > time.time()
+            and (version is None or version == cached[1])
+        ):
+            return cached[2]
+
+        with self._retrieve_slots:
+            files = client.get_item_files(item_id, self.property_name)
+        with self._lock:
+            self._files[key] = (
+                self._expires_at(files),
+                version if version is not None else (cached[1] if cached else None),
+                files,
+            )
+            self._files.move_to_end(key)
+            while len(self._files) > self.max_entries:
+                self._files.popitem(last=False)
+        return files
+
+    def _download(self, url: str) -> Optional[bytes]:
+        """
+        下载原图，地址已过期时返回 None。
+        :raises ValueError: 文件过大或不是支持的图片格式。
+        :raises httpx.HTTPError: 下载失败。
+        """
+        with httpx.stream("GET", url, timeout=self.timeout, follow_redirects=True) as response:
+            if response.status_code in (400, 401, 403):
+                return None
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+                if size > self.max_download_bytes:
+                    raise ValueError("图片文件过大。")
+                chunks.append(chunk)
+        data = b"".join(chunks)
+        if sniff_mimetype(data[:12]) is None:
+            raise ValueError("文件不是支持的图片格式。")
+        return data
+
+    def thumbnail(
+        self,
+        client: NotionItemTrackerClient,
+        item_id: str,
+        width: int,
+        version: Optional[str] = None,
+    ) -> Optional[Tuple[str, str, str]]:
+        """
+        获取物品图片的缩略图，不在缓存中时下载并缩放。
+        :param client: Notion 客户端。
+        :param item_id: 物品ID。
+        :param width: 请求的宽度（像素），会取整到缩略图档位。
+        :param version: 服务端物品列表中的物品版本，用于发现图片被替换。
+        :return: (文件路径, MIME 类型, ETag)，物品没有图片时返回 None。
+        :raises ValueError: 原图过大或不是支持的图片格式。
+        :raises httpx.HTTPError: 下载失败。
+        """
+        width = thumbnail_width(width) if Image is not None else 0
+        files = self.resolve(client, item_id, version)
+        if not files:
+            return None
+
+        # 签名参数每次刷新都会变化，缓存键只使用地址的路径部分
+        key = f"{item_id}|{files[0]['url'].split('?', 1)[0]}|{width}"
+        etag = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[0], cached[1], etag
+
+        data = self._download(files[0]["url"])
+        if data is None:
+            # 地址在预计的过期时间之前就失效了，重新获取一次
+            files = self.resolve(client, item_id, version, refresh=True)
+            if not files:
+                return None
+            data = self._download(files[0]["url"])
+            if data is None:
+                raise ValueError("无法下载图片：地址已失效。")
+
+        started = time.perf_counter()
+        thumbnail = resize_image(data, width) if width else data
+        path = self.cache.put(key, thumbnail)
+        logger.info(
+            "已缓存物品图片",
+            extra={
+                "fields": {
+                    "item_id": item_id,
+                    "width": width,
+                    "original_bytes": len(data),
+                    "thumbnail_bytes": len(thumbnail),
+                    "resize_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+            },
+        )
+        return path, sniff_mimetype(thumbnail[:12]) or "application/octet-stream", etag
@@ -0,0 +1,374 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.database import NotionItemTrackerClient
+from utils.logs import get_logger
+
+logger = get_logger("journal")
+
+DEFAULT_JOURNAL_PATH = "worthit-journal.sqlite3"
+LOCAL_ID_PREFIX = "local-"
+
+# 运行中的操作超过该时间未完成，视为处理它的进程已退出，可以重新执行
+RUNNING_LEASE_SECONDS = 300
+
+
+class WriteBehindQueue:
+    """
+    管理员写操作的延迟写入队列（write-behind）。
+    增删改操作先写入本地 SQLite（WAL 模式）日志并立即返回，
+    读取物品列表时会把尚未写入 Notion 的操作叠加到结果上，
+    由后台线程按顺序写入 Notion，失败时按指数退避重试。
+    同一物品的操作严格按提交顺序执行，不同物品之间互不阻塞。
+    """
+
+    def __init__(
+        self,
+        client: NotionItemTrackerClient,
+        path: str = DEFAULT_JOURNAL_PATH,
+        max_attempts: int = 5,
+        poll_interval: float = 1.0,
+        on_applied: Optional[Callable[[], None]] = None,
+    ):
+        """
+        :param client: NotionItemTrackerClient 实例。
+        :param path: 日志文件路径。
+        :param max_attempts: 单个操作的最大尝试次数，超过后标记为失败，等待人工重试。
+        :param poll_interval: 后台线程轮询日志的间隔（秒）。
+        :param on_applied: 每个操作成功写入 Notion 后调用，用于刷新缓存。
+        """
+        self.client = client
+        self.path = path
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.on_applied = on_applied
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS operations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "op TEXT NOT NULL, page_id TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, result_page_id TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0)"
+        )
+        self._connect().execute(
+            "CREATE INDEX IF NOT EXISTS idx_operations_status ON operations (status, id)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，丢弃从主进程继承的连接。
+        worker 只负责写入日志，写入 Notion 由主进程中的后台线程完成。
+        """
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _enqueue(self, op: str, page_id: str, payload: Dict[str, Any]) -> int:
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO operations (op, page_id, payload, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (op, page_id, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def enqueue_create(self, **fields: Any) -> Dict[str, Any]:
+        """
+        提交一个创建物品的操作，参数与 NotionItemTrackerClient.add_item 相同。
+        会先校验字段格式，格式错误时直接抛出 ValueError，不写入日志。
+        :return: 包含操作 ID 和物品临时 ID 的字典。
+        """
+        self.client.build_item_properties(**fields)
+        local_id = f"{LOCAL_ID_PREFIX}{uuid.uuid4()}"
+        operation_id = self._enqueue("create", local_id, fields)
+        return {"operation_id": operation_id, "item_id": local_id}
+
+    def enqueue_update(self, page_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        提交一个修改物品的操作，updates 的格式与 NotionItemTrackerClient.update_item 相同。
+        :return: 包含操作 ID 和物品 ID 的字典。
+        :raises ValueError: 如果属性格式不正确。
+        """
+        self.client.build_update_properties(updates)
+        operation_id = self._enqueue("update", page_id, updates)
+        return {"operation_id": operation_id, "item_id": page_id}
+
+    def enqueue_delete(self, page_id: str) -> Dict[str, Any]:
+        """
+        提交一个删除（归档）物品的操作。
+        :return: 包含操作 ID 和物品 ID 的字典。
+        """
+        operation_id = self._enqueue("delete", page_id, {})
+        return {"operation_id": operation_id, "item_id": page_id}
+
+    def pending_operations(self) -> List[Dict[str, Any]]:
+        """
+        按提交顺序返回尚未成功写入 Notion 的操作（包括失败的操作）。
+        """
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT id, op, page_id, payload, status, attempts, last_error, "
+                "result_page_id, created_at, updated_at FROM operations "
+                "WHERE status != 'done' ORDER BY id"
+            )
+            .fetchall()
+        )
+        operations = []
+        for row in rows:
+            operation = dict(row)
+            operation["payload"] = json.loads(operation["payload"])
+            operations.append(operation)
+        return operations
+
+    def has_pending(self) -> bool:
+        """
+        是否存在尚未成功写入 Notion 的操作。
+        """
+        return (
+            self._connect()
+            .execute("SELECT 1 FROM operations WHERE status != 'done' LIMIT 1")
+            .fetchone()
+            is not None
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """
+        返回队列状态，包括各状态的操作数量和未完成的操作列表。
+        """
+        operations = self.pending_operations()
+        counts = {"pending": 0, "running": 0, "failed": 0}
+        for operation in operations:
+            counts[operation["status"]] = counts.get(operation["status"], 0) + 1
+        return {**counts, "operations": operations}
+
+    def retry(self, operation_id: int) -> bool:
+        """
+        将失败的操作重新放回队列。
+        :return: 找到并重置了该操作返回 True。
+        """
+        cursor = self._connect().execute(
+            "UPDATE operations SET status = 'pending', attempts = 0, "
+            "next_attempt_at = 0, updated_at = ? WHERE id = ? AND status = 'failed'",
+            (time.time(), operation_id),
+        )
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def discard(self, operation_id: int) -> bool:
+        """
+        放弃一个失败的操作，之后同一物品的操作可以继续执行。
+        :return: 找到并删除了该操作返回 True。
+        """
+        cursor = self._connect().execute(
+            "DELETE FROM operations WHERE id = ? AND status = 'failed'",
+            (operation_id,),
+        )
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def overlay(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将尚未写入 Notion 的操作叠加到物品列表上，实现乐观更新。
+        不会修改传入的列表，叠加后的物品带有 "pending": True 标记。
+        :param items: 从 Notion 或缓存读取的物品列表。
+        :return: 叠加后的新物品列表。
+        """
+        if not self.has_pending():
+            return items
+
+        operations = self.pending_operations()
+        items = list(items)
+        index = {item["id"]: i for i, item in enumerate(items)}
+        for operation in operations:
+            page_id = operation["result_page_id"] or operation["page_id"]
+            payload = operation["payload"]
+            if operation["op"] == "create":
+                if page_id in index:
+                    continue
+                properties = {
+                    "物品名称": payload.get("item_name"),
+                    "入役日期": payload.get("entry_date"),
+                    "购买价格": payload.get("purchase_price"),
+                    "附加价值": payload.get("additional_value"),
+                    "退役日期": payload.get("retirement_date"),
+                    "备注": payload.get("remark"),
+                }
+                index[page_id] = len(items)
+                items.append(
+                    {
+                        "id": page_id,
+                        "archived": False,
+                        "pending": True,
+                        "properties": {
+                            k: v for k, v in properties.items() if v not in (None, "")
+                        },
+                    }
+                )
+            elif page_id in index:
+                position = index[page_id]
+                if operation["op"] == "update":
+                    item = items[position]
+                    properties = dict(item["properties"])
+                    for prop_name, value in payload.items():
+                        if value is None or value == "":
+                            properties.pop(prop_name, None)
+                        else:
+                            properties[prop_name] = value
+                    items[position] = {**item, "properties": properties, "pending": True}
+                elif operation["op"] == "delete":
+                    items[position] = None
+
+        return [item for item in items if item is not None]
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """
+        取出下一个可以执行的操作并标记为运行中。
+        同一物品如果有更早的未完成操作（包括失败的），则跳过该物品。
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM operations AS o WHERE "
+                "((o.status = 'pending' AND o.next_attempt_at <= ?) "
+                "OR (o.status = 'running' AND o.updated_at <= ?)) "
+                "AND NOT EXISTS (SELECT 1 FROM operations AS e WHERE e.page_id = o.page_id "
+                "AND e.id < o.id AND e.status != 'done') "
+                "ORDER BY o.id LIMIT 1",
+                (now, now - RUNNING_LEASE_SECONDS),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE operations SET status = 'running', updated_at = ? WHERE id = ?",
+                    (now, row["id"]),
+                )
+            conn.execute("COMMIT")
+            return row
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _apply(self, row: sqlite3.Row) -> Optional[str]:
+        payload = json.loads(row["payload"])
+        if row["op"] == "create":
+            result = self.client.add_item(**payload)
+        elif row["op"] == "update":
+            result = self.client.update_item(row["page_id"], payload)
+        elif row["op"] == "delete":
+            result = self.client.delete_item(row["page_id"])
+        else:
+            raise ValueError(f"未知的操作类型 '{row['op']}'。")
+        if not (result and result.get("object") == "page" and result.get("id")):
+            raise RuntimeError(f"Notion 返回了非预期的响应: {result}")
+        return result["id"]
+
+    def process_next(self) -> bool:
+        """
+        执行下一个可以执行的操作。
+        :return: 执行了一个操作（无论成功与否）返回 True，没有可执行的操作返回 False。
+        """
+        row = self._claim()
+        if row is None:
+            return False
+
+        conn = self._connect()
+        try:
+            result_page_id = self._apply(row)
+        except Exception as e:
+            attempts = row["attempts"] + 1
+            status = "failed" if attempts >= self.max_attempts else "pending"
+            conn.execute(
+                "UPDATE operations SET status = ?, attempts = ?, last_error = ?, "
+                "updated_at = ?, next_attempt_at = ? WHERE id = ?",
+                (
+                    status,
+                    attempts,
+                    str(e),
+                    time.time(),
+                    time.time() + min(2**attempts, 300),
+                    row["id"],
+                ),
+            )
+            logger.warning(
+                "操作 %s (%s) 第 %s 次执行失败: %s", row["id"], row["op"], attempts, e
+            )
+            return True
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE operations SET result_page_id = ?, updated_at = ? WHERE id = ?",
+                (result_page_id, time.time(), row["id"]),
+            )
+            if row["op"] == "create":
+                # 之后针对临时 ID 的修改和删除操作改为使用 Notion 返回的真实 ID
+                conn.execute(
+                    "UPDATE operations SET page_id = ? WHERE page_id = ? AND id > ?",
+                    (result_page_id, row["page_id"], row["id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        # 先刷新缓存再标记完成，保证读取方始终能看到这次修改
+        if self.on_applied is not None:
+            try:
+                self.on_applied()
+            except Exception as e:
+                logger.error("刷新缓存时发生错误: %s", e)
+        conn.execute(
+            "UPDATE operations SET status = 'done', updated_at = ? WHERE id = ?",
+            (time.time(), row["id"]),
+        )
+        # 已完成的操作只保留一天，避免日志无限增长
+        conn.execute(
+            "DELETE FROM operations WHERE status = 'done' AND updated_at < ?",
+            (time.time() - 86400,),
+        )
+        return True
+
+    def start(self) -> None:
+        """
+        启动后台写入线程。
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                while self.process_next():
+                    pass
+            except Exception as e:
+                logger.exception("处理队列时发生错误: %s", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+ROOT_LOGGER_NAME = "worthit"
+# 当前请求的 ID，由请求钩子设置，非请求上下文（后台线程）中为 "-"
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_payload_sample_rate = 1.0
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    获取 worthit 下的子 logger。
+    :param name: 模块名，例如 "database"。
+    """
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    结构化日志格式。json 格式每行一个 JSON 对象，便于日志平台检索；
+    text 格式为 "时间 级别 logger [request_id] 消息 key=value"，便于直接阅读。
+    通过 extra={"fields": {...}} 传入的字段会附加到输出中。
+    """
+
+    def __init__(self, fmt: str = "text"):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields: Dict[str, Any] = dict(getattr(record, "fields", None) or {})
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+        timestamp += f".{int(record.msecs):03d}"
+        if self.fmt == "json":
+            entry = {
+                "time": timestamp,
+                "level": record.levelname,
+                "logger": record.name,
+                "request_id": getattr(record, "request_id", "-"),
+                "message": record.getMessage(),
+                **fields,
+            }
+            if record.exc_text:
+                entry["exception"] = record.exc_text
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        line = (
+            f"{timestamp} {record.levelname} {record.name} "
+            f"[{getattr(record, 'request_id', '-')}] {record.getMessage()}"
+        )
+        if fields:
+            line += " " + " ".join(
+                f"{key}={json.dumps(value, ensure_ascii=False, default=str)}"
+                for key, value in fields.items()
+            )
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _RequestQueueHandler(QueueHandler):
+    """
+    在调用日志的线程中只记录请求 ID 并合并消息参数，格式化和写出都交给后台线程，
+    日志输出慢（例如 stdout 被管道阻塞）时不会拖慢请求。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # 异常对象引用着调用栈，需要在当前线程中转换为文本
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.queue.put_nowait(record)
+
+
+def setup_logging(
+    level: str = "INFO", fmt: str = "text", payload_sample_rate: float = 1.0
+) -> None:
+    """
+    配置 worthit 的日志：日志先放入内存队列，由后台线程格式化并写到 stdout。
+    重复调用时会替换之前的配置。
+    :param level: 日志级别，例如 DEBUG、INFO、WARNING。
+    :param fmt: 输出格式，text 或 json。
+    :param payload_sample_rate: 详细数据日志（log_payload）的采样率，0 到 1 之间。
+    """
+    global _listener, _queue_handler, _payload_sample_rate
+    shutdown_logging()
+
+    _payload_sample_rate = min(max(payload_sample_rate, 0.0), 1.0)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(StructuredFormatter(fmt))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _RequestQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=False)
+
+    logger = logging.getLogger(ROOT_LOGGER_NAME)
+    logger.setLevel(level.upper())
+    logger.handlers = [_queue_handler]
+    logger.propagate = False
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    停止后台写日志的线程，并写出队列中剩余的日志。
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def after_fork() -> None:
+    """
+    在 worker 进程 fork 后调用，重新创建队列和后台线程。
+    """
+    global _listener
+    if _queue_handler is None or _listener is None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=False)
+    _listener.start()
+
+
+def log_payload(
+    logger: logging.Logger, message: str, payload: Any, **fields: Any
+) -> None:
+    """
+    以 DEBUG 级别按采样率记录详细数据（如 Notion 的完整响应）。
+    未开启 DEBUG 或未被采样时不做任何处理，数据量大的日志不会影响生产环境。
+    :param logger: logger。
+    :param message: 日志消息。
+    :param payload: 详细数据，由后台线程序列化。
+    :param fields: 附加字段。
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if _payload_sample_rate < 1.0 and random.random() >= _payload_sample_rate:
+        return
+    logger.debug(message, extra={"fields": {**fields, "payload": payload}})
+
+
+atexit.register(shutdown_logging)
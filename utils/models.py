@@ -1,3 +1,4 @@
+import math
 import re
 import warnings
 from datetime import date, datetime
@@ -135,3 +136,47 @@ class Item(BaseModel):
     id: UUID = Field(description="物品的唯一标识符")
     archived: bool = Field(description="物品是否已归档")
     properties: ItemProperties = Field(description="物品的属性详情")
+
+
+# 目标日均价格的最小值（元）
+MIN_TARGET_DAILY_COST = 0.01
+
+
+class ProjectionRequest(BaseModel):
+    """
+    日均价格预测的请求模型。
+    """
+
+    dates: List[date] = Field(
+        default_factory=list, max_length=32, description="需要预测日均价格的日期"
+    )
+    targets: List[float] = Field(
+        default_factory=list, max_length=32, description="目标日均价格，计算每个物品达到目标的日期"
+    )
+    ids: Optional[List[str]] = Field(
+        default=None, description="只计算指定ID的物品，不填写时计算全部物品"
+    )
+
+    @field_validator("targets")
+    @classmethod
+    def check_targets_positive(cls, v):
+        """
+        目标日均价格必须为有限的数，且不小于 0.01 元。
+        过小的目标值会使 总价值 / 目标值 溢出为无穷大，无法计算达到目标的日期。
+        """
+        if any(
+            not math.isfinite(target) or target < MIN_TARGET_DAILY_COST for target in v
+        ):
+            raise ValueError(
+                f"目标日均价格必须是不小于 {MIN_TARGET_DAILY_COST} 的有限数值"
+            )
+        return v
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        """
+        日期和目标日均价格至少需要填写一项。
+        """
+        if not self.dates and not self.targets:
+            raise ValueError("dates 和 targets 至少需要填写一项")
+        return self
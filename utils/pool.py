@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from notion_client import Client
+
+from utils.database import NotionItemTrackerClient
+from utils.logs import get_logger
+from utils.tools import RateLimiter
+
+logger = get_logger("pool")
+
+# 数据库键只允许字母、数字、下划线和连字符，会出现在地址和缓存键中
+DATABASE_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+
+def parse_databases(value: Any) -> Dict[str, str]:
+    """
+    解析多数据库配置。
+    :param value: 字典 {键: 数据库ID}，或 "键=数据库ID,键=数据库ID" 格式的字符串。
+    :return: 数据库键 -> 数据库ID。
+    :raises ValueError: 数据库键格式不正确。
+    """
+    if not value:
+        return {}
+    if isinstance(value, str):
+        value = dict(
+            entry.split("=", 1) for entry in value.split(",") if "=" in entry
+        )
+    databases = {
+        str(key).strip(): str(database_id).strip() for key, database_id in value.items()
+    }
+    for key in databases:
+        if not DATABASE_KEY_PATTERN.match(key):
+            raise ValueError(
+                f"数据库键 '{key}' 格式不正确，只能包含字母、数字、下划线和连字符。"
+            )
+    return databases
+
+
+class DatabaseContext:
+    """
+    单个数据库在进程内的资源：Notion 客户端，以及由 on_create 回调挂载的搜索索引等组件。
+    """
+
+    def __init__(self, key: str, client: NotionItemTrackerClient):
+        self.key = key
+        self.client = client
+        self.search_index: Any = None
+        self.last_used = time.monotonic()
+
+
+class NotionClientPool:
+    """
+    多数据库的客户端池：按数据库键在第一次使用时创建 NotionItemTrackerClient，
+    所有客户端共享同一个 notion_client.Client（即同一个 HTTP 连接池）和同一个限流器。
+    长时间未使用的数据库，以及超过数量上限时最久未使用的数据库会被淘汰，
+    淘汰时调用 on_evict 回调释放它在进程内占用的缓存。
+    """
+
+    def __init__(
+        self,
+        notion_token: str,
+        databases: Dict[str, str],
+        max_active: int = 8,
+        idle_timeout: int = 1800,
+        rate_limiter: Optional[RateLimiter] = None,
+        on_create: Optional[Callable[[DatabaseContext], None]] = None,
+        on_evict: Optional[Callable[[DatabaseContext], None]] = None,
+    ):
+        """
+        :param notion_token: Notion API 集成令牌。
+        :param databases: 数据库键 -> 数据库ID。
+        :param max_active: 同时保留的数据库数量上限。
+        :param idle_timeout: 数据库超过多少秒未使用后被淘汰，为 0 时只按数量淘汰。
+        :param rate_limiter: 所有客户端共享的限流器，默认每秒 3 个请求。
+        :param on_create: 创建数据库资源后的回调，用于挂载搜索索引、监听者等。
+        :param on_evict: 淘汰数据库资源时的回调，用于释放缓存。
+        """
+        self.notion_token = notion_token
+        self.databases = dict(databases)
+        self.max_active = max(max_active, 1)
+        self.idle_timeout = idle_timeout
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.on_create = on_create
+        self.on_evict = on_evict
+        self.notion = Client(auth=notion_token)
+        self._lock = threading.Lock()
+        self._contexts: Dict[str, DatabaseContext] = {}
+        # 每个数据库一个创建锁，同一数据库只创建一次，不同数据库可以同时创建
+        self._create_locks = {key: threading.Lock() for key in self.databases}
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重新创建 HTTP 连接池、锁和限流器，丢弃已创建的客户端。
+        """
+        self.notion = Client(auth=self.notion_token)
+        self.rate_limiter = RateLimiter(self.rate_limiter.rate, self.rate_limiter.burst)
+        self._lock = threading.Lock()
+        self._contexts = {}
+        self._create_locks = {key: threading.Lock() for key in self.databases}
+
+    def keys(self) -> List[str]:
+        """
+        获取所有已配置的数据库键。
+        """
+        return list(self.databases)
+
+    def active_keys(self) -> List[str]:
+        """
+        获取当前进程中已创建资源的数据库键。
+        """
+        with self._lock:
+            return list(self._contexts)
+
+    def get(self, key: str) -> DatabaseContext:
+        """
+        获取数据库资源，不存在时创建。
+        :param key: 数据库键。
+        :return: DatabaseContext。
+        :raises KeyError: 数据库键未配置。
+        :raises Exception: 创建客户端失败（例如数据库 ID 不在集成权限范围内）。
+        """
+        if key not in self.databases:
+            raise KeyError(key)
+        with self._lock:
+            context = self._contexts.get(key)
+            if context is not None:
+                context.last_used = time.monotonic()
+        if context is not None:
+            self._evict(keep=key)
+            return context
+
+        with self._create_locks[key]:
+            with self._lock:
+                context = self._contexts.get(key)
+            if context is None:
+                client = NotionItemTrackerClient(
+                    self.notion_token,
+                    self.databases[key],
+                    notion=self.notion,
+                    rate_limiter=self.rate_limiter,
+                )
+                context = DatabaseContext(key, client)
+                if self.on_create is not None:
+                    self.on_create(context)
+                logger.info("已创建数据库客户端", extra={"fields": {"database": key}})
+                with self._lock:
+                    self._contexts[key] = context
+            context.last_used = time.monotonic()
+        self._evict(keep=key)
+        return context
+
+    def _evict(self, keep: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            by_age = sorted(self._contexts.values(), key=lambda context: context.last_used)
+            evicted = [
+                context
+                for context in by_age
+                if context.key != keep
+                and self.idle_timeout > 0
+                and now - context.last_used > self.idle_timeout
+            ]
+            remaining = [context for context in by_age if context not in evicted]
+            evicted += [
+                context
+                for context in remaining[: max(len(remaining) - self.max_active, 0)]
+                if context.key != keep
+            ]
+            for context in evicted:
+                del self._contexts[context.key]
+
+        for context in evicted:
+            logger.info("已淘汰数据库客户端", extra={"fields": {"database": context.key}})
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(context)
+                except Exception as e:
+                    logger.warning("释放数据库资源时发生错误: %s", e)
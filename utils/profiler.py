@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "worthit-profiles")
+# 性能分析结果的 ID 格式：<纳秒时间戳>-<进程ID>
+PROFILE_ID_PATTERN = re.compile(r"^\d+-\d+$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    cwd = os.getcwd()
+    if filename.startswith(cwd):
+        filename = os.path.relpath(filename, cwd)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    采样式性能分析器：由后台线程按固定间隔记录目标线程的调用栈。
+    不使用 sys.setprofile，被分析的代码运行速度基本不受影响，
+    适合在生产环境中分析单个请求的耗时分布（Notion 请求、属性解析、pydantic 校验、JSON 编码等）。
+    """
+
+    def __init__(self, interval: float = 0.001):
+        """
+        :param interval: 采样间隔（秒）。
+        """
+        self.interval = interval
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target: Optional[int] = None
+        self._started_at = 0.0
+        self._duration = 0.0
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        """
+        开始采样。
+        :param thread_id: 被分析的线程 ID，默认为当前线程。
+        """
+        self._target = thread_id if thread_id is not None else threading.get_ident()
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        停止采样并等待采样线程结束。
+        """
+        self._duration = time.perf_counter() - self._started_at
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self._stacks[tuple(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """
+        以 collapsed stack 格式输出结果（每行 "栈帧;栈帧;... 采样数"），
+        可直接导入 speedscope 或 flamegraph.pl 生成火焰图。
+        """
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self._stacks.most_common()
+        )
+
+    def summary(self, limit: int = 30) -> List[Dict[str, Any]]:
+        """
+        按函数汇总采样结果。
+        :param limit: 返回的函数数量。
+        :return: 函数列表，包含自身耗时（self_ms）和包含子调用的总耗时（total_ms），按总耗时排序。
+        """
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [
+            {
+                "function": label,
+                "self_ms": round(own[label] * self.interval * 1000, 1),
+                "total_ms": round(count * self.interval * 1000, 1),
+            }
+            for label, count in sorted(
+                total.items(), key=lambda entry: (entry[1], own[entry[0]]), reverse=True
+            )[:limit]
+        ]
+
+    def result(self) -> Dict[str, Any]:
+        """
+        获取完整的分析结果。
+        """
+        return {
+            "duration_ms": round(self._duration * 1000, 1),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(self._stacks.values()),
+            "functions": self.summary(),
+            "folded": self.folded(),
+        }
+
+
+class ProfileStore:
+    """
+    磁盘上的性能分析结果环形缓冲区，最多保留 capacity 份，写入新结果时删除最旧的。
+    每份结果保存为一个 JSON 文件，多个 worker 进程可以共享同一个目录。
+    """
+
+    def __init__(self, directory: str = DEFAULT_PROFILE_DIR, capacity: int = 50):
+        """
+        :param directory: 保存目录。
+        :param capacity: 最多保留的结果数量。
+        """
+        self.directory = directory
+        self.capacity = max(capacity, 1)
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _ids(self) -> List[str]:
+        ids = [
+            name[: -len(".json")]
+            for name in os.listdir(self.directory)
+            if name.endswith(".json") and PROFILE_ID_PATTERN.match(name[: -len(".json")])
+        ]
+        return sorted(ids, key=lambda profile_id: int(profile_id.split("-")[0]))
+
+    def save(self, profile: Dict[str, Any]) -> str:
+        """
+        保存一份分析结果。
+        :param profile: 分析结果字典。
+        :return: 结果 ID。
+        """
+        profile_id = f"{time.time_ns()}-{os.getpid()}"
+        profile = {"id": profile_id, "created_at": time.time(), **profile}
+        path = self._path(profile_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(profile, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        for old_id in self._ids()[: -self.capacity]:
+            try:
+                os.remove(self._path(old_id))
+            except FileNotFoundError:
+                # 其他 worker 已经删除
+                pass
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        列出所有分析结果的摘要（不包含调用栈），最新的在前。
+        """
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            profile = self.get(profile_id)
+            if profile is None:
+                continue
+            profiles.append(
+                {
+                    key: value
+                    for key, value in profile.items()
+                    if key not in ("functions", "folded")
+                }
+            )
+        return profiles
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """
+        读取一份分析结果。
+        :param profile_id: 结果 ID。
+        :return: 分析结果字典，不存在时返回 None。
+        """
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
@@ -0,0 +1,198 @@
+import math
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.store import ItemStore
+
+# 未退役物品的退役日期按最大日期处理，计算时不需要单独判断
+_NEVER = date.max.toordinal()
+# 浮点误差容差，避免 total / target 恰好为整数时多算一天
+_EPSILON = 1e-9
+
+# (行号, 跳过数量, 总价值, 入役日期, 退役日期)
+_Prepared = Tuple[List[int], int, List[float], List[int], List[int]]
+# 最近一次计算全部物品时准备的列：(ItemStore, 准备结果)
+_last_prepared: Optional[Tuple[ItemStore, _Prepared]] = None
+# 日期序数 -> "YYYY-MM-DD"，在多次请求间共享，达到上限后清空
+_iso_dates: Dict[Optional[int], Optional[str]] = {None: None}
+_ISO_DATES_LIMIT = 200000
+
+
+def _selected_rows(
+    store: ItemStore, ids: Optional[Iterable[str]]
+) -> Tuple[List[int], int]:
+    """
+    选出可以计算日均价格的物品行：未归档、已填写入役日期和购买价格。
+    :return: (行号列表, 被跳过的物品数量)。
+    """
+    archived, entry_dates, prices = store.archived, store.entry_dates, store.prices
+    if ids is None:
+        candidates: Iterable[int] = (row for row in range(len(store)) if not archived[row])
+    else:
+        candidates = sorted(
+            {row for row in map(store.row, ids) if row is not None and not archived[row]}
+        )
+    rows: List[int] = []
+    skipped = 0
+    for row in candidates:
+        if entry_dates[row] and prices[row] == prices[row]:
+            rows.append(row)
+        else:
+            skipped += 1
+    return rows, skipped
+
+
+def _prepare(store: ItemStore, ids: Optional[Iterable[str]]) -> _Prepared:
+    """
+    取出参与计算的物品行及其总价值、入役日期和退役日期三列。
+    ItemStore 创建后不会再修改，计算全部物品时最近一次的结果会被复用，
+    缓存中的同一个 ItemStore 上的多次预测只需要准备一次。
+    """
+    global _last_prepared
+    if ids is None:
+        last = _last_prepared
+        if last is not None and last[0] is store:
+            return last[1]
+
+    rows, skipped = _selected_rows(store, ids)
+    prices, additional_values = store.prices, store.additional_values
+    totals = [
+        prices[row] + (value if (value := additional_values[row]) == value else 0.0)
+        for row in rows
+    ]
+    entries = [store.entry_dates[row] for row in rows]
+    ends = [store.retirement_dates[row] or _NEVER for row in rows]
+    prepared = (rows, skipped, totals, entries, ends)
+    if ids is None:
+        _last_prepared = (store, prepared)
+    return prepared
+
+
+def project(
+    store: ItemStore,
+    dates: List[date],
+    targets: List[float],
+    ids: Optional[Iterable[str]] = None,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    预测物品在指定日期的日均价格，以及日均价格降到目标值的日期。
+    日均价格 = (购买价格 + 附加价值) / 服役天数，服役天数为 min(日期, 退役日期) - 入役日期，
+    与前端和 Notion 公式的计算方式一致。
+    计算直接在 ItemStore 的列上进行：先取出选中物品的总价值、入役和退役日期三列，
+    再对每个日期或目标值整列计算一次；结果同样按列返回，不为每个物品构建字典。
+    :param store: 物品列表。
+    :param dates: 需要预测的日期。
+    :param targets: 目标日均价格（大于 0）。
+    :param ids: 只计算指定ID的物品，为 None 时计算全部物品。
+    :param today: 判断是否已经达到目标时使用的日期，默认为今天。
+    :return: 字典，包含：
+             ids、names：参与计算的物品ID和名称；
+             dates：每个日期一项，daily_costs 为各物品在该日期的日均价格（保留两位小数，与 ids 一一对应，
+                    尚未入役时为 None），total_daily_cost 为合计；
+             targets：每个目标值一项，dates 为各物品日均价格降到目标值的日期（退役前无法达到时为 None），
+                      reached 为今天已经达到的物品数量，unreachable 为无法达到的物品数量；
+             skipped：未填写入役日期或购买价格而跳过的物品数量。
+    """
+    today_ordinal = (today or date.today()).toordinal()
+    rows, skipped, totals, entries, ends = _prepare(store, ids)
+
+    # 总价值都不为负数时用 int(x * 100 + 0.5) / 100 保留两位小数，比 round(x, 2) 快
+    non_negative = not totals or min(totals) >= 0
+    date_results = []
+    for day in dates:
+        ordinal = day.toordinal()
+        if non_negative:
+            daily_costs = [
+                int(total * 100 / days + 0.5) / 100
+                if (days := (ordinal if ordinal < end else end) - entry) > 0
+                else None
+                for total, entry, end in zip(totals, entries, ends)
+            ]
+        else:
+            daily_costs = [
+                round(total / days, 2)
+                if (days := (ordinal if ordinal < end else end) - entry) > 0
+                else None
+                for total, entry, end in zip(totals, entries, ends)
+            ]
+        date_results.append(
+            {
+                "date": day.isoformat(),
+                "daily_costs": daily_costs,
+                "total_daily_cost": round(
+                    sum(value for value in daily_costs if value is not None), 2
+                ),
+            }
+        )
+
+    # 同一个日期在不同物品、目标值和请求中会重复出现，每个日期只格式化一次
+    if len(_iso_dates) > _ISO_DATES_LIMIT:
+        _iso_dates.clear()
+        _iso_dates[None] = None
+    from_ordinal = date.fromordinal
+    target_results = []
+    for target in targets:
+        # 日均价格不超过目标值需要的服役天数为 ceil(总价值 / 目标值)，且至少为 1 天；
+        # 退役之前无法达到目标的物品为 None
+        reached = [
+            ordinal
+            if (
+                ordinal := entry
+                + (needed if (needed := math.ceil(total / target - _EPSILON)) > 0 else 1)
+            )
+            <= end
+            else None
+            for total, entry, end in zip(totals, entries, ends)
+        ]
+        for ordinal in set(reached).difference(_iso_dates):
+            _iso_dates[ordinal] = from_ordinal(ordinal).isoformat()
+        target_results.append(
+            {
+                "target": target,
+                "dates": list(map(_iso_dates.__getitem__, reached)),
+                "reached": sum(
+                    1
+                    for ordinal in reached
+                    if ordinal is not None and ordinal <= today_ordinal
+                ),
+                "unreachable": reached.count(None),
+            }
+        )
+
+    return {
+        "ids": [store.ids[row] for row in rows],
+        "names": [store.names[row] for row in rows],
+        "dates": date_results,
+        "targets": target_results,
+        "skipped": skipped,
+    }
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # 性能测试：生成随机物品，测试多个日期和目标值的预测耗时（包含结果字典的构建）
+    for size in (1000, 10000, 100000):
+        items = []
+        for i in range(size):
+            properties: Dict[str, Any] = {
+                "物品名称": f"物品 {i}",
+                "购买价格": round(random.uniform(10, 10000), 2),
+                "入役日期": date.fromordinal(738000 + random.randint(0, 1000)).isoformat(),
+            }
+            if i % 5 == 0:
+                properties["附加价值"] = 50
+            if i % 7 == 0:
+                properties["退役日期"] = "2026-01-01"
+            items.append({"id": f"item-{i}", "archived": False, "properties": properties})
+        store = ItemStore(items)
+        dates = [date(2026, 1, 1), date(2027, 1, 1), date(2030, 1, 1)]
+        targets = [1.0, 0.5, 0.1]
+        rounds = 10
+        start = time.perf_counter()
+        for _ in range(rounds):
+            project(store, dates, targets)
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"{size} 个物品，{len(dates)} 个日期和 {len(targets)} 个目标：{elapsed * 1000:.1f} ms")
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.database import NotionItemTrackerClient
+from utils.logs import get_logger
+from utils.tools import RateLimiter
+
+logger = get_logger("relations")
+
+# 缓存数据库属性类型时使用的键前缀，与页面ID不会冲突
+_SCHEMA_KEY_PREFIX = "schema:"
+
+
+class RelationResolver:
+    """
+    关联（relation）属性的解析器：把物品中关联页面的ID解析为页面标题。
+    一次收集整个物品列表中的全部关联ID，关联到本数据库物品的直接使用物品名称，
+    其余页面在限流下并发读取；结果保存在带有效期的 LRU 缓存中，
+    同一页面在有效期内最多只会向 Notion 请求一次（并发请求同一ID时共享同一次读取）。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 2048,
+        ttl: int = 600,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_workers: int = 3,
+    ):
+        """
+        :param capacity: 缓存的最大页面数量。
+        :param ttl: 缓存有效期（秒），过期后重新读取以获取新的标题。
+        :param rate_limiter: 读取 Notion 时使用的限流器，默认每秒 3 个请求。
+        :param max_workers: 并发读取的线程数。
+        """
+        self.capacity = max(capacity, 1)
+        self.ttl = ttl
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        # 页面ID -> (过期时间, 解析结果)
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # 正在读取的页面ID -> Future
+        self._pending: Dict[str, Future] = {}
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的锁和读取状态。
+        """
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.rate_limiter = RateLimiter(self.rate_limiter.rate, self.rate_limiter.burst)
+
+    def apply_event(self, event: str, item: Dict[str, Any]) -> None:
+        """
+        物品被修改或归档后丢弃对应的缓存，下次解析时使用新的名称。
+        可直接作为 NotionItemTrackerClient 的监听者使用。
+        """
+        with self._lock:
+            self._cache.pop(item["id"], None)
+
+    def _get_locked(self, key: str) -> Tuple[bool, Any]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= time.time():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, entry[1]
+
+    def _put_locked(self, key: str, value: Any) -> None:
+        self._cache[key] = (time.time() + self.ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def relation_properties(self, client: NotionItemTrackerClient) -> Set[str]:
+        """
+        获取数据库中关联类型的属性名，数据库结构与页面标题一同缓存。
+        """
+        key = f"{_SCHEMA_KEY_PREFIX}{client.database_id}"
+        with self._lock:
+            hit, types = self._get_locked(key)
+        if not hit:
+            self.rate_limiter.acquire()
+            types = client.get_property_types()
+            with self._lock:
+                self._put_locked(key, types)
+        return {name for name, prop_type in types.items() if prop_type == "relation"}
+
+    def _fetch(self, client: NotionItemTrackerClient, page_id: str) -> Optional[str]:
+        self.rate_limiter.acquire()
+        return client.get_page_title(page_id)
+
+    def resolve(
+        self, client: NotionItemTrackerClient, page_ids: Iterable[str]
+    ) -> Dict[str, Optional[str]]:
+        """
+        解析一批页面的标题，只读取缓存中没有的页面。
+        :param client: Notion 客户端。
+        :param page_ids: 页面ID。
+        :return: 页面ID -> 标题，页面不存在或无权访问时为 None；读取失败的页面不在结果中。
+        """
+        result: Dict[str, Optional[str]] = {}
+        waiting: Dict[str, Future] = {}
+        missing: List[str] = []
+        with self._lock:
+            for page_id in set(page_ids):
+                hit, title = self._get_locked(page_id)
+                if hit:
+                    result[page_id] = title
+                elif page_id in self._pending:
+                    waiting[page_id] = self._pending[page_id]
+                else:
+                    future: Future = Future()
+                    self._pending[page_id] = future
+                    waiting[page_id] = future
+                    missing.append(page_id)
+
+        if missing:
+            logger.debug(
+                "正在读取关联页面",
+                extra={"fields": {"count": len(missing), "cached": len(result)}},
+            )
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                fetches = {
+                    page_id: executor.submit(self._fetch, client, page_id)
+                    for page_id in missing
+                }
+                for page_id, fetch in fetches.items():
+                    future = waiting[page_id]
+                    try:
+                        title = fetch.result()
+                    except Exception as e:
+                        logger.warning(
+                            "读取关联页面失败: %s", e, extra={"fields": {"page_id": page_id}}
+                        )
+                        with self._lock:
+                            self._pending.pop(page_id, None)
+                        future.set_exception(e)
+                        continue
+                    with self._lock:
+                        self._put_locked(page_id, title)
+                        self._pending.pop(page_id, None)
+                    future.set_result(title)
+
+        for page_id, future in waiting.items():
+            try:
+                result[page_id] = future.result()
+            except Exception:
+                # 读取失败的页面不缓存，下次请求时重试
+                pass
+        return result
+
+    def expand(
+        self, client: NotionItemTrackerClient, items: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        解析物品列表中所有关联属性引用的页面。
+        :param client: Notion 客户端。
+        :param items: 物品列表。
+        :return: 页面ID -> {"id": 页面ID, "title": 标题}，只包含能够解析的页面。
+        """
+        properties = self.relation_properties(client)
+        if not properties:
+            return {}
+
+        names = {
+            item["id"]: item.get("properties", {}).get("物品名称") for item in items
+        }
+        page_ids: Set[str] = set()
+        for item in items:
+            for prop_name in properties:
+                value = item.get("properties", {}).get(prop_name)
+                if isinstance(value, list):
+                    page_ids.update(page_id for page_id in value if isinstance(page_id, str))
+
+        related: Dict[str, Dict[str, Any]] = {}
+        # 关联到本数据库中物品的页面直接使用物品名称，不需要请求 Notion
+        for page_id in page_ids & names.keys():
+            related[page_id] = {"id": page_id, "title": names[page_id]}
+        titles = self.resolve(client, page_ids - names.keys())
+        for page_id, title in titles.items():
+            if title is not None:
+                related[page_id] = {"id": page_id, "title": title}
+        return related
+
+    def __len__(self) -> int:
+        return len(self._cache)
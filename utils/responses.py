@@ -0,0 +1,224 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from flask import Request, Response
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库的 C 编码器
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+# 小于该大小的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+# brotli 质量 5 的压缩率不低于 gzip，耗时接近；更高的质量压缩大列表需要数秒
+BROTLI_QUALITY = 5
+
+# 紧凑、不转义中文、不检查循环引用，比 Flask 默认的 sort_keys + ensure_ascii 快
+_json_encoder = json.JSONEncoder(
+    ensure_ascii=False, separators=(",", ":"), check_circular=False
+)
+
+
+def encode_json(data: Any) -> bytes:
+    """
+    将数据编码为 UTF-8 JSON，安装了 orjson 时使用 orjson。
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _json_encoder.encode(data).encode()
+
+
+def supported_encodings() -> tuple:
+    """
+    可以提供的压缩格式，按优先级排列。
+    """
+    return ("br", "gzip", "identity") if brotli is not None else ("gzip", "identity")
+
+
+class EncodedResponse:
+    """
+    一个已编码的 JSON 响应体，以及按需生成并保留的 gzip 和 brotli 压缩版本。
+    """
+
+    __slots__ = ("etag", "_bodies", "_lock")
+
+    def __init__(self, body: bytes):
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self._bodies: Dict[str, bytes] = {"identity": body}
+        self._lock = threading.Lock()
+
+    def body(self, encoding: str) -> bytes:
+        """
+        获取指定压缩格式的响应体，第一次请求某种格式时压缩并保留结果。
+        """
+        body = self._bodies.get(encoding)
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._bodies.get(encoding)
+            if body is None:
+                identity = self._bodies["identity"]
+                if encoding == "br":
+                    body = brotli.compress(identity, quality=BROTLI_QUALITY)
+                else:
+                    body = gzip.compress(identity, compresslevel=GZIP_LEVEL, mtime=0)
+                self._bodies[encoding] = body
+        return body
+
+    def respond(self, request: Request) -> Response:
+        """
+        按请求的 Accept-Encoding 选择压缩格式并生成响应，支持 If-None-Match 返回 304。
+        """
+        encoding = "identity"
+        if len(self._bodies["identity"]) >= MIN_COMPRESS_SIZE:
+            encoding = request.accept_encodings.best_match(
+                supported_encodings(), default="identity"
+            )
+        response = Response(self.body(encoding), mimetype="application/json")
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        # 不同压缩格式的响应体不同，ETag 也需要区分
+        response.set_etag(f"{self.etag}-{encoding}")
+        return response.make_conditional(request)
+
+    def size(self) -> int:
+        return sum(len(body) for body in self._bodies.values())
+
+
+class EncodedResponseCache:
+    """
+    已编码响应的进程内缓存。
+    键由调用方给出（例如物品缓存的版本号与查询参数），缓存命中时只需要查找并写出字节，
+    不再构建字典和序列化 JSON。按最近使用淘汰，最多保留 capacity 个响应。
+    """
+
+    def __init__(self, capacity: int = 16):
+        """
+        :param capacity: 最多保留的响应数量。
+        """
+        self.capacity = max(capacity, 1)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, EncodedResponse]" = OrderedDict()
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的锁。
+        """
+        self._lock = threading.Lock()
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        supersedes: Optional[Callable[[Hashable], bool]] = None,
+    ) -> EncodedResponse:
+        """
+        获取已编码的响应，不存在时调用 build 构建数据并编码。
+        同一个键可能被多个线程同时构建，结果相同，保留最后写入的一个。
+        :param key: 缓存键。
+        :param build: 返回响应数据（可 JSON 序列化）的函数。
+        :param supersedes: 构建了新的响应时，丢弃键满足该条件的旧响应（例如同一数据的旧版本）。
+        :return: EncodedResponse。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = EncodedResponse(encode_json(build()))
+        with self._lock:
+            if supersedes is not None:
+                for old in [old for old in self._entries if supersedes(old)]:
+                    del self._entries[old]
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from utils.store import ItemStore
+
+    # 性能测试：对比 Flask 默认方式（sort_keys + ensure_ascii）、标准库紧凑编码和 orjson 的编码耗时，
+    # 以及压缩的耗时和大小、缓存命中时的耗时
+    names = ["机械键盘", "无线鼠标", "显示器", "耳机", "充电宝", "笔记本电脑", "手机壳"]
+
+    def make_items(size: int):
+        items = []
+        for i in range(size):
+            properties: Dict[str, Any] = {
+                "物品名称": f"{random.choice(names)} {i}",
+                "购买价格": round(random.uniform(10, 10000), 2),
+                "入役日期": "2024-01-01",
+                "日均价格": f"{random.uniform(0.1, 50):.2f} 元",
+                "服役天数": f"{random.randint(1, 1000)} 天",
+                "备注": "日常使用" if i % 3 else "",
+            }
+            if i % 5 == 0:
+                properties["附加价值"] = 50
+            items.append(
+                {
+                    "id": f"{i:08x}-0000-0000-0000-000000000000",
+                    "archived": False,
+                    "last_edited_time": "2025-01-01T00:00:00.000Z",
+                    "properties": properties,
+                }
+            )
+        return items
+
+    def measure(label: str, func: Callable[[], Any], rounds: int) -> Any:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            result = func()
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"  {label}: {elapsed * 1000:.2f} ms")
+        return result
+
+    for size in (1000, 10000, 50000):
+        store = ItemStore(make_items(size))
+        rounds = 20 if size <= 10000 else 5
+        print(f"{size} 个物品：")
+        data = {"success": True, "items": store.to_items(), "message": "success"}
+        measure("构建字典 (ItemStore.to_items)", store.to_items, rounds)
+        measure(
+            "Flask 默认编码 (sort_keys, ensure_ascii)",
+            lambda: json.dumps(data, sort_keys=True, ensure_ascii=True).encode(),
+            rounds,
+        )
+        body = measure("标准库紧凑编码", lambda: _json_encoder.encode(data).encode(), rounds)
+        if orjson is not None:
+            body = measure("orjson", lambda: orjson.dumps(data), rounds)
+        entry = EncodedResponse(body)
+        measure("gzip", lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), rounds)
+        if brotli is not None:
+            measure("brotli", lambda: brotli.compress(body, quality=BROTLI_QUALITY), rounds)
+        sizes = ", ".join(
+            f"{encoding} {len(entry.body(encoding)) / 1024:.0f} KB"
+            for encoding in supported_encodings()
+        )
+        print(f"  大小：{sizes}")
+        cache = EncodedResponseCache()
+        cache.get_or_build("items", lambda: data)
+        measure(
+            "缓存命中",
+            lambda: cache.get_or_build("items", lambda: data).body("gzip"),
+            rounds * 100,
+        )
@@ -1,9 +1,54 @@
-from flask import blueprints, send_from_directory, current_app, request, jsonify
+from flask import (
+    Response,
+    blueprints,
+    current_app,
+    g,
+    jsonify,
+    request,
+    send_file,
+    send_from_directory,
+    stream_with_context,
+)
+from utils.breaker import OPEN, CircuitOpenError
 from utils.database import NotionItemTrackerClient
-from jwt import decode, encode, ExpiredSignatureError, InvalidTokenError
+from utils.history import COST_SCALE, ItemHistory, downsample
+from utils.idempotency import (
+    IDEMPOTENCY_KEY_HEADER,
+    IDEMPOTENCY_KEY_PATTERN,
+    IN_PROGRESS,
+    MISMATCH,
+    REPLAY,
+    IdempotencyStore,
+    request_fingerprint,
+)
+from utils.images import ItemImageProxy
+from utils.journal import WriteBehindQueue
+from utils.logs import get_logger, log_payload, request_id_var
+from utils.models import ProjectionRequest
+from utils.pool import DatabaseContext, NotionClientPool
+from jwt import ExpiredSignatureError, InvalidTokenError
+from pydantic import ValidationError
+from utils.profiler import ProfileStore, SamplingProfiler
+from utils.projections import project
+from utils.relations import RelationResolver
+from utils.responses import EncodedResponseCache
+from utils.search import ItemSearchIndex
 from utils.security import verify_password
+from utils.sessions import RevokedTokenError, SessionManager
+from utils.snapshot import SNAPSHOT_FILENAME, snapshot_exists
+from utils.store import ItemStore
+from utils.transfer import import_items_csv, iter_export_csv, iter_export_ndjson
 import os
+import httpx
 import json
+import re
+import time
+import uuid
+import math
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+logger = get_logger("routes")
 
 ADMIN_API_ROUTES = blueprints.Blueprint("admin_api_routes", __name__)
 PUBLIC_ROUTES = blueprints.Blueprint("user_routes", __name__)
@@ -14,6 +59,286 @@ PUBLIC_ROUTES.add_url_rule(
 )
 
 
+ITEMS_CACHE_KEY = "items"
+
+
+def get_database() -> Optional[DatabaseContext]:
+    """
+    获取当前请求选择的数据库（通过 /databases/<database_key>/ 前缀访问时），使用默认数据库时返回 None。
+    """
+    return g.get("database")
+
+
+def items_cache_key() -> str:
+    """
+    当前数据库的物品缓存键，每个数据库的缓存相互独立。
+    """
+    database = get_database()
+    return ITEMS_CACHE_KEY if database is None else f"{ITEMS_CACHE_KEY}:{database.key}"
+
+
+@ADMIN_API_ROUTES.url_value_preprocessor
+@PUBLIC_API_ROUTES.url_value_preprocessor
+def pop_database_key(endpoint, values):
+    if values and "database_key" in values:
+        g.database_key = values.pop("database_key")
+
+
+def get_client() -> NotionItemTrackerClient:
+    """
+    获取当前应用的 NotionItemTrackerClient 实例，选择了其他数据库时返回该数据库的客户端。
+    """
+    database = get_database()
+    if database is not None:
+        return database.client
+    # 云函数兼容性处理：应用上没有挂载客户端时按环境变量创建
+    try:
+        return current_app.client
+    except AttributeError:
+        return NotionItemTrackerClient(
+            os.environ.get("NOTION_TOKEN", ""), os.environ.get("NOTION_DATABASE_ID", "")
+        )
+
+
+def is_public_view_enabled() -> bool:
+    """
+    是否允许未登录用户查看物品列表。
+    """
+    # 云函数兼容性处理：获取 ENABLE_PUBLIC_VIEW 配置
+    try:
+        return current_app.config["ENABLE_PUBLIC_VIEW"]
+    except (AttributeError, KeyError):
+        return (
+            True
+            if str(os.environ.get("ENABLE_PUBLIC_VIEW", "true")).lower()
+            not in ["false", "0"]
+            else False
+        )
+
+
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """
+    获取延迟写入队列，未开启延迟写入模式或选择了其他数据库时返回 None（直接写入 Notion）。
+    """
+    if get_database() is not None:
+        return None
+    return getattr(current_app, "write_queue", None)
+
+
+def read_last_known_good(
+    client: NotionItemTrackerClient, error: Optional[Exception] = None
+) -> Optional[ItemStore]:
+    """
+    Notion 不可用时读取缓存文件中最近一次成功加载的物品列表，并在 g.items_stale 中记录数据的陈旧程度。
+    :param client: 当前数据库的客户端。
+    :param error: 读取 Notion 时发生的错误，为 None 表示熔断器已打开、没有请求 Notion。
+    :return: ItemStore，从未成功加载过时返回 None。
+    """
+    cache = getattr(current_app, "item_cache", None)
+    result = cache.last_known_good(items_cache_key()) if cache is not None else None
+    if result is None:
+        return None
+    store, loaded_at = result
+    g.items_stale = {
+        "loaded_at": datetime.fromtimestamp(loaded_at, timezone.utc).isoformat(),
+        "age": int(time.time() - loaded_at),
+        "reason": (
+            "circuit_open"
+            if error is None or isinstance(error, CircuitOpenError)
+            else "notion_error"
+        ),
+    }
+    if error is not None:
+        logger.warning("读取 Notion 失败，返回最近一次成功加载的数据: %s", error)
+    return store
+
+
+def load_item_store(
+    client: NotionItemTrackerClient, load: Callable[[], ItemStore]
+) -> ItemStore:
+    """
+    调用 load 读取物品列表，Notion 不可用时降级为最近一次成功加载的数据。
+    熔断器打开时不等待缓存的加载锁，直接返回降级数据。
+    :raises Exception: 读取失败且没有可用的降级数据。
+    """
+    breaker = getattr(client, "breaker", None)
+    if breaker is not None and breaker.state == OPEN:
+        cache = getattr(current_app, "item_cache", None)
+        store = cache.get_store(items_cache_key()) if cache is not None else None
+        if store is None:
+            store = read_last_known_good(client)
+        if store is not None:
+            return store
+    try:
+        return load()
+    except Exception as e:
+        store = read_last_known_good(client, e)
+        if store is None:
+            raise
+        return store
+
+
+def stale_fields() -> Dict[str, Any]:
+    """
+    本次请求返回了降级数据时，响应中附加的 stale 字段。
+    """
+    stale = g.get("items_stale")
+    return {"stale": stale} if stale else {}
+
+
+def circuit_open_response(message: str, error: CircuitOpenError):
+    """
+    熔断器打开时写操作的响应：返回 503，并通过 Retry-After 告诉客户端多久后可以重试。
+    """
+    response = jsonify({"success": False, "message": message, "error": str(error)})
+    response.headers["Retry-After"] = str(max(math.ceil(error.retry_after), 1))
+    return response, 503
+
+
+def read_items_cached(client: NotionItemTrackerClient) -> List[Dict[str, Any]]:
+    """
+    通过共享物品缓存读取物品列表（包含公式和 Rollup 属性），未配置缓存时直接读取 Notion。
+    开启延迟写入模式时，尚未写入 Notion 的修改会叠加到结果上。
+    Notion 不可用时返回最近一次成功加载的数据，见 load_item_store。
+    """
+    cache = getattr(current_app, "item_cache", None)
+    if cache is None:
+        items = client.read_items(include_formula_and_rollup=True)
+    else:
+        items = load_item_store(
+            client,
+            lambda: cache.get_or_load_store(
+                items_cache_key(),
+                lambda: client.read_items(include_formula_and_rollup=True),
+            ),
+        ).to_items()
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        items = write_queue.overlay(items)
+    return items
+
+
+def read_item_store_cached(client: NotionItemTrackerClient) -> ItemStore:
+    """
+    通过共享物品缓存读取物品列表，返回 ItemStore 而不转换为字典。
+    不包含延迟写入队列中尚未写入 Notion 的修改。Notion 不可用时返回最近一次成功加载的数据。
+    """
+    cache = getattr(current_app, "item_cache", None)
+
+    def loader() -> List[Dict[str, Any]]:
+        return client.read_items(include_formula_and_rollup=True)
+
+    if cache is None:
+        return ItemStore(loader())
+    return load_item_store(
+        client, lambda: cache.get_or_load_store(items_cache_key(), loader)
+    )
+
+
+def get_cached_item(
+    item_id: str, max_age: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    从未过期的物品缓存中读取单个物品，叠加延迟写入队列中尚未写入的修改。
+    缓存不存在或已过期时返回 None，不会请求 Notion。
+    :param item_id: 物品 ID。
+    :param max_age: 缓存数据距离从 Notion 加载的最长时间（秒），超过时返回 None。
+    """
+    cache = getattr(current_app, "item_cache", None)
+    if cache is None:
+        return None
+    key = items_cache_key()
+    if max_age is not None:
+        loaded_at = cache.loaded_at(key)
+        if loaded_at is None or time.time() - loaded_at > max_age:
+            return None
+    store = cache.get_store(key)
+    item = store.get(item_id) if store is not None else None
+    write_queue = get_write_queue()
+    if item is not None and write_queue is not None:
+        item = next(iter(write_queue.overlay([item])), None)
+    return item
+
+
+def expand_requested(name: str) -> bool:
+    """
+    判断请求的 expand 查询参数（逗号分隔）是否包含指定项。
+    """
+    return name in request.args.get("expand", "").split(",")
+
+
+def expand_relations(
+    client: NotionItemTrackerClient, response: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    请求带有 expand=relations 时，在响应中加入 related：物品关联属性引用的页面ID -> {id, title}。
+    解析失败时不影响物品列表的返回。
+    """
+    resolver: Optional[RelationResolver] = getattr(current_app, "relation_resolver", None)
+    if resolver is None or not expand_requested("relations"):
+        return response
+    try:
+        response["related"] = resolver.expand(client, response["items"])
+    except Exception as e:
+        logger.warning("解析关联属性失败: %s", e)
+        response["related"] = {}
+    return response
+
+
+def notify_items_changed() -> None:
+    """
+    物品数据被修改后调用：使共享缓存失效，并在后台刷新静态快照。
+    """
+    cache = getattr(current_app, "item_cache", None)
+    if cache is not None:
+        cache.invalidate(items_cache_key())
+    # 静态快照只包含默认数据库
+    refresher = getattr(current_app, "snapshot_refresher", None)
+    if refresher is not None and get_database() is None:
+        refresher.request_refresh()
+
+
+def get_secret_key() -> str:
+    """
+    获取签名密钥，未配置时返回空字符串。
+    """
+    # 云函数兼容性处理
+    try:
+        return current_app.config["SECRET_KEY"]
+    except AttributeError:
+        return os.environ.get("SECRET_KEY", "")
+
+
+# 云函数环境中应用上没有挂载会话管理器，按密钥创建，撤销列表只在进程内生效
+_fallback_sessions: Dict[str, SessionManager] = {}
+
+
+def get_sessions(secret_key: str) -> SessionManager:
+    """
+    获取使用该密钥的会话管理器。
+    """
+    sessions: Optional[SessionManager] = getattr(current_app, "sessions", None)
+    if sessions is not None and sessions.secret_key == secret_key:
+        return sessions
+    sessions = _fallback_sessions.get(secret_key)
+    if sessions is None:
+        sessions = _fallback_sessions.setdefault(secret_key, SessionManager(secret_key))
+    return sessions
+
+
+def set_session_cookie(response, token: str, expires_at: int) -> None:
+    """
+    写入会话 Cookie，Cookie 与令牌同时过期。
+    """
+    response.set_cookie(
+        "token",
+        token,
+        max_age=max(expires_at - int(time.time()), 0),
+        httponly=True,
+        secure=True,
+    )
+
+
 @ADMIN_API_ROUTES.before_request
 def check_admin_access(is_request: bool = True):
     cookie = request.cookies
@@ -24,12 +349,7 @@ def check_admin_access(is_request: bool = True):
         else:
             return False
 
-    # 云函数兼容性处理
-    try:
-        secret_key = current_app.config["SECRET_KEY"]
-    except AttributeError:
-        secret_key = os.environ.get("SECRET_KEY", "")
-
+    secret_key = get_secret_key()
     if not secret_key:
         if is_request:
             return (
@@ -45,11 +365,8 @@ def check_admin_access(is_request: bool = True):
             return False
 
     try:
-        payload = decode(
-            token,
-            secret_key,  # 使用获取到的secret_key
-            algorithms=["HS256"],
-        )
+        # 已验证过的令牌直接从缓存返回，不再重复验证签名
+        g.admin_session = get_sessions(secret_key).verify(token)
         if not is_request:
             return True
     except ExpiredSignatureError:
@@ -59,6 +376,13 @@ def check_admin_access(is_request: bool = True):
             return response, 401
         else:
             return False
+    except RevokedTokenError:
+        if is_request:
+            response = jsonify({"success": False, "message": "Session revoked"})
+            response.delete_cookie("token")
+            return response, 401
+        else:
+            return False
     except InvalidTokenError:
         if is_request:
             response = jsonify({"success": False, "message": "Invalid token"})
@@ -80,6 +404,52 @@ def check_admin_access(is_request: bool = True):
             return False
 
 
+@ADMIN_API_ROUTES.after_app_request
+def refresh_session(response):
+    """
+    滑动过期：已登录的请求成功完成且令牌剩余有效期不足一半时，签发属于同一会话的新令牌。
+    旧令牌在过期前仍然有效，避免并发请求因 Cookie 更换而失败；注销时按会话撤销，旧令牌同时失效。
+    """
+    payload = g.pop("admin_session", None)
+    if payload is None or response.status_code >= 400:
+        return response
+    # 登录、注销等已经写入了 Cookie
+    if any(
+        cookie.startswith("token=") for cookie in response.headers.getlist("Set-Cookie")
+    ):
+        return response
+    sessions = get_sessions(get_secret_key())
+    if sessions.needs_refresh(payload):
+        token, expires_at = sessions.issue(payload["username"], payload["sid"])
+        set_session_cookie(response, token, expires_at)
+    return response
+
+
+@ADMIN_API_ROUTES.before_request
+@PUBLIC_API_ROUTES.before_request
+def select_database():
+    """
+    通过 /databases/<database_key>/ 前缀访问时，从客户端池中取出对应数据库的资源。
+    """
+    key = g.get("database_key")
+    if key is None:
+        return None
+    pool: Optional[NotionClientPool] = getattr(current_app, "client_pool", None)
+    if pool is None:
+        return jsonify({"success": False, "message": "Database not found"}), 404
+    try:
+        g.database = pool.get(key)
+    except KeyError:
+        return jsonify({"success": False, "message": "Database not found"}), 404
+    except Exception as e:
+        logger.error("创建数据库客户端失败: %s", e, extra={"fields": {"database": key}})
+        return (
+            jsonify({"success": False, "message": "Database is not available"}),
+            502,
+        )
+    return None
+
+
 @PUBLIC_ROUTES.route("/static/<path:filename>")
 def static_files(filename):
     """
@@ -92,8 +462,24 @@ def static_files(filename):
 def health_check():
     """
     健康检查接口，返回服务状态。
+    配置了熔断器时附带 Notion 的熔断状态，熔断器打开时物品列表返回的是降级数据。
     """
-    return {"status": "ok"}, 200
+    breaker = getattr(current_app, "notion_breaker", None)
+    if breaker is None:
+        return {"status": "ok"}, 200
+    return {"status": "ok", "notion": breaker.status()}, 200
+
+
+@PUBLIC_API_ROUTES.route("/databases", methods=["GET"])
+def list_databases():
+    """
+    列出可以通过 /api/public/databases/<database_key>/ 访问的数据库键。
+    """
+    if get_database() is not None:
+        return jsonify({"success": False, "message": "Not found"}), 404
+    pool: Optional[NotionClientPool] = getattr(current_app, "client_pool", None)
+    keys = pool.keys() if pool is not None else []
+    return jsonify({"success": True, "databases": keys})
 
 
 @PUBLIC_API_ROUTES.route("/items", methods=["GET"])
@@ -101,25 +487,28 @@ def get_items():
     """
     获取网站所有者的所有好物的接口
     """
-    # 云函数兼容性处理：获取 NotionItemTrackerClient 实例
-    try:
-        client: NotionItemTrackerClient = current_app.client
-    except AttributeError:
-        client = NotionItemTrackerClient(
-            os.environ.get("NOTION_TOKEN", ""), os.environ.get("NOTION_DATABASE_ID", "")
-        )
+    enable_public_view = is_public_view_enabled()
 
-    # 云函数兼容性处理：获取 ENABLE_PUBLIC_VIEW 配置
-    enable_public_view = False
-    try:
-        enable_public_view = current_app.config["ENABLE_PUBLIC_VIEW"]
-    except AttributeError:
-        enable_public_view = (
-            True
-            if str(os.environ.get("ENABLE_PUBLIC_VIEW", "true")).lower()
-            not in ["false", "0"]
-            else False
+    # 静态快照模式：公开展示时直接返回快照文件，不请求 Notion
+    # 延迟写入队列中还有未写入的修改时，快照尚未包含这些修改，改为读取缓存
+    snapshot_dir = current_app.config.get(
+        "STATIC_SNAPSHOT_DIR", os.environ.get("STATIC_SNAPSHOT_DIR", "")
+    )
+    write_queue = get_write_queue()
+    if (
+        enable_public_view
+        and get_database() is None
+        and snapshot_dir
+        and snapshot_exists(snapshot_dir)
+        and not (write_queue is not None and write_queue.has_pending())
+    ):
+        response = send_from_directory(
+            os.path.abspath(snapshot_dir), SNAPSHOT_FILENAME, max_age=0
         )
+        response.headers["X-WorthIt-Snapshot"] = "1"
+        return response
+
+    client = get_client()
 
     if not enable_public_view:
         if not check_admin_access(is_request=False):
@@ -127,11 +516,532 @@ def get_items():
                 "success": False,
                 "message": "本好物页面未公开展示，你需要登录来进行查看！",
             }, 403
-        items = client.read_items(include_formula_and_rollup=True)
-        return {"success": True, "items": items, "message": "success"}, 200
+    started = time.time()
+
+    # 物品列表没有变化时直接返回已编码（及压缩）的响应体，不再构建字典和序列化 JSON；
+    # 延迟写入队列中有未写入的修改或返回降级数据时，响应随请求变化，不使用已编码的响应
+    encoded: Optional[EncodedResponseCache] = getattr(
+        current_app, "encoded_responses", None
+    )
+    cache = getattr(current_app, "item_cache", None)
+    if (
+        encoded is not None
+        and cache is not None
+        and cache.ttl > 0
+        and not (write_queue is not None and write_queue.has_pending())
+    ):
+        store = read_item_store_cached(client)
+        cache_key = items_cache_key()
+        # 降级数据需要带上 stale 字段，不使用已编码的响应
+        generation = (
+            None if g.get("items_stale") else cache.generation_of(cache_key, store)
+        )
+        if generation is not None:
+            expand = expand_requested("relations")
+            entry = encoded.get_or_build(
+                ("items", cache_key, generation, expand),
+                lambda: expand_relations(
+                    client,
+                    {
+                        "success": True,
+                        "items": store.to_items(),
+                        "watermark": items_watermark(started),
+                        "message": "success",
+                    },
+                ),
+                supersedes=lambda key: key[:2] == ("items", cache_key)
+                and key[2] != generation,
+            )
+            return entry.respond(request)
+        # 已经读取过物品列表（可能是降级数据），直接使用，不再重新读取 Notion
+        items = store.to_items()
     else:
-        items = client.read_items(include_formula_and_rollup=True)
-        return {"success": True, "items": items, "message": "success"}, 200
+        items = read_items_cached(client)
+    return expand_relations(
+        client,
+        {
+            "success": True,
+            "items": items,
+            "watermark": items_watermark(started),
+            "message": "success",
+            **stale_fields(),
+        },
+    ), 200
+
+
+# 请求 ID：优先使用反向代理传入的 X-Request-ID，否则生成一个，并在响应头中返回
+REQUEST_ID_HEADER = "X-Request-ID"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+@ADMIN_API_ROUTES.before_app_request
+def assign_request_id():
+    """
+    为每个请求分配请求 ID，请求处理期间的日志都会带上这个 ID。
+    """
+    request_id = request.headers.get(REQUEST_ID_HEADER, "")
+    if not REQUEST_ID_PATTERN.match(request_id):
+        request_id = uuid.uuid4().hex[:16]
+    g.request_id = request_id
+    g.request_id_token = request_id_var.set(request_id)
+
+
+@ADMIN_API_ROUTES.after_app_request
+def add_request_id_header(response):
+    request_id = g.get("request_id")
+    if request_id:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
+@ADMIN_API_ROUTES.teardown_app_request
+def reset_request_id(exception=None):
+    token = g.pop("request_id_token", None)
+    if token is not None:
+        request_id_var.reset(token)
+
+
+# 管理员通过请求头或查询参数开启单个请求的性能分析
+PROFILE_HEADER = "X-WorthIt-Profile"
+PROFILE_QUERY_PARAM = "__profile"
+
+
+def get_profile_store() -> Optional[ProfileStore]:
+    """
+    获取性能分析结果存储，未配置时返回 None。
+    """
+    return getattr(current_app, "profile_store", None)
+
+
+@ADMIN_API_ROUTES.before_app_request
+def start_request_profile():
+    """
+    请求头 X-WorthIt-Profile: 1 或查询参数 __profile=1 且为管理员时，对本次请求进行采样分析。
+    未开启时只检查请求头和查询参数，不会启动分析器。
+    """
+    if (
+        request.headers.get(PROFILE_HEADER) != "1"
+        and request.args.get(PROFILE_QUERY_PARAM) != "1"
+    ):
+        return None
+    if get_profile_store() is None or not check_admin_access(is_request=False):
+        return None
+    profiler = SamplingProfiler(current_app.config.get("PROFILE_INTERVAL", 0.001))
+    profiler.start()
+    g.profiler = profiler
+    return None
+
+
+@ADMIN_API_ROUTES.after_app_request
+def finish_request_profile(response):
+    """
+    结束采样并保存分析结果，结果 ID 通过响应头 X-WorthIt-Profile-Id 返回。
+    流式响应只包含生成响应对象之前的部分。
+    """
+    profiler: Optional[SamplingProfiler] = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.stop()
+    try:
+        profile_id = get_profile_store().save(
+            {
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **profiler.result(),
+            }
+        )
+        response.headers["X-WorthIt-Profile-Id"] = profile_id
+    except OSError as e:
+        logger.error("保存性能分析结果时发生错误: %s", e)
+    return response
+
+
+@ADMIN_API_ROUTES.teardown_app_request
+def stop_request_profile(exception=None):
+    """
+    请求异常结束、没有执行 after_request 时停止采样线程。
+    """
+    profiler: Optional[SamplingProfiler] = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.stop()
+
+
+@ADMIN_API_ROUTES.after_request
+def after_admin_write(response):
+    """
+    管理员增删改成功后，使物品缓存失效并在后台刷新静态快照。
+    """
+    if (
+        request.method in ("POST", "PATCH", "DELETE")
+        and response.status_code == 200
+        and not response.headers.get("Idempotent-Replayed")
+    ):
+        data = response.get_json(silent=True) or {}
+        # 没有写入任何属性的修改不需要刷新
+        if data.get("success") and data.get("written_properties") != []:
+            notify_items_changed()
+    return response
+
+
+def items_watermark(started: float) -> str:
+    """
+    计算物品列表的增量同步水位线，客户端可将其作为 /api/public/items/changes 的 since。
+    启用缓存时以缓存加载的时间作为水位线，缓存加载之后的修改会在下一次同步时返回。
+    :param started: 开始读取物品列表的时间（Unix 时间戳），未启用缓存时使用。
+    :return: ISO 8601 格式的时间字符串。
+    """
+    cache = getattr(current_app, "item_cache", None)
+    if cache is not None and cache.ttl > 0:
+        started = cache.loaded_at(items_cache_key()) or started
+    return datetime.fromtimestamp(started, timezone.utc).isoformat()
+
+
+@PUBLIC_API_ROUTES.route("/items/changes", methods=["GET"])
+def get_item_changes():
+    """
+    增量同步接口：返回指定时间之后新增、修改或归档的物品。
+    客户端应把响应中的 watermark 作为下一次请求的 since。
+    如果缓存无法覆盖 since 之后的全部变化，返回完整列表并设置 full 为 true。
+    未启用缓存时直接使用 Notion 的过滤查询，此时无法检测到被归档的物品。
+    """
+    if not is_public_view_enabled() and not check_admin_access(is_request=False):
+        return {
+            "success": False,
+            "message": "本好物页面未公开展示，你需要登录来进行查看！",
+        }, 403
+
+    try:
+        # 未编码的 "+" 在查询参数中会被解码为空格
+        since = datetime.fromisoformat(request.args.get("since", "").replace(" ", "+"))
+    except ValueError:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": "Parameter 'since' must be an ISO 8601 timestamp.",
+                }
+            ),
+            400,
+        )
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Notion 的 last_edited_time 只精确到分钟，向前多取一分钟，重复返回的物品由客户端覆盖即可
+    threshold = since - timedelta(minutes=1)
+
+    client = get_client()
+    cache = getattr(current_app, "item_cache", None)
+    if cache is None or cache.ttl <= 0:
+        watermark = datetime.now(timezone.utc)
+        items = client.read_items_edited_since(
+            threshold, include_formula_and_rollup=True
+        )
+        return expand_relations(
+            client,
+            {
+                "success": True,
+                "full": False,
+                "items": items,
+                "archived": [],
+                "watermark": watermark.isoformat(),
+                "message": "success",
+            },
+        ), 200
+
+    items = read_items_cached(client)
+    watermark = datetime.fromisoformat(items_watermark(time.time()))
+    archived = cache.tombstones(items_cache_key(), since.timestamp())
+    if archived is None:
+        return expand_relations(
+            client,
+            {
+                "success": True,
+                "full": True,
+                "items": items,
+                "archived": [],
+                "watermark": watermark.isoformat(),
+                "message": "success",
+                **stale_fields(),
+            },
+        ), 200
+
+    write_queue = get_write_queue()
+    if write_queue is not None:
+        # 尚未写入 Notion 的删除操作也视为已归档
+        archived += [
+            operation["page_id"]
+            for operation in write_queue.pending_operations()
+            if operation["op"] == "delete"
+        ]
+
+    changed = [
+        item
+        for item in items
+        if item.get("pending")
+        or not item.get("last_edited_time")
+        or datetime.fromisoformat(item["last_edited_time"]) >= threshold
+    ]
+    return expand_relations(
+        client,
+        {
+            "success": True,
+            "full": False,
+            "items": changed,
+            "archived": archived,
+            "watermark": watermark.isoformat(),
+            "message": "success",
+            **stale_fields(),
+        },
+    ), 200
+
+
+@PUBLIC_API_ROUTES.route("/search", methods=["GET"])
+def search_items():
+    """
+    搜索物品名称和备注，返回按相关度排序的物品。
+    """
+    if not is_public_view_enabled() and not check_admin_access(is_request=False):
+        return {
+            "success": False,
+            "message": "本好物页面未公开展示，你需要登录来进行查看！",
+        }, 403
+
+    query = request.args.get("q", "").strip()
+    if not query:
+        return (
+            jsonify({"success": False, "message": "Parameter 'q' is required."}),
+            400,
+        )
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except ValueError:
+        limit = 20
+
+    database = get_database()
+    index: ItemSearchIndex = (
+        database.search_index if database is not None else current_app.search_index
+    )
+    client = get_client()
+    cache = getattr(current_app, "item_cache", None)
+    if cache is not None and cache.ttl > 0:
+        # 缓存过期或被写操作置为失效时会重新加载，加载时间变化后索引与新数据同步
+        store = read_item_store_cached(client)
+        version = cache.loaded_at(items_cache_key())
+        if not index.is_current(version):
+            index.sync(store, version)
+    elif not index.is_current(None):
+        index.sync(read_item_store_cached(client))
+
+    total, results = index.search(query, limit)
+    return {
+        "success": True,
+        "query": query,
+        "total": total,
+        "items": [{**item, "score": round(score, 4)} for score, item in results],
+        "message": "success",
+    }, 200
+
+
+@PUBLIC_API_ROUTES.route("/projections", methods=["POST"])
+def create_projections():
+    """
+    预测物品在未来日期的日均价格，以及日均价格降到目标值的日期。
+    请求体：{"dates": ["YYYY-MM-DD", ...], "targets": [1.0, ...], "ids": [...]}，
+    dates 和 targets 至少填写一项，ids 可选。结果按列返回，数组与 ids 一一对应。
+    """
+    if not is_public_view_enabled() and not check_admin_access(is_request=False):
+        return {
+            "success": False,
+            "message": "本好物页面未公开展示，你需要登录来进行查看！",
+        }, 403
+
+    try:
+        body = ProjectionRequest.model_validate(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": "Invalid projection request.",
+                    "error": "; ".join(
+                        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                        if error["loc"]
+                        else error["msg"]
+                        for error in e.errors()
+                    ),
+                }
+            ),
+            400,
+        )
+
+    client = get_client()
+    write_queue = get_write_queue()
+    if write_queue is not None and write_queue.has_pending():
+        # 尚未写入 Notion 的修改只存在于叠加后的物品列表中
+        store = ItemStore(read_items_cached(client))
+    else:
+        store = read_item_store_cached(client)
+
+    result = project(store, body.dates, body.targets, body.ids)
+    return {"success": True, **result, "message": "success"}, 200
+
+
+ITEM_ID_PATTERN = re.compile(r"^[0-9a-fA-F]{8}-?(?:[0-9a-fA-F]{4}-?){3}[0-9a-fA-F]{12}$")
+
+
+@PUBLIC_API_ROUTES.route("/items/<item_id>/image", methods=["GET"])
+def get_item_image(item_id: str):
+    """
+    获取物品图片的缩略图。
+    查询参数 w 为期望的宽度，v 为物品的 last_edited_time；v 与服务端物品列表中的版本一致时响应可被浏览器长期缓存，
+    物品修改后 v 变化，浏览器会请求新的地址。
+    只处理物品列表中存在的物品，是否重新读取页面由服务端的版本决定，不受请求参数影响。
+    """
+    public = is_public_view_enabled()
+    if not public and not check_admin_access(is_request=False):
+        return {
+            "success": False,
+            "message": "本好物页面未公开展示，你需要登录来进行查看！",
+        }, 403
+
+    proxy: Optional[ItemImageProxy] = getattr(current_app, "image_proxy", None)
+    if proxy is None:
+        return {"success": False, "message": "Item image proxy is disabled."}, 404
+    if not ITEM_ID_PATTERN.match(item_id):
+        return {"success": False, "message": "Item not found"}, 404
+    try:
+        width = int(request.args.get("w", 480))
+    except ValueError:
+        width = 480
+    client = get_client()
+    try:
+        item = read_item_store_cached(client).get(item_id)
+    except Exception as e:
+        logger.warning("读取物品列表失败: %s", e, extra={"fields": {"item_id": item_id}})
+        return {"success": False, "message": "Failed to load item image."}, 502
+    if item is None:
+        return {"success": False, "message": "Item not found"}, 404
+    version = item.get("last_edited_time")
+    # 客户端的版本与当前版本一致时，该地址的内容不会再变化
+    immutable = version is not None and request.args.get("v") == version
+
+    try:
+        result = proxy.thumbnail(client, item_id, width, version)
+    except Exception as e:
+        logger.warning(
+            "获取物品图片失败: %s", e, extra={"fields": {"item_id": item_id}}
+        )
+        return {
+            "success": False,
+            "message": "Failed to load item image.",
+            "error": str(e),
+        }, 502
+    if result is None:
+        return {"success": False, "message": "Item has no image."}, 404
+
+    path, mimetype, etag = result
+    response = send_file(path, mimetype=mimetype, etag=etag, conditional=True)
+    # 版本与当前一致的地址内容不会变化，可以长期缓存；否则缓存一小时，之后通过 ETag 重新验证
+    response.headers["Cache-Control"] = (
+        f"{'public' if public else 'private'}, "
+        + ("max-age=31536000, immutable" if immutable else "max-age=3600")
+    )
+    return response
+
+
+@PUBLIC_API_ROUTES.route("/items/<item_id>/history", methods=["GET"])
+def get_item_history(item_id: str):
+    """
+    获取物品每天的服役天数和日均价格。
+    查询参数 from、to 为日期范围（YYYY-MM-DD，包含两端），step 为降采样的间隔（天），
+    points 为最多返回的点数（按时间范围自动增大 step）。
+    结果按列返回，每个点的值一直有效到下一个点为止。
+    """
+    if not is_public_view_enabled() and not check_admin_access(is_request=False):
+        return {
+            "success": False,
+            "message": "本好物页面未公开展示，你需要登录来进行查看！",
+        }, 403
+
+    history: Optional[ItemHistory] = getattr(current_app, "item_history", None)
+    # 历史记录只包含默认数据库
+    if history is None or get_database() is not None:
+        return {"success": False, "message": "Item history is disabled."}, 404
+    if not ITEM_ID_PATTERN.match(item_id):
+        return {"success": False, "message": "Item not found"}, 404
+
+    try:
+        start = date.fromisoformat(request.args["from"]) if "from" in request.args else None
+        end = date.fromisoformat(request.args["to"]) if "to" in request.args else None
+        step = int(request.args.get("step", 1))
+        max_points = int(request.args["points"]) if "points" in request.args else None
+    except ValueError:
+        return {
+            "success": False,
+            "message": "Invalid parameters: from/to must be YYYY-MM-DD, step/points must be integers.",
+        }, 400
+    if step < 1 or (max_points is not None and max_points < 1):
+        return {"success": False, "message": "step and points must be positive."}, 400
+    if start is not None and end is not None and start > end:
+        return {"success": False, "message": "from must not be later than to."}, 400
+
+    points = history.query(item_id, start, end)
+    if max_points is not None and len(points) > max_points:
+        span = points[-1][0] - points[0][0] + 1
+        step = max(step, math.ceil(span / max_points))
+    points = downsample(points, step)
+    return jsonify(
+        {
+            "success": True,
+            "id": item_id,
+            "step": step,
+            "dates": [date.fromordinal(point[0]).isoformat() for point in points],
+            "service_days": [point[1] for point in points],
+            "daily_costs": [point[2] / COST_SCALE for point in points],
+        }
+    )
+
+
+# 订阅连接已满时建议客户端重试的间隔（秒）
+STREAM_RETRY_AFTER = 60
+
+
+@PUBLIC_API_ROUTES.route("/items/stream", methods=["GET"])
+def stream_item_events():
+    """
+    Server-Sent Events 接口：实时推送物品的新增（create）、修改（update）和归档（archive）事件。
+    """
+    if not is_public_view_enabled() and not check_admin_access(is_request=False):
+        return {
+            "success": False,
+            "message": "本好物页面未公开展示，你需要登录来进行查看！",
+        }, 403
+
+    # 实时推送只支持默认数据库
+    broadcaster = (
+        getattr(current_app, "item_events", None) if get_database() is None else None
+    )
+    if broadcaster is None:
+        return {"success": False, "message": "Item event stream is disabled."}, 404
+
+    # 每个连接在整个订阅期间占用一个线程，超过上限时拒绝，保证其他请求仍有线程可用
+    if not broadcaster.reserve():
+        return (
+            {"success": False, "message": "Too many item event subscribers."},
+            503,
+            {"Retry-After": str(STREAM_RETRY_AFTER)},
+        )
+    response = Response(
+        broadcaster.stream(request.headers.get("Last-Event-ID", type=int)),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # 关闭 Nginx 等反向代理的响应缓冲，保证事件及时送达
+            "X-Accel-Buffering": "no",
+        },
+    )
+    response.call_on_close(broadcaster.release)
+    return response
 
 
 @PUBLIC_API_ROUTES.route("/login", methods=["POST"])
@@ -150,18 +1060,16 @@ def login():
             400,
         )
 
-    # 云函数兼容性处理：获取 WORTHIT_USERNAME, WORTHIT_PASSWORD, SECRET_KEY
+    # 云函数兼容性处理：获取 WORTHIT_USERNAME, WORTHIT_PASSWORD
     app_username = None
     app_password_hash = None
-    secret_key = None
     try:
         app_username = current_app.config["WORTHIT_USERNAME"]
         app_password_hash = current_app.config["WORTHIT_PASSWORD"]
-        secret_key = current_app.config["SECRET_KEY"]
     except AttributeError:
         app_username = os.environ.get("WORTHIT_USERNAME")
         app_password_hash = os.environ.get("WORTHIT_PASSWORD")
-        secret_key = os.environ.get("SECRET_KEY", "")
+    secret_key = get_secret_key()
 
     if not app_username or not app_password_hash or not secret_key:
         return (
@@ -177,13 +1085,9 @@ def login():
     if username == app_username:
         if verify_password(password, app_password_hash):
             try:
-                token = encode(
-                    {"username": username},
-                    secret_key,  # 使用获取到的secret_key
-                    algorithm="HS256",
-                )
+                token, expires_at = get_sessions(secret_key).issue(username)
                 response = jsonify({"success": True, "message": "Login successful"})
-                response.set_cookie("token", token, httponly=True, secure=True)
+                set_session_cookie(response, token, expires_at)
                 return response
             except Exception as e:
                 # 记录编码token的错误
@@ -206,6 +1110,15 @@ def logout():
     """
     注销 API
     """
+    # 撤销当前令牌所属的会话，该会话续期前后的令牌（包括被复制的 Cookie）都不能继续使用
+    token = request.cookies.get("token")
+    secret_key = get_secret_key()
+    if token and secret_key:
+        sessions = get_sessions(secret_key)
+        try:
+            sessions.revoke(sessions.verify(token))
+        except InvalidTokenError:
+            pass
     response = jsonify({"success": True, "message": "Logout successful"})
     response.delete_cookie("token")
     return response
@@ -221,21 +1134,65 @@ def admin_health_check():
     return jsonify({"success": True, "message": "Admin API is healthy"}), 200
 
 
+@ADMIN_API_ROUTES.route("/items/export", methods=["GET"])
+def export_items():
+    """
+    以 CSV 或 NDJSON 格式流式导出所有物品
+    """
+    client = get_client()
+    export_format = request.args.get("format", "csv").lower()
+    if export_format == "csv":
+        generator, mimetype = iter_export_csv(client), "text/csv"
+    elif export_format == "ndjson":
+        generator, mimetype = iter_export_ndjson(client), "application/x-ndjson"
+    else:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": "Unsupported export format, use csv or ndjson.",
+                }
+            ),
+            400,
+        )
+    return Response(
+        stream_with_context(generator),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=worthit-items.{export_format}"
+        },
+    )
+
+
+@ADMIN_API_ROUTES.route("/items/import", methods=["POST"])
+def import_items():
+    """
+    从 CSV 批量导入物品，以 NDJSON 格式流式返回导入进度
+    """
+    client = get_client()
+    batch_size = max(1, min(request.args.get("batch_size", 10, type=int), 100))
+
+    def generate():
+        # 支持 multipart 上传的 file 字段，也支持直接将 CSV 作为请求体
+        upload = request.files.get("file")
+        stream = upload.stream if upload else request.stream
+        for progress in import_items_csv(client, stream, batch_size=batch_size):
+            yield json.dumps(progress, ensure_ascii=False) + "\n"
+        # 流式响应不会经过 after_admin_write，导入完成后在这里通知
+        notify_items_changed()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @ADMIN_API_ROUTES.route("/items/<item_id>", methods=["GET"])
 def get_item(item_id: str):
     """
     获取指定 ID 的物品数据
     """
-    # 云函数兼容性处理：获取 NotionItemTrackerClient 实例
-    try:
-        client: NotionItemTrackerClient = current_app.client
-    except AttributeError:
-        client = NotionItemTrackerClient(
-            os.environ.get("NOTION_TOKEN", ""), os.environ.get("NOTION_DATABASE_ID", "")
-        )
+    client = get_client()
     item = None  # 初始化为None
     try:
-        items = client.read_items(include_formula_and_rollup=True)
+        items = read_items_cached(client)
         for i in items:  # 使用 i 避免与外部 item 变量混淆
             if i.get("id") == item_id:
                 item = i
@@ -275,15 +1232,79 @@ def get_item(item_id: str):
 @ADMIN_API_ROUTES.route("/items", methods=["POST"])
 def create_item():
     """
-    创建一个新的物品数据
+    创建一个新的物品数据。
+    请求带 Idempotency-Key 头时，同一个键在有效期内只会创建一次：
+    重试直接返回第一次的响应（响应头 Idempotent-Replayed: true），不会再请求 Notion；
+    并发的重复请求等待第一个请求完成后返回同一个响应。
     """
-    # 云函数兼容性处理：获取 NotionItemTrackerClient 实例
+    store: Optional[IdempotencyStore] = getattr(current_app, "idempotency_store", None)
+    key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+    if store is None or key is None:
+        return add_item_from_request()
+    if not IDEMPOTENCY_KEY_PATTERN.match(key):
+        return (
+            jsonify({"success": False, "message": "Invalid Idempotency-Key header."}),
+            400,
+        )
+
+    # 不同数据库的幂等键相互独立
+    database = get_database()
+    scoped_key = f"{database.key if database is not None else ''}:{key}"
+    fingerprint = request_fingerprint(request.method, request.path, request.get_data())
+    state, stored = store.begin(scoped_key, fingerprint)
+    if state == MISMATCH:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "message": "Idempotency-Key has already been used for a different request.",
+                }
+            ),
+            422,
+        )
+    if state == IN_PROGRESS:
+        response = jsonify(
+            {
+                "success": False,
+                "message": "A request with this Idempotency-Key is still in progress.",
+            }
+        )
+        response.headers["Retry-After"] = "1"
+        return response, 409
+    if state == REPLAY:
+        status, mimetype, body = stored
+        response = Response(body, status=status, mimetype=mimetype)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
     try:
-        client: NotionItemTrackerClient = current_app.client
-    except AttributeError:
-        client = NotionItemTrackerClient(
-            os.environ.get("NOTION_TOKEN", ""), os.environ.get("NOTION_DATABASE_ID", "")
+        response = current_app.make_response(add_item_from_request())
+    except BaseException:
+        store.abandon(scoped_key, fingerprint)
+        raise
+    # 成功的响应和请求本身有误（4xx）的响应会被保存；其他失败（例如 Notion 不可用）允许重试
+    data = response.get_json(silent=True)
+    succeeded = 200 <= response.status_code < 300 and not (
+        isinstance(data, dict) and data.get("success") is False
+    )
+    if succeeded or 400 <= response.status_code < 500:
+        store.complete(
+            scoped_key,
+            fingerprint,
+            response.status_code,
+            response.mimetype,
+            response.get_data(),
         )
+    else:
+        store.abandon(scoped_key, fingerprint)
+    return response
+
+
+def add_item_from_request():
+    """
+    按请求体创建物品，返回视图函数的响应。
+    """
+    client = get_client()
     data = request.json
     name = data.get("properties", {}).get("name")
     entry_date = data.get("properties", {}).get("entry_date")
@@ -302,16 +1323,35 @@ def create_item():
             ),
             400,
         )
+    fields = {
+        "item_name": name,
+        "entry_date": entry_date,
+        "purchase_price": purchase_price,
+        "additional_value": additional_value
+        if (additional_value is not None or additional_value == 0)
+        else None,
+        "retirement_date": retirement_date if retirement_date is not None else None,
+        "remark": remark if remark is not None else None,
+    }
     try:
-        result = client.add_item(
-            item_name=name,
-            entry_date=entry_date,
-            purchase_price=purchase_price,
-            additional_value=additional_value
-            if (additional_value is not None or additional_value == 0)
-            else None,
-            retirement_date=retirement_date if retirement_date is not None else None,
-            remark=remark if remark is not None else None,
+        write_queue = get_write_queue()
+        if write_queue is not None:
+            queued = write_queue.enqueue_create(**fields)
+            return (
+                jsonify(
+                    {
+                        "success": True,
+                        "message": "Item creation queued.",
+                        "queued": True,
+                        **queued,
+                    }
+                ),
+                202,
+            )
+        result = client.add_item(**fields)
+    except CircuitOpenError as e:
+        return circuit_open_response(
+            "Notion is temporarily unavailable. Please retry later.", e
         )
     except Exception as e:
         return jsonify(
@@ -322,7 +1362,7 @@ def create_item():
             }
         )
     if result:
-        print(result)  # 建议使用 current_app.logger.info(result)
+        log_payload(logger, "Notion 创建物品的响应", result)
         if result.get("object") == "page" and result.get("id"):
             return jsonify(
                 {
@@ -356,15 +1396,27 @@ def delete_item(item_id):
     """
     删除指定 ID 的物品数据
     """
-    # 云函数兼容性处理：获取 NotionItemTrackerClient 实例
-    try:
-        client: NotionItemTrackerClient = current_app.client
-    except AttributeError:
-        client = NotionItemTrackerClient(
-            os.environ.get("NOTION_TOKEN", ""), os.environ.get("NOTION_DATABASE_ID", "")
-        )
+    client = get_client()
     try:
+        write_queue = get_write_queue()
+        if write_queue is not None:
+            queued = write_queue.enqueue_delete(item_id)
+            return (
+                jsonify(
+                    {
+                        "success": True,
+                        "message": "Item deletion queued.",
+                        "queued": True,
+                        **queued,
+                    }
+                ),
+                202,
+            )
         result = client.delete_item(item_id)
+    except CircuitOpenError as e:
+        return circuit_open_response(
+            "Notion is temporarily unavailable. Please retry later.", e
+        )
     except Exception as e:
         return jsonify(
             {
@@ -401,18 +1453,16 @@ def delete_item(item_id):
         )
 
 
+# 修改物品时只与加载时间在该秒数以内的缓存对比
+DIFF_MAX_AGE = 5
+
+
 @ADMIN_API_ROUTES.route("/items/<item_id>", methods=["PATCH"])
 def modify_item(item_id: str):
     """
     修改特定物品数据
     """
-    # 云函数兼容性处理：获取 NotionItemTrackerClient 实例
-    try:
-        client: NotionItemTrackerClient = current_app.client
-    except AttributeError:
-        client = NotionItemTrackerClient(
-            os.environ.get("NOTION_TOKEN", ""), os.environ.get("NOTION_DATABASE_ID", "")
-        )
+    client = get_client()
     data = request.json
     name = data.get("name")
     entry_date = data.get("entry_date")
@@ -436,7 +1486,39 @@ def modify_item(item_id: str):
         updates["备注"] = remark
 
     try:
-        result = client.update_item(page_id=item_id, updates=updates)
+        # 与刚从 Notion 加载的缓存对比，只写入发生变化的属性；
+        # 缓存较旧时可能没有包含在 Notion 中直接做的修改，写入全部属性
+        current = get_cached_item(item_id, max_age=DIFF_MAX_AGE)
+        write_queue = get_write_queue()
+        if write_queue is not None:
+            client.build_update_properties(updates)
+            updates = client.diff_updates(updates, current)
+            if not updates:
+                return jsonify(
+                    {
+                        "success": True,
+                        "message": "No changes to save.",
+                        "written_properties": [],
+                    }
+                )
+            queued = write_queue.enqueue_update(item_id, updates)
+            return (
+                jsonify(
+                    {
+                        "success": True,
+                        "message": "Item update queued.",
+                        "queued": True,
+                        "written_properties": list(updates),
+                        **queued,
+                    }
+                ),
+                202,
+            )
+        result = client.update_item(page_id=item_id, updates=updates, current=current)
+    except CircuitOpenError as e:
+        return circuit_open_response(
+            "Notion is temporarily unavailable. Please retry later.", e
+        )
     except Exception as e:
         return jsonify(
             {
@@ -448,10 +1530,14 @@ def modify_item(item_id: str):
 
     if result:
         if result.get("object") == "page" and result.get("id"):
+            written = result.get("written_properties", [])
             return jsonify(
                 {
                     "success": True,
-                    "message": "Item updated successfully.",
+                    "message": "Item updated successfully."
+                    if written
+                    else "No changes to save.",
+                    "written_properties": written,
                 }
             )
         else:
@@ -471,4 +1557,83 @@ def modify_item(item_id: str):
                 "success": False,
                 "message": "Failed to update item. Please refer to the log for details.",
             }
-        )
\ No newline at end of file
+        )
+
+
+@ADMIN_API_ROUTES.route("/profiles", methods=["GET"])
+def list_profiles():
+    """
+    列出已保存的请求性能分析结果（不包含调用栈），最新的在前
+    """
+    store = get_profile_store()
+    if store is None:
+        return (
+            jsonify({"success": False, "message": "Profiling is not configured."}),
+            404,
+        )
+    return jsonify({"success": True, "profiles": store.list(), "message": "success"})
+
+
+@ADMIN_API_ROUTES.route("/profiles/<profile_id>", methods=["GET"])
+def download_profile(profile_id: str):
+    """
+    下载一份请求性能分析结果
+    默认为 JSON；format=folded 时下载 collapsed stack 文本，可导入 speedscope 等工具生成火焰图
+    """
+    store = get_profile_store()
+    profile = store.get(profile_id) if store is not None else None
+    if profile is None:
+        return jsonify({"success": False, "message": "Profile not found."}), 404
+
+    if request.args.get("format") == "folded":
+        return Response(
+            profile.get("folded", ""),
+            mimetype="text/plain",
+            headers={
+                "Content-Disposition": f'attachment; filename="profile-{profile_id}.txt"'
+            },
+        )
+    response = jsonify(profile)
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="profile-{profile_id}.json"'
+    )
+    return response
+
+
+@ADMIN_API_ROUTES.route("/queue", methods=["GET"])
+def get_write_queue_status():
+    """
+    查看延迟写入队列中尚未写入 Notion 的操作
+    """
+    write_queue = get_write_queue()
+    if write_queue is None:
+        return jsonify(
+            {
+                "success": True,
+                "enabled": False,
+                "message": "Write-behind mode is disabled.",
+            }
+        )
+    return jsonify({"success": True, "enabled": True, **write_queue.status()})
+
+
+@ADMIN_API_ROUTES.route("/queue/<int:operation_id>/retry", methods=["POST"])
+def retry_write_operation(operation_id: int):
+    """
+    重试延迟写入队列中失败的操作
+    """
+    write_queue = get_write_queue()
+    if write_queue is None or not write_queue.retry(operation_id):
+        return jsonify({"success": False, "message": "Failed operation not found."}), 404
+    return jsonify({"success": True, "message": "Operation requeued."})
+
+
+@ADMIN_API_ROUTES.route("/queue/<int:operation_id>", methods=["DELETE"])
+def discard_write_operation(operation_id: int):
+    """
+    放弃延迟写入队列中失败的操作
+    """
+    write_queue = get_write_queue()
+    if write_queue is None or not write_queue.discard(operation_id):
+        return jsonify({"success": False, "message": "Failed operation not found."}), 404
+    return jsonify({"success": True, "message": "Operation discarded."})
@@ -0,0 +1,281 @@
+import heapq
+import math
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utils.store import STRING_COLUMNS, ItemStore
+
+# 各字段命中时的权重，物品名称比备注更重要
+FIELD_WEIGHTS = {"物品名称": 3.0, "备注": 1.0}
+
+
+def _normalize(text: str) -> str:
+    """
+    统一全角/半角和大小写，便于匹配。
+    """
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _runs(text: str) -> List[str]:
+    """
+    按空白和标点切分为连续的文字片段（汉字、字母和数字都算文字）。
+    """
+    runs: List[str] = []
+    current: List[str] = []
+    for char in text:
+        if char.isalnum():
+            current.append(char)
+        elif current:
+            runs.append("".join(current))
+            current = []
+    if current:
+        runs.append("".join(current))
+    return runs
+
+
+def index_grams(text: str) -> Dict[str, int]:
+    """
+    生成建立索引用的 n-gram（单字和相邻两字）及其出现次数。
+    中文没有空格分词，使用二元组可以在不依赖分词词典的情况下支持任意子串搜索，
+    同时索引单字以支持单个字的查询。
+    :param text: 原始文本。
+    :return: gram -> 出现次数。
+    """
+    grams: Dict[str, int] = {}
+    for run in _runs(_normalize(text)):
+        for i, char in enumerate(run):
+            grams[char] = grams.get(char, 0) + 1
+            if i + 1 < len(run):
+                bigram = run[i : i + 2]
+                grams[bigram] = grams.get(bigram, 0) + 1
+    return grams
+
+
+def query_grams(query: str) -> Set[str]:
+    """
+    生成查询用的 gram：长度大于 1 的片段使用二元组，单字片段使用单字。
+    :param query: 搜索关键词。
+    :return: gram 集合。
+    """
+    grams: Set[str] = set()
+    for run in _runs(_normalize(query)):
+        if len(run) == 1:
+            grams.add(run)
+        else:
+            grams.update(run[i : i + 2] for i in range(len(run) - 1))
+    return grams
+
+
+class ItemSearchIndex:
+    """
+    物品名称和备注的内存倒排索引，基于字符二元组（bigram），适合中文搜索。
+    索引从物品列表一次性构建，之后通过 NotionItemTrackerClient 的监听回调增量更新；
+    数据源（缓存）重新从 Notion 加载后会与新的物品列表同步，以包含其他 worker 的修改。
+    """
+
+    def __init__(self, max_age: int = 60):
+        """
+        :param max_age: 未启用缓存时索引的最长使用时间（秒），超过后重新读取物品列表同步。
+        """
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # gram -> {物品ID: 加权出现次数}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        # 物品ID -> (该物品的 gram 集合, 规范化后的名称, 建立索引时各字段的值)
+        self._documents: Dict[str, Tuple[Set[str], str, Tuple[Optional[str], ...]]] = {}
+        # 搜索结果从 ItemStore 中取出，写操作事件带来的新物品暂存在 _overrides 中
+        self._store: Optional[ItemStore] = None
+        self._overrides: Dict[str, Dict[str, Any]] = {}
+        self._version: Any = None
+        self._built_at = 0.0
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用，重置从主进程继承的锁。
+        """
+        self._lock = threading.Lock()
+
+    def is_current(self, version: Any) -> bool:
+        """
+        判断索引是否由指定版本的数据构建。
+        :param version: 数据版本，通常为缓存的加载时间；为 None 时按 max_age 判断。
+        """
+        if version is None:
+            return self._version is not None and time.time() - self._built_at < self.max_age
+        return self._version == version
+
+    def sync(self, store: ItemStore, version: Any = None) -> None:
+        """
+        使用完整的物品列表同步索引。
+        名称和备注没有变化的物品不重新切分；列表中已不存在的物品会被移除。
+        :param store: 物品列表。
+        :param version: 数据版本，用于 is_current 判断。
+        """
+        columns = [getattr(store, STRING_COLUMNS[field]) for field in FIELD_WEIGHTS]
+        with self._lock:
+            seen: Set[str] = set()
+            for row, item_id in enumerate(store.ids):
+                if store.archived[row]:
+                    continue
+                seen.add(item_id)
+                fields = tuple(column[row] for column in columns)
+                document = self._documents.get(item_id)
+                if document is not None and document[2] == fields:
+                    continue
+                self._remove_locked(item_id)
+                self._insert_locked(item_id, fields)
+            for item_id in [item_id for item_id in self._documents if item_id not in seen]:
+                self._remove_locked(item_id)
+            self._store = store
+            self._overrides = {}
+            self._version = version if version is not None else True
+            self._built_at = time.time()
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """
+        新增或替换一个物品的索引。
+        """
+        properties = item.get("properties", {})
+        fields = tuple(
+            value if isinstance(value, str) else None
+            for value in (properties.get(field) for field in FIELD_WEIGHTS)
+        )
+        with self._lock:
+            self._remove_locked(item["id"])
+            if not item.get("archived"):
+                self._insert_locked(item["id"], fields)
+                self._overrides[item["id"]] = item
+
+    def remove(self, item_id: str) -> None:
+        """
+        从索引中移除一个物品。
+        """
+        with self._lock:
+            self._remove_locked(item_id)
+
+    def _insert_locked(self, item_id: str, fields: Tuple[Optional[str], ...]) -> None:
+        weights: Dict[str, float] = {}
+        for value, field_weight in zip(fields, FIELD_WEIGHTS.values()):
+            if not value:
+                continue
+            for gram, count in index_grams(value).items():
+                weights[gram] = weights.get(gram, 0.0) + count * field_weight
+        name = "".join(_runs(_normalize(fields[0] or "")))
+        self._documents[item_id] = (set(weights), name, fields)
+        for gram, weight in weights.items():
+            self._postings.setdefault(gram, {})[item_id] = weight
+
+    def _remove_locked(self, item_id: str) -> None:
+        self._overrides.pop(item_id, None)
+        document = self._documents.pop(item_id, None)
+        if document is None:
+            return
+        for gram in document[0]:
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            posting.pop(item_id, None)
+            if not posting:
+                del self._postings[gram]
+
+    def _resolve(self, item_id: str) -> Optional[Dict[str, Any]]:
+        item = self._overrides.get(item_id)
+        if item is None and self._store is not None:
+            item = self._store.get(item_id)
+        return item
+
+    def apply_event(self, event: str, item: Dict[str, Any]) -> None:
+        """
+        根据物品变化事件增量更新索引，可直接作为 NotionItemTrackerClient 的监听者使用。
+        :param event: 事件类型，create、update 或 archive。
+        :param item: 物品字典。
+        """
+        if self._version is None:
+            # 索引尚未构建，第一次搜索时会完整构建
+            return
+        if event == "archive":
+            self.remove(item["id"])
+        else:
+            self.add(item)
+
+    def search(self, query: str, limit: int = 20) -> Tuple[int, List[Tuple[float, Dict[str, Any]]]]:
+        """
+        搜索物品，所有查询 gram 都命中的物品才会返回，按相关度从高到低排序。
+        相关度为各 gram 的加权出现次数乘以 IDF 之和，名称包含完整关键词的物品额外加权。
+        :param query: 搜索关键词。
+        :param limit: 最多返回的结果数量。
+        :return: (命中总数, [(相关度, 物品字典), ...])。
+        """
+        grams = query_grams(query)
+        if not grams:
+            return 0, []
+        phrase = "".join(_runs(_normalize(query)))
+        with self._lock:
+            postings: List[Dict[str, float]] = []
+            for gram in grams:
+                posting = self._postings.get(gram)
+                if not posting:
+                    return 0, []
+                postings.append(posting)
+            # 从最短的倒排列表开始求交集
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return 0, []
+
+            total_documents = len(self._documents)
+            scores = dict.fromkeys(candidates, 0.0)
+            for posting in postings:
+                idf = math.log(1 + total_documents / len(posting))
+                for item_id in candidates:
+                    scores[item_id] += idf * posting[item_id]
+            documents = self._documents
+            for item_id, score in scores.items():
+                if phrase in documents[item_id][1]:
+                    scores[item_id] = score * 2
+            top = heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+            results = [(score, self._resolve(item_id)) for item_id, score in top]
+        return len(scores), [(score, item) for score, item in results if item is not None]
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+
+if __name__ == "__main__":
+    import random
+
+    # 简单的性能测试：生成随机中文物品，测试建立索引和查询的耗时
+    words = ["机械键盘", "无线鼠标", "显示器", "耳机", "充电宝", "笔记本电脑", "手机壳", "移动硬盘", "路由器", "游戏手柄"]
+    remarks = ["双十一购入", "朋友送的", "二手", "用了很久", "性价比很高", "已经坏了", "备用"]
+    for size in (1000, 10000):
+        items = [
+            {
+                "id": f"item-{i}",
+                "archived": False,
+                "properties": {
+                    "物品名称": f"{random.choice(words)} {i}",
+                    "备注": random.choice(remarks),
+                },
+            }
+            for i in range(size)
+        ]
+        index = ItemSearchIndex()
+        start = time.perf_counter()
+        index.sync(ItemStore(items))
+        build_time = time.perf_counter() - start
+
+        queries = ["键盘", "无线", "二手", "耳", "笔记本 朋友", "手柄 备用"]
+        rounds = 1000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for query in queries:
+                index.search(query)
+        query_time = (time.perf_counter() - start) / (rounds * len(queries))
+        print(
+            f"{size} 个物品：建立索引 {build_time * 1000:.1f} ms，"
+            f"平均每次查询 {query_time * 1000:.3f} ms"
+        )
@@ -1,5 +1,9 @@
 from passlib.hash import argon2
 
+from utils.logs import get_logger
+
+logger = get_logger("security")
+
 def verify_password(password: str, hashed_password: str) -> bool:
     """
     Verify a password against a hashed password.
@@ -11,7 +15,7 @@ def verify_password(password: str, hashed_password: str) -> bool:
     try:
         return argon2.verify(password, hashed_password)
     except Exception as e:
-        print(f"Security: Error verifying password: {e}")
+        logger.warning("Error verifying password: %s", e)
         return False
 
 
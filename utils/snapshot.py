@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from utils.database import NotionItemTrackerClient
+from utils.logs import get_logger
+
+logger = get_logger("snapshot")
+
+SNAPSHOT_FILENAME = "items.json"
+SNAPSHOT_INDEX_FILENAME = "index.html"
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """
+    先写入临时文件再替换目标文件，避免读取方读到写了一半的快照。
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+
+
+def build_snapshot_payload(client: NotionItemTrackerClient) -> Dict[str, Any]:
+    """
+    从 Notion 读取公开物品列表（包含日均价格、服役天数等公式计算结果），
+    生成与 /api/public/items 响应结构一致的快照数据。
+    :param client: NotionItemTrackerClient 实例。
+    :return: 快照数据字典。
+    """
+    items = client.read_items(include_formula_and_rollup=True)
+    return {
+        "success": True,
+        "items": items,
+        "message": "success",
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def render_index(payload: Dict[str, Any], template_path: str = "templates/index.html") -> str:
+    """
+    将快照数据内嵌到 index.html 中，前端加载时直接使用，不再请求后端接口。
+    :param payload: build_snapshot_payload 生成的快照数据。
+    :param template_path: index.html 模板路径。
+    :return: 预渲染后的 HTML 文本。
+    """
+    with open(template_path, "r", encoding="utf-8") as file:
+        html = file.read()
+    # 转义 "</"，防止物品名称或备注中的内容提前闭合 script 标签
+    data = json.dumps(payload, ensure_ascii=False).replace("</", "<\\/")
+    snapshot_tag = (
+        f'<script id="items-snapshot" type="application/json">{data}</script>\n'
+    )
+    return html.replace("</head>", f"  {snapshot_tag}</head>", 1)
+
+
+def build_snapshot(
+    client: NotionItemTrackerClient,
+    output_dir: str,
+    with_site: bool = False,
+) -> Dict[str, Any]:
+    """
+    导出快照文件 items.json，可选同时导出预渲染的 index.html 和静态资源，
+    用于纯 CDN 托管。
+    :param client: NotionItemTrackerClient 实例。
+    :param output_dir: 输出目录。
+    :param with_site: 是否同时导出 index.html 和 static 目录。
+    :return: 快照数据字典。
+    """
+    payload = build_snapshot_payload(client)
+    os.makedirs(output_dir, exist_ok=True)
+    _write_atomic(
+        os.path.join(output_dir, SNAPSHOT_FILENAME),
+        json.dumps(payload, ensure_ascii=False),
+    )
+    if with_site:
+        _write_atomic(
+            os.path.join(output_dir, SNAPSHOT_INDEX_FILENAME), render_index(payload)
+        )
+        shutil.copytree("static", os.path.join(output_dir, "static"), dirs_exist_ok=True)
+    logger.info(
+        "已导出 %s 个物品到 %s", len(payload["items"]), os.path.abspath(output_dir)
+    )
+    return payload
+
+
+def snapshot_exists(output_dir: str) -> bool:
+    """
+    检查快照文件是否已生成。
+    """
+    return os.path.isfile(os.path.join(output_dir, SNAPSHOT_FILENAME))
+
+
+class SnapshotRefresher:
+    """
+    在后台刷新快照文件。
+    支持按固定间隔定时刷新，也支持在管理员写操作后触发刷新。
+    同一时间只会有一个刷新任务在执行，期间收到的刷新请求会合并为一次。
+    """
+
+    def __init__(
+        self, client: NotionItemTrackerClient, output_dir: str, interval: int = 0
+    ):
+        """
+        :param client: NotionItemTrackerClient 实例。
+        :param output_dir: 快照输出目录。
+        :param interval: 定时刷新间隔（秒），为 0 时不启用定时刷新。
+        """
+        self.client = client
+        self.output_dir = output_dir
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> bool:
+        """
+        同步刷新一次快照。
+        :return: 刷新成功返回 True，否则返回 False。
+        """
+        with self._lock:
+            self._pending.clear()
+            try:
+                build_snapshot(self.client, self.output_dir)
+                return True
+            except Exception as e:
+                logger.error("刷新快照时发生错误: %s", e)
+                return False
+
+    def request_refresh(self) -> None:
+        """
+        异步请求刷新快照，不阻塞当前请求。
+        如果已有刷新任务在执行，则在其完成后再刷新一次。
+        """
+        self._pending.set()
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self) -> None:
+        while self._pending.is_set():
+            if not self._lock.acquire(blocking=False):
+                # 正在刷新的任务结束后会再次检查 pending 标记
+                return
+            self._lock.release()
+            self.refresh()
+
+    def start(self) -> None:
+        """
+        启动定时刷新线程，如快照文件不存在会先生成一次。
+        """
+        if not snapshot_exists(self.output_dir):
+            self.request_refresh()
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def after_fork(self) -> None:
+        """
+        在 worker 进程 fork 后调用。
+        定时刷新只在主进程中执行，worker 只负责写操作后触发的刷新，
+        这里丢弃从主进程继承的锁状态，避免 fork 时锁正被持有导致死锁。
+        """
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._pending.set()
+            self._drain()
@@ -0,0 +1,269 @@
+import math
+import sys
+from functools import lru_cache
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+
+# 数值列：属性名 -> 列名，缺失值使用 NaN 表示
+NUMBER_COLUMNS = {"购买价格": "prices", "附加价值": "additional_values"}
+# 日期列：属性名 -> 列名，以 date.toordinal() 存储，缺失值为 0
+DATE_COLUMNS = {"入役日期": "entry_dates", "退役日期": "retirement_dates"}
+# 字符串列：属性名 -> 列名，重复出现的字符串（如公式结果 "1.00 元"）会被驻留共享
+STRING_COLUMNS = {
+    "物品名称": "names",
+    "备注": "remarks",
+    "日均价格": "daily_prices",
+    "服役天数": "service_days",
+}
+ITEM_KEYS = ("id", "archived", "last_edited_time", "properties")
+# 转换回字典时的属性顺序与各属性的类型
+_PROPERTY_KINDS = (
+    [(prop_name, "string") for prop_name in STRING_COLUMNS]
+    + [(prop_name, "number") for prop_name in NUMBER_COLUMNS]
+    + [(prop_name, "date") for prop_name in DATE_COLUMNS]
+)
+_PROPERTY_COLUMNS = (
+    list(STRING_COLUMNS.values())
+    + list(NUMBER_COLUMNS.values())
+    + list(DATE_COLUMNS.values())
+)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+@lru_cache(maxsize=4096)
+def _format_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _to_ordinal(value: Any) -> int:
+    """
+    将 "YYYY-MM-DD" 格式的日期转换为序数，不是该格式（如带时间或日期范围）时返回 0。
+    """
+    if not isinstance(value, str) or len(value) != 10:
+        return 0
+    try:
+        return date.fromisoformat(value).toordinal()
+    except ValueError:
+        return 0
+
+
+class ItemStore:
+    """
+    以列存储的只读物品集合，用于在内存中长期保存物品列表。
+    每个属性一列：价格为 array('d')，日期为 array('l') 中的序数，字符串会被驻留，
+    不需要为每个物品重复保存中文属性名和 dict 结构。
+    无法放入对应列的值（其他属性、日期范围、非数字价格等）保存在 extras 中，转换回字典时保持原样。
+    只在需要输出 JSON 时才转换为与 read_items 相同结构的字典。
+    """
+
+    __slots__ = (
+        "ids",
+        "archived",
+        "last_edited_times",
+        "prices",
+        "additional_values",
+        "entry_dates",
+        "retirement_dates",
+        "names",
+        "remarks",
+        "daily_prices",
+        "service_days",
+        "extras",
+        "_index",
+    )
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        """
+        :param items: read_items 返回的物品列表。
+        """
+        self.ids: List[str] = []
+        self.archived = bytearray()
+        self.last_edited_times: List[Optional[str]] = []
+        self.prices = array("d")
+        self.additional_values = array("d")
+        self.entry_dates = array("l")
+        self.retirement_dates = array("l")
+        self.names: List[Optional[str]] = []
+        self.remarks: List[Optional[str]] = []
+        self.daily_prices: List[Optional[str]] = []
+        self.service_days: List[Optional[str]] = []
+        # 行号 -> {"properties": {...}, 其他键: ...}，只有少数物品会有
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        # 物品ID -> 行号
+        self._index: Dict[str, int] = {}
+        for item in items:
+            self._append(item)
+
+    def _append(self, item: Dict[str, Any]) -> None:
+        row = len(self.ids)
+        properties = dict(item.get("properties", {}))
+        extra: Dict[str, Any] = {
+            key: value for key, value in item.items() if key not in ITEM_KEYS
+        }
+
+        for prop_name, column in NUMBER_COLUMNS.items():
+            value = properties.get(prop_name)
+            if value is None or (
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+            ):
+                properties.pop(prop_name, None)
+                getattr(self, column).append(math.nan if value is None else value)
+            else:
+                getattr(self, column).append(math.nan)
+        for prop_name, column in DATE_COLUMNS.items():
+            ordinal = _to_ordinal(properties.get(prop_name))
+            if ordinal or properties.get(prop_name) is None:
+                properties.pop(prop_name, None)
+            getattr(self, column).append(ordinal)
+        for prop_name, column in STRING_COLUMNS.items():
+            value = properties.get(prop_name)
+            if value is None or isinstance(value, str):
+                properties.pop(prop_name, None)
+                getattr(self, column).append(_intern(value))
+            else:
+                getattr(self, column).append(None)
+
+        # 剩下的属性没有对应的列，原样保存
+        if properties:
+            extra["properties"] = properties
+        if extra:
+            self.extras[row] = extra
+
+        self.ids.append(sys.intern(item["id"]))
+        self.archived.append(1 if item.get("archived") else 0)
+        self.last_edited_times.append(_intern(item.get("last_edited_time")))
+        self._index[self.ids[row]] = row
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._index
+
+    def row(self, item_id: str) -> Optional[int]:
+        """
+        获取物品所在的行号，不存在时返回 None。
+        """
+        return self._index.get(item_id)
+
+    def _columns(self) -> List[Any]:
+        return [getattr(self, column) for column in _PROPERTY_COLUMNS]
+
+    def _build(self, row: int, values: Any) -> Dict[str, Any]:
+        properties: Dict[str, Any] = {}
+        for (prop_name, kind), value in zip(_PROPERTY_KINDS, values):
+            if kind == "string":
+                if value is not None:
+                    properties[prop_name] = value
+            elif kind == "number":
+                if value == value:  # NaN 表示缺失
+                    properties[prop_name] = int(value) if value.is_integer() else value
+            elif value:
+                properties[prop_name] = _format_date(value)
+
+        item = {
+            "id": self.ids[row],
+            "archived": bool(self.archived[row]),
+            "last_edited_time": self.last_edited_times[row],
+            "properties": properties,
+        }
+        extra = self.extras.get(row)
+        if extra:
+            properties.update(extra.get("properties", {}))
+            item.update((key, value) for key, value in extra.items() if key != "properties")
+        return item
+
+    def to_item(self, row: int) -> Dict[str, Any]:
+        """
+        将一行转换为与 read_items 相同结构的物品字典。
+        :param row: 行号。
+        :return: 物品字典（每次调用都会创建新的字典）。
+        """
+        return self._build(row, [column[row] for column in self._columns()])
+
+    def get(self, item_id: str) -> Optional[Dict[str, Any]]:
+        """
+        按物品ID获取物品字典，不存在时返回 None。
+        """
+        row = self._index.get(item_id)
+        return self.to_item(row) if row is not None else None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row, values in enumerate(zip(*self._columns())):
+            yield self._build(row, values)
+
+    def to_items(self) -> List[Dict[str, Any]]:
+        """
+        转换为与 read_items 相同结构的物品列表。
+        """
+        return list(self)
+
+
+if __name__ == "__main__":
+    import gc
+    import json
+    import random
+    import time
+    import tracemalloc
+
+    # 内存占用测试：对比从 JSON 解码得到的字典列表（原缓存的内存表示）与 ItemStore
+    def make_items(size: int) -> List[Dict[str, Any]]:
+        names = ["机械键盘", "无线鼠标", "显示器", "耳机", "充电宝", "笔记本电脑", "手机壳"]
+        items = []
+        for i in range(size):
+            days = random.randint(1, 1000)
+            price = round(random.uniform(10, 10000), 2)
+            properties: Dict[str, Any] = {
+                "物品名称": f"{random.choice(names)} {i}",
+                "购买价格": price,
+                "入役日期": date.fromordinal(738000 + random.randint(0, 1000)).isoformat(),
+                "日均价格": f"{price / days:.2f} 元",
+                "服役天数": f"{days} 天",
+            }
+            if i % 3 == 0:
+                properties["备注"] = "双十一购入"
+            if i % 5 == 0:
+                properties["附加价值"] = 50
+            if i % 7 == 0:
+                properties["退役日期"] = "2025-01-01"
+            items.append(
+                {
+                    "id": f"{i:08d}-0000-4000-8000-000000000000",
+                    "archived": False,
+                    "last_edited_time": "2025-01-01T00:00:00.000Z",
+                    "properties": properties,
+                }
+            )
+        return items
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return result, size, elapsed
+
+    for size in (1000, 10000):
+        encoded = json.dumps(make_items(size), ensure_ascii=False)
+        dicts, dict_bytes, _ = measure(lambda: json.loads(encoded))
+        # 从单独解码的数据构建，解码得到的临时字典在构建完成后释放，不计入 ItemStore 的占用
+        store, store_bytes, build_time = measure(lambda: ItemStore(json.loads(encoded)))
+        assert store.to_items() == dicts
+        start = time.perf_counter()
+        for _ in range(10):
+            store.to_items()
+        convert_time = (time.perf_counter() - start) / 10
+        print(
+            f"{size} 个物品：字典列表 {dict_bytes / 1024:.0f} KiB，"
+            f"ItemStore {store_bytes / 1024:.0f} KiB "
+            f"({store_bytes / dict_bytes:.0%})，"
+            f"构建 {build_time * 1000:.1f} ms，转换回字典 {convert_time * 1000:.1f} ms"
+        )
+        del dicts, store
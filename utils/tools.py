@@ -1,4 +1,6 @@
 import json
+import threading
+import time
 
 def load_config() -> dict:
     """
@@ -18,4 +20,38 @@ def load_config() -> dict:
         return {}
     except Exception as e:
         print(f"加载配置时发生错误: {e}")
-        return {}
\ No newline at end of file
+        return {}
+
+class RateLimiter:
+    """
+    简单的令牌桶限流器，线程安全。
+    Notion API 的平均速率限制约为每秒 3 个请求。
+    """
+
+    def __init__(self, rate: float = 3.0, burst: int = 3):
+        """
+        :param rate: 每秒补充的令牌数量。
+        :param burst: 令牌桶容量，即允许的最大突发请求数。
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        获取一个令牌，令牌不足时阻塞等待。
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,188 @@
+import codecs
+import csv
+import io
+import json
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from utils.database import NotionItemTrackerClient
+from utils.models import ItemProperties
+from utils.tools import RateLimiter
+
+# 导出列，与导入列使用相同的 Notion 属性名，导出的文件可以直接重新导入
+EXPORT_COLUMNS = [
+    "id",
+    "物品名称",
+    "入役日期",
+    "购买价格",
+    "附加价值",
+    "退役日期",
+    "备注",
+    "服役天数",
+    "日均价格",
+]
+IMPORT_COLUMNS = ["物品名称", "入役日期", "购买价格", "附加价值", "退役日期", "备注"]
+# ItemProperties 在入役日期为空时发出的警告，导入时允许入役日期为空
+EMPTY_ENTRY_DATE_WARNING = "入役日期"
+
+
+def _format_csv_value(value: Any) -> Any:
+    """
+    将物品属性值转换为适合写入 CSV 的值，列表和日期范围等复杂结构以 JSON 形式写入。
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def iter_export_csv(client: NotionItemTrackerClient) -> Iterator[str]:
+    """
+    以 CSV 格式逐行导出所有物品，随 Notion 分页读取逐步输出。
+    输出带 BOM，方便 Excel 正确识别中文。
+    :param client: NotionItemTrackerClient 实例。
+    :return: CSV 文本块的迭代器。
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield "\ufeff" + buffer.getvalue()
+
+    for item in client.iter_items(include_formula_and_rollup=True):
+        buffer.seek(0)
+        buffer.truncate()
+        properties = item.get("properties", {})
+        writer.writerow(
+            [item["id"]]
+            + [_format_csv_value(properties.get(column)) for column in EXPORT_COLUMNS[1:]]
+        )
+        yield buffer.getvalue()
+
+
+def iter_export_ndjson(client: NotionItemTrackerClient) -> Iterator[str]:
+    """
+    以 NDJSON（每行一个 JSON 对象）格式逐个导出所有物品。
+    :param client: NotionItemTrackerClient 实例。
+    :return: NDJSON 文本行的迭代器。
+    """
+    for item in client.iter_items(include_formula_and_rollup=True):
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def parse_import_row(row: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    使用 ItemProperties 模型校验一行 CSV 数据，并转换为 add_item 的参数。
+    :param row: csv.DictReader 读取到的一行数据，列名为 Notion 属性名。
+    :return: 可直接传入 NotionItemTrackerClient.add_item 的参数字典。
+    :raises pydantic.ValidationError: 如果数据不符合 ItemProperties 模型。
+    :raises ValueError: 如果模型在解析时发出了警告（例如附加价值不是数字），这些值会被丢弃，不能直接写入。
+    """
+    values = {
+        column: row[column].strip()
+        for column in IMPORT_COLUMNS
+        if row.get(column) is not None and row[column].strip() != ""
+    }
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", UserWarning)
+        properties = ItemProperties.model_validate(values)
+    # 入役日期为空是允许的（预售品），其他警告都说明某个值无法解析，作为该行的错误
+    messages = [
+        str(warning.message)
+        for warning in caught
+        if issubclass(warning.category, UserWarning)
+        and not str(warning.message).startswith(EMPTY_ENTRY_DATE_WARNING)
+    ]
+    if messages:
+        raise ValueError("; ".join(messages))
+
+    return {
+        "item_name": properties.item_name,
+        "entry_date": properties.service_start_date.isoformat()
+        if properties.service_start_date
+        else None,
+        "purchase_price": properties.purchase_price,
+        "additional_value": properties.additional_value,
+        # 模型会将空的退役日期默认为今天，导入时只写入 CSV 中明确填写的值
+        "retirement_date": properties.service_end_date.isoformat()
+        if "退役日期" in values
+        else None,
+        "remark": properties.note,
+    }
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+def import_items_csv(
+    client: NotionItemTrackerClient,
+    stream: BinaryIO,
+    batch_size: int = 10,
+    rate_limiter: Optional[RateLimiter] = None,
+    max_workers: int = 3,
+) -> Iterator[Dict[str, Any]]:
+    """
+    从 CSV 流中逐行解析物品并分批写入 Notion，每处理完一批返回一次进度。
+    整个过程不会把文件完整读入内存。
+    :param client: NotionItemTrackerClient 实例。
+    :param stream: CSV 文件的二进制流（UTF-8 编码，可带 BOM）。
+    :param batch_size: 每批写入的物品数量。
+    :param rate_limiter: 写入 Notion 时使用的限流器，默认每秒 3 个请求。
+    :param max_workers: 每批并发写入的线程数。
+    :return: 进度字典的迭代器，最后一项的 done 为 True。
+    """
+    rate_limiter = rate_limiter or RateLimiter()
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(stream))
+    progress = {"processed": 0, "created": 0, "failed": 0}
+
+    def create(item: Dict[str, Any]) -> Dict[str, Any]:
+        rate_limiter.acquire()
+        return client.add_item(**item)
+
+    def flush(
+        executor: ThreadPoolExecutor,
+        batch: List[Tuple[int, Dict[str, Any]]],
+        errors: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        futures = [(line, executor.submit(create, item)) for line, item in batch]
+        for line, future in futures:
+            try:
+                result = future.result()
+                if result.get("object") == "page" and result.get("id"):
+                    progress["created"] += 1
+                    continue
+                errors.append({"line": line, "error": "Notion 返回了非预期的响应"})
+            except Exception as e:
+                errors.append({"line": line, "error": str(e)})
+            progress["failed"] += 1
+        return {**progress, "errors": errors, "done": False}
+
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    errors: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for row in reader:
+            line = reader.line_num
+            progress["processed"] += 1
+            try:
+                batch.append((line, parse_import_row(row)))
+            except ValidationError as e:
+                progress["failed"] += 1
+                errors.append({"line": line, "error": _format_validation_error(e)})
+            except ValueError as e:
+                progress["failed"] += 1
+                errors.append({"line": line, "error": str(e)})
+
+            if len(batch) >= batch_size:
+                yield flush(executor, batch, errors)
+                batch, errors = [], []
+
+        if batch or errors:
+            yield flush(executor, batch, errors)
+
+    yield {**progress, "errors": [], "done": True}